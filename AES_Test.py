@@ -3,9 +3,20 @@ Created on Jun 6, 2015
 
 @author: bscain
 '''
+import importlib.util
+import io
+import os
+import tempfile
+import threading
 import unittest
 from Cryptography.AES_cipher import AES, AES_128, AES_192, AES_256
 from Cryptography.AES_cipher import toArr 
+from Cryptography.AES_cipher import KeyScheduleCache, FIPSTracer, AESContext
+from Cryptography.AES_cipher import StageProfiler
+from Cryptography.AES_concurrent import BatchExecutor
+from Cryptography.AES_modes import CBCEncryptor
+from Cryptography import AES_tables
+from Cryptography import benchmark
 
 class Test(unittest.TestCase):
 
@@ -144,6 +155,243 @@ class Test(unittest.TestCase):
         self.assertEqual(plainText, decText3, "AES 256- Test Decrypt")
          
          
+    def testCipherTTable(self):
+        plainText = \
+            [0x00, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66, 0x77, 0x88, 
+             0x99, 0xaa, 0xbb, 0xcc, 0xdd, 0xee, 0xff]
+        
+        vectors = [ \
+            (AES_128, list(range(16)),
+             [0x69, 0xc4, 0xe0, 0xd8, 0x6a, 0x7b, 0x04, 0x30, 0xd8, 
+              0xcd, 0xb7, 0x80, 0x70, 0xb4, 0xc5, 0x5a]),
+            (AES_192, list(range(24)),
+             [0xdd, 0xa9, 0x7c, 0xa4, 0x86, 0x4c, 0xdf, 0xe0, 0x6e,
+              0xaf, 0x70, 0xa0, 0xec, 0x0d, 0x71, 0x91]),
+            (AES_256, list(range(32)),
+             [0x8e, 0xa2, 0xb7, 0xca, 0x51, 0x67, 0x45, 0xbf, 0xea, 
+              0xfc, 0x49, 0x90, 0x4b, 0x49, 0x60, 0x89]) ]
+        
+        for keyLength, key, expected in vectors:
+            aes = AES(keyLength)
+            cipherText = aes._CipherTTable(plainText, key)
+            self.assertEqual(cipherText, expected, "AES T-Table - Test Cipher")
+            decText = aes._InvCipherTTable(cipherText, key)
+            self.assertEqual(decText, plainText, "AES T-Table - Test Decrypt")
+    # end testCipherTTable
+    
+    def testKeyScheduleCache(self):
+        cache = KeyScheduleCache(capacity = 2)
+        aes = AES(AES_128, keyCache = cache)
+        plainText = list(range(16))
+        keys = [ [k] * 16 for k in range(3) ]
+        
+        expected = aes._CipherTTable(plainText, keys[0])
+        self.assertEqual(aes._CipherTTable(plainText, keys[0]), expected)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        
+        # Touch key 1 then key 0 so key 1 is the least recently used when 
+        # key 2 is added
+        aes._CipherTTable(plainText, keys[1])
+        aes._CipherTTable(plainText, keys[0])
+        aes._CipherTTable(plainText, keys[2])
+        stats = cache.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["evictions"], 1)
+        
+        aes._CipherTTable(plainText, keys[0])
+        self.assertEqual(cache.stats()["misses"], 3, "Key 0 should be cached")
+        aes._CipherTTable(plainText, keys[1])
+        self.assertEqual(cache.stats()["misses"], 4, "Key 1 should be evicted")
+        
+        # Keys of different lengths must never share a schedule
+        aes192 = AES(AES_192, keyCache = cache)
+        aes192._CipherTTable(plainText, list(range(24)))
+        self.assertEqual(cache.stats()["misses"], 5)
+    # end testKeyScheduleCache
+    
+    def testBlockAPI(self):
+        plainText = bytes.fromhex("00112233445566778899aabbccddeeff")
+        vectors = [ \
+            (AES_128, bytes(range(16)), "69c4e0d86a7b0430d8cdb78070b4c55a"),
+            (AES_192, bytes(range(24)), "dda97ca4864cdfe06eaf70a0ec0d7191"),
+            (AES_256, bytes(range(32)), "8ea2b7ca516745bfeafc49904b496089") ]
+        
+        for keyLength, key, expected in vectors:
+            aes = AES(keyLength)
+            expected = bytes.fromhex(expected)
+            self.assertEqual(aes.encrypt_block(plainText, key), expected)
+            self.assertEqual(aes.decrypt_block(expected, key), plainText)
+            
+            # In place operation on a buffer at an offset
+            buf = bytearray(48)
+            buf[16:32] = plainText
+            view = memoryview(buf)
+            aes.encrypt_block(view[16:32], bytearray(key), out = view, offset = 16)
+            self.assertEqual(bytes(buf[16:32]), expected)
+            self.assertEqual(bytes(buf[0:16]), bytes(16))
+            self.assertEqual(bytes(buf[32:48]), bytes(16))
+            aes.decrypt_block(view[16:32], memoryview(key), out = buf, offset = 16)
+            self.assertEqual(bytes(buf[16:32]), plainText)
+            
+            # Keys of the wrong length and outputs that are too short
+            self.assertRaises(AssertionError, aes.encrypt_block, plainText, key + bytes(8))
+            self.assertRaises(AssertionError, aes.decrypt_block, plainText, key[:-4])
+            self.assertRaises(AssertionError, aes.encrypt_block, plainText, key,
+                              out = bytearray(20), offset = 10)
+            self.assertRaises(AssertionError, aes.decrypt_block, plainText, key,
+                              out = bytearray(32), offset = -1)
+            context = AESContext(key)
+            self.assertRaises(AssertionError, context.encrypt_block, plainText,
+                              out = bytearray(20), offset = 10)
+            self.assertRaises(AssertionError, context.decrypt_block, plainText,
+                              out = bytearray(32), offset = -16)
+    # end testBlockAPI
+    
+    def testTracer(self):
+        plainText = list(bytes.fromhex("00112233445566778899aabbccddeeff"))
+        key = list(range(16))
+        
+        stream = io.StringIO()
+        aes = AES(AES_128, tracer = FIPSTracer(stream))
+        cipherText = aes._Cipher(list(plainText), key)
+        lines = stream.getvalue().splitlines()
+        
+        # A selection of lines from FIPS-197 Appendix C.1
+        for line in [ "round[ 0].input    00112233445566778899aabbccddeeff",
+                      "round[ 0].k_sch    000102030405060708090a0b0c0d0e0f",
+                      "round[ 1].start    00102030405060708090a0b0c0d0e0f0",
+                      "round[ 1].s_box    63cab7040953d051cd60e0e7ba70e18c",
+                      "round[ 1].s_row    6353e08c0960e104cd70b751bacad0e7",
+                      "round[ 1].m_col    5f72641557f5bc92f7be3b291db9f91a",
+                      "round[ 1].k_sch    d6aa74fdd2af72fadaa678f1d6ab76fe",
+                      "round[10].output   69c4e0d86a7b0430d8cdb78070b4c55a" ]:
+            self.assertIn(line, lines)
+        self.assertEqual(len(lines), 2 + 5 * 9 + 5)
+        
+        stream = io.StringIO()
+        aes.setTracer(FIPSTracer(stream))
+        aes._InvCipher(cipherText, key)
+        lines = stream.getvalue().splitlines()
+        for line in [ "round[ 0].iinput   69c4e0d86a7b0430d8cdb78070b4c55a",
+                      "round[ 0].ik_sch   13111d7fe3944a17f307a78b4d2b30c5",
+                      "round[ 1].istart   7ad5fda789ef4e272bca100b3d9ff59f",
+                      "round[ 1].is_row   7a9f102789d5f50b2beffd9f3dca4ea7",
+                      "round[ 1].is_box   bd6e7c3df2b5779e0b61216e8b10b689",
+                      "round[ 1].ik_sch   549932d1f08557681093ed9cbe2c974e",
+                      "round[10].ioutput  00112233445566778899aabbccddeeff" ]:
+            self.assertIn(line, lines)
+        
+        # Nothing is traced once the tracer is removed
+        aes.setTracer(None)
+        aes._Cipher(list(plainText), key)
+        self.assertEqual(stream.getvalue().splitlines(), lines)
+    # end testTracer
+    
+    def testThreadSafety(self):
+        key = bytes(range(16))
+        context = AESContext(key)
+        self.assertRaises(AttributeError, setattr, context, "keyLength", 8)
+        
+        blocks = [ bytes([i]) * 16 for i in range(64) ]
+        expected = [ AES(AES_128).encrypt_block(b, key) for b in blocks ]
+        
+        # The reference cipher on a single shared instance from many threads
+        aes = AES(AES_128)
+        results = {}
+        def worker(i):
+            results[i] = bytes(aes._Cipher(list(blocks[i]), list(key)))
+        threads = [ threading.Thread(target = worker, args = (i,)) for i in range(len(blocks)) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([ results[i] for i in range(len(blocks)) ], expected)
+        
+        with BatchExecutor(maxWorkers = 4) as executor:
+            self.assertEqual(executor.encryptBlocks(context, blocks), expected)
+            self.assertEqual(executor.decryptBlocks(context, expected), blocks)
+            
+            messages = [ bytes(range(i)) for i in range(40) ]
+            ivs = [ bytes([i]) * 16 for i in range(40) ]
+            outputs = executor.cryptMessages(lambda i: CBCEncryptor(key, ivs[i]), messages)
+            for i in range(40):
+                enc = CBCEncryptor(key, ivs[i])
+                self.assertEqual(outputs[i], enc.update(messages[i]) + enc.finalize())
+    # end testThreadSafety
+    
+    def testProfiler(self):
+        plainText = list(bytes.fromhex("00112233445566778899aabbccddeeff"))
+        key = list(range(32))
+        
+        # Without a profiler the class methods are used directly
+        aes = AES(AES_256)
+        self.assertIs(type(aes), AES)
+        
+        profiler = StageProfiler()
+        aes = AES(AES_256, keyCache = KeyScheduleCache(), profiler = profiler)
+        cipherText = aes._Cipher(list(plainText), key)
+        self.assertEqual(bytes(cipherText).hex(), "8ea2b7ca516745bfeafc49904b496089")
+        aes.encrypt_block(bytes(plainText), bytes(key))
+        
+        stats = profiler.stats()
+        self.assertEqual(stats[(256, "KeyExpansion")][0], 1)
+        self.assertEqual(stats[(256, "SubBytes")][0], 14)
+        self.assertEqual(stats[(256, "ShiftRows")][0], 14)
+        self.assertEqual(stats[(256, "MixColumns")][0], 13)
+        self.assertEqual(stats[(256, "AddRoundKey")][0], 15)
+        self.assertEqual(stats[(256, "EncryptBlock")][0], 1)
+        self.assertIn("SubBytes", profiler.report())
+        
+        profiler.reset()
+        self.assertEqual(profiler.stats()[(256, "SubBytes")], (0, 0))
+    # end testProfiler
+    
+    def testFrozenTables(self):
+        (mul, inv, sbox, invSbox), aesTables = AES_tables.generateTables()
+        
+        # The lazily built tables match a fresh build
+        AES(AES_128).encrypt_block(bytes(16), bytes(16))
+        for name, table in aesTables.items():
+            self.assertEqual(getattr(AES, name), table, name)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = AES_tables.freeze(os.path.join(directory, "frozen.py"))
+            spec = importlib.util.spec_from_file_location("frozen", path)
+            frozen = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(frozen)
+        
+        self.assertEqual(frozen.MUL, mul)
+        self.assertEqual(frozen.INV, inv)
+        self.assertEqual(frozen.SBOX, sbox)
+        self.assertEqual(frozen.INV_SBOX, invSbox)
+        self.assertEqual(frozen.AES_TABLES, aesTables)
+    # end testFrozenTables
+
+    def testCompareBenchmarks(self):
+        def run(quick, value, parameters = True):
+            result = { "quick": quick,
+                       "results": { "x": { "value": value, "higherIsBetter": True } } }
+            if parameters:
+                result["parameters"] = benchmark._Parameters(quick)
+            return result
+
+        # Runs with the same parameters are compared
+        self.assertEqual(benchmark.compareResults(run(True, 10.0), run(True, 10.0)), [])
+        self.assertEqual(len(benchmark.compareResults(run(True, 10.0), run(True, 5.0))), 1)
+        self.assertRaises(ValueError, benchmark.compareResults, run(False, 10.0), run(True, 10.0))
+        changed = run(True, 10.0)
+        changed["parameters"]["bulkSize"] *= 2
+        self.assertRaises(ValueError, benchmark.compareResults, run(True, 10.0), changed)
+
+        # A baseline saved without parameters is compared by the quick flag
+        legacy = run(True, 10.0, parameters = False)
+        self.assertEqual(benchmark.compareResults(legacy, run(True, 10.0)), [])
+        self.assertEqual(len(benchmark.compareResults(legacy, run(True, 5.0))), 1)
+        self.assertRaises(ValueError, benchmark.compareResults, legacy, run(False, 10.0))
+        self.assertRaises(ValueError, benchmark.compareResults,
+                          run(False, 10.0, parameters = False), run(True, 10.0))
+    # end testCompareBenchmarks
         
     def testKeyExpansion(self):
          
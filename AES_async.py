@@ -0,0 +1,117 @@
+# Name: AES_async.py
+# Purpose:  Encrypts and decrypts asyncio streams without blocking the event
+#           loop.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: This is the asyncio counterpart of AES_stream.  The reader is read a
+# batch at a time and every batch larger than inlineSize, by default a single
+# block, is passed through the cipher in an executor, so the event loop only
+# ever waits on I/O.  Even a 512 byte network read takes about half a
+# millisecond to encrypt in pure Python, which would hold up every other
+# connection on the loop.  The
+# writer is drained after every batch, so a slow peer holds back reading
+# rather than letting output pile up in memory.
+# >>> import AES_async, AES_modes
+# >>> async def handle(reader, writer):
+# ...     cipher = AES_modes.CTREncryptor(key, counter)
+# ...     await AES_async.cryptStreamAsync(reader, writer, cipher)
+#
+# A shared executor, e.g. a concurrent.futures.ThreadPoolExecutor, can be
+# given to bound the number of threads used by all of the connections.
+
+import asyncio
+
+# The default number of bytes passed to the cipher at a time
+DEFAULT_BATCH_SIZE = 1 << 16
+
+# Batches up to this size, a single block, are cheap enough to run on the
+# event loop itself
+DEFAULT_INLINE_SIZE = 16
+
+async def cipherChunksAsync( reader, cipher, batchSize = DEFAULT_BATCH_SIZE,
+                             executor = None, inlineSize = DEFAULT_INLINE_SIZE ):
+    """
+    The async cipher stage.  Reads the reader a batch at a time, passes every
+    batch through the cipher and finalizes it once the reader is at EOF.
+    Empty outputs are not passed on.
+
+    @param reader:  An asyncio.StreamReader or anything with an async read()
+    @param cipher: An object with update() and finalize() methods
+    @param batchSize: The most bytes read and processed at a time
+    @param executor: The executor to run the cipher in, the loop default if
+                     not given
+    @param inlineSize: Batches no larger than this are processed directly on
+                       the event loop
+
+    @return: An async generator of the output chunks
+    """
+    assert( batchSize > 0 )
+    loop = asyncio.get_running_loop()
+
+    while True:
+        chunk = await reader.read(batchSize)
+        if not chunk:
+            break
+        if len(chunk) <= inlineSize:
+            out = cipher.update(chunk)
+        else:
+            out = await loop.run_in_executor(executor, cipher.update, chunk)
+        if out:
+            yield out
+    # end while True
+
+    # finalize only handles the last buffered block so is always run inline
+    out = cipher.finalize()
+    if out:
+        yield out
+# end cipherChunksAsync
+
+async def cryptStreamAsync( reader, writer, cipher, batchSize = DEFAULT_BATCH_SIZE,
+                            executor = None, inlineSize = DEFAULT_INLINE_SIZE ):
+    """
+    Runs the cipher from the reader to the writer.  Whether this encrypts or
+    decrypts depends on the cipher given.  The writer is not closed.
+
+    @param reader:  An asyncio.StreamReader or anything with an async read()
+    @param writer: An asyncio.StreamWriter or anything with write() and an
+                   async drain()
+    @param cipher: An object with update() and finalize() methods
+    @param batchSize: The most bytes read and processed at a time
+    @param executor: The executor to run the cipher in, the loop default if
+                     not given
+    @param inlineSize: Batches no larger than this are processed directly on
+                       the event loop
+
+    @return: The number of bytes written
+    """
+    total = 0
+    async for out in cipherChunksAsync(reader, cipher, batchSize, executor, inlineSize):
+        writer.write(out)
+        total += len(out)
+        await writer.drain()
+    # end async for out
+    return total
+# end cryptStreamAsync
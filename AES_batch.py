@@ -0,0 +1,191 @@
+# Name: AES_batch.py
+# Purpose:  Encrypts and decrypts many records, each under its own key, in a
+#           single call.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: The keys and the blocks (or messages) are parallel sequences, so
+# keys[i] is used for blocks[i].  Every distinct key is expanded once for the
+# whole batch, without going through the shared key schedule cache, and the
+# work is grouped by key.  When NumPy is installed the blocks of a batch are
+# encrypted together by AES_numpy, key schedules included.
+# >>> import AES_batch
+# >>> cipherTexts = AES_batch.encryptBlocks(dataKeys, blocks)
+# >>> plainTexts = AES_batch.decryptBlocks(dataKeys, cipherTexts)
+# >>> cipherTexts = AES_batch.cryptMessages(dataKeys, messages,
+# ...     lambda key, aes, i: AES_modes.CTREncryptor(key, counters[i], aes = aes))
+
+from AES_cipher import AES, ExpandedKey, KeyScheduleCache
+from AES_numpy import NumpyAES, np
+
+# The most blocks passed to the NumPy engine at once, which bounds the memory
+# used for the per block round keys
+NUMPY_BATCH_SIZE = 1 << 14
+
+def expandKeys( keys ):
+    """
+    Expands every distinct key once
+
+    @param keys:  A sequence of 16, 24 or 32 byte keys, repeats are allowed
+
+    @return: A dictionary from each distinct key, as bytes, to its ExpandedKey
+    """
+    ciphers = {}
+    expanded = {}
+    for key in keys:
+        key = bytes(key)
+        if key in expanded:
+            continue
+        assert( len(key) in (16, 24, 32) )
+        aes = ciphers.get(len(key))
+        if aes == None:
+            aes = ciphers[len(key)] = AES(len(key) // 4)
+        expanded[key] = ExpandedKey( aes.KeyExpansion( list(key) ) )
+    # end for key in keys
+    return expanded
+# end expandKeys
+
+def _GroupByKey( keys ):
+    """
+    @return: A dictionary from each distinct key, as bytes, to the list of
+             the indices it is used at
+    """
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(bytes(key), []).append(i)
+    return groups
+# end _GroupByKey
+
+def _CryptBlocks( keys, blocks, decrypt, useNumPy ):
+    """
+    The body of encryptBlocks and decryptBlocks
+    """
+    assert( len(keys) == len(blocks) )
+    # Checked up front so both engines reject the same input, joining blocks
+    # of the wrong lengths would otherwise re-frame them silently
+    for block in blocks:
+        assert( len(block) == 16 )
+    if useNumPy == None:
+        useNumPy = np is not None
+    groups = _GroupByKey(keys)
+    out = [ None ] * len(blocks)
+
+    # Every block of the same key length is handled by one NumPy engine
+    if useNumPy:
+        byLength = {}
+        for key, indices in groups.items():
+            byLength.setdefault(len(key), []).extend(indices)
+        for length, indices in byLength.items():
+            engine = NumpyAES(length // 4)
+            crypt = engine.decrypt_blocks_multikey if decrypt else engine.encrypt_blocks_multikey
+            for start in range(0, len(indices), NUMPY_BATCH_SIZE):
+                part = indices[start:start + NUMPY_BATCH_SIZE]
+                data = crypt( b"".join(bytes(blocks[i]) for i in part),
+                              [ keys[i] for i in part ] )
+                for j, i in enumerate(part):
+                    out[i] = data[16 * j : 16 * (j + 1)]
+        # end for length, indices
+        return out
+    # end if useNumPy
+
+    ciphers = {}
+    expanded = expandKeys(groups)
+    for key, indices in groups.items():
+        aes = ciphers.get(len(key))
+        if aes == None:
+            aes = ciphers[len(key)] = AES(len(key) // 4)
+        crypt = aes._DecryptInt if decrypt else aes._EncryptInt
+        expandedKey = expanded[key]
+        for i in indices:
+            out[i] = crypt( int.from_bytes(blocks[i], "big"), expandedKey ).to_bytes(16, "big")
+    # end for key, indices
+    return out
+# end _CryptBlocks
+
+def encryptBlocks( keys, blocks, useNumPy = None ):
+    """
+    Encrypts each block with its own key
+
+    @param keys:  A sequence of keys
+    @param blocks: A sequence of 16 byte blocks, blocks[i] is encrypted with
+                   keys[i]
+    @param useNumPy: True or False to force the NumPy engine on or off.  By
+                     default it is used when NumPy is installed.
+
+    @return: A list of the encrypted blocks
+    """
+    return _CryptBlocks(keys, blocks, False, useNumPy)
+# end encryptBlocks
+
+def decryptBlocks( keys, blocks, useNumPy = None ):
+    """
+    Decrypts each block with its own key
+
+    @param keys:  A sequence of keys
+    @param blocks: A sequence of 16 byte blocks, blocks[i] is decrypted with
+                   keys[i]
+    @param useNumPy: As for encryptBlocks
+
+    @return: A list of the decrypted blocks
+    """
+    return _CryptBlocks(keys, blocks, True, useNumPy)
+# end decryptBlocks
+
+def cryptMessages( keys, messages, makeCipher ):
+    """
+    Encrypts or decrypts each message with its own key and a cipher object
+    from makeCipher.  The messages are processed grouped by key and every
+    key is expanded once.
+
+    @param keys:  A sequence of keys
+    @param messages: A sequence of bytes-like messages
+    @param makeCipher: A function called as makeCipher(key, aes, index) that
+                       returns a new object with update() and finalize(), e.g.
+                       an AES_modes encryptor constructed with aes = aes.  The
+                       aes given already holds the expanded key.
+
+    @return: A list of the outputs in the order of the messages
+    """
+    assert( len(keys) == len(messages) )
+    groups = _GroupByKey(keys)
+    expanded = expandKeys(groups)
+
+    # A private cache holding only this batch, so the shared cache is not
+    # flooded with single use data keys
+    cache = KeyScheduleCache( capacity = max(1, len(expanded)) )
+    ciphers = {}
+    out = [ None ] * len(messages)
+    for key, indices in groups.items():
+        aes = ciphers.get(len(key))
+        if aes == None:
+            aes = ciphers[len(key)] = AES(len(key) // 4, keyCache = cache)
+        expandedKey = expanded[key]
+        cache.get( (aes._Nk, key), lambda: expandedKey )
+        for i in indices:
+            cipher = makeCipher(key, aes, i)
+            out[i] = cipher.update(messages[i]) + cipher.finalize()
+    # end for key, indices
+    return out
+# end cryptMessages
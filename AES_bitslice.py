@@ -0,0 +1,416 @@
+# Name: AES_bitslice.py
+# Purpose:  A bitsliced AES engine built on Python's arbitrary size integers.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: A batch of blocks is split into eight "slices", one integer per bit
+# position of a byte.  Byte k of the batch (block k // 16, State byte k % 16)
+# is stored in bit 8k of every slice, so slice b holds bit b of every byte.
+# Every operation of a round is then a handful of integer operations on the
+# eight slices, which process the whole batch at once:
+#   - SubBytes is a boolean circuit: the GF(2^8) inverse computed as x^254
+#     with bitsliced multiplications, followed by the affine transform.
+#   - ShiftRows and MixColumns move bytes within a block, which is a masked
+#     shift of every slice.
+#   - AddRoundKey is an XOR with the round key repeated across the batch.
+# No table is indexed by the data being encrypted.  Slicing is done with
+# shifts and masks of one large integer.  The round keys are sliced the same
+# way once per key, for a single block, and kept with the key schedule; each
+# batch repeats them across its blocks with one multiplication per slice.
+# The key schedule itself comes from AES_cipher.KeyExpansion, which does look
+# the key bytes up in the S-Box table once when the key is expanded.
+# >>> import AES_bitslice
+# >>> engine = AES_bitslice.BitslicedAES(AES_cipher.AES_128)
+# >>> cipherText = engine.encrypt_blocks(plainText, key)
+
+from functools import lru_cache
+
+from AES_cipher import AES
+
+def _PositionMoves( moves ):
+    """
+    A Helper function that groups byte moves within a block by the distance
+    they move.
+
+    @param moves:  A list of (destination, source) byte positions in a block
+
+    @return: A list of (distance, source positions) tuples
+    """
+    groups = {}
+    for destination, source in moves:
+        groups.setdefault(destination - source, []).append(source)
+    return sorted(groups.items())
+# end _PositionMoves
+
+# ShiftRows moves row r of column c + r into column c, the inverse moves it
+# back.  The State is stored column by column, so byte r + 4c is row r of
+# column c.
+_shiftRowsMoves = _PositionMoves(
+    [ (r + 4 * c, r + 4 * ((c + r) % 4)) for c in range(4) for r in range(4) ])
+_invShiftRowsMoves = _PositionMoves(
+    [ (r + 4 * c, r + 4 * ((c - r) % 4)) for c in range(4) for r in range(4) ])
+
+# Rotating every column up by k rows, i.e. row r receives row r + k
+_rotateMoves = [ None ] + [ _PositionMoves(
+    [ (r + 4 * c, (r + k) % 4 + 4 * c) for c in range(4) for r in range(4) ])
+    for k in range(1, 4) ]
+
+def _GFMul( a, b ):
+    """
+    Bitsliced multiplication in GF(2^8) modulo x^8 + x^4 + x^3 + x + 1.
+
+    @param a:  The eight slices of the first operand
+    @param b: The eight slices of the second operand
+
+    @return: The eight slices of the product
+    """
+    p = [0] * 15
+    for i in range(8):
+        ai = a[i]
+        for j in range(8):
+            p[i + j] ^= ai & b[j]
+    return _Reduce(p)
+# end _GFMul
+
+def _GFSquare( a ):
+    """
+    Bitsliced squaring in GF(2^8).  Squaring is linear so only XORs are needed.
+
+    @param a:  The eight slices of the operand
+
+    @return: The eight slices of the square
+    """
+    p = [0] * 15
+    for i in range(8):
+        p[2 * i] = a[i]
+    return _Reduce(p)
+# end _GFSquare
+
+def _Reduce( p ):
+    """
+    Reduces the 15 slices of a polynomial product modulo
+    x^8 + x^4 + x^3 + x + 1, i.e. x^k = x^(k-4) + x^(k-5) + x^(k-7) + x^(k-8)
+    for k >= 8.
+
+    @param p:  The 15 slices of the product, modified directly
+
+    @return: The eight slices of the reduced product
+    """
+    for k in range(14, 7, -1):
+        pk = p[k]
+        p[k - 4] ^= pk
+        p[k - 5] ^= pk
+        p[k - 7] ^= pk
+        p[k - 8] ^= pk
+    return p[:8]
+# end _Reduce
+
+def _GFInverse( x ):
+    """
+    The bitsliced multiplicative inverse x^254 in GF(2^8), with the inverse
+    of 0 being 0 as required by the S-Box.
+
+    @param x:  The eight slices of the operand
+
+    @return: The eight slices of the inverse
+    """
+    x2 = _GFSquare(x)
+    x3 = _GFMul(x2, x)
+    x6 = _GFSquare(x3)
+    x12 = _GFSquare(x6)
+    x15 = _GFMul(x12, x3)
+    x240 = _GFSquare(_GFSquare(_GFSquare(_GFSquare(x15))))
+    x252 = _GFMul(x240, x12)
+    return _GFMul(x252, x2)
+# end _GFInverse
+
+class BitslicedAES():
+    """
+    AES over batches of blocks using bitsliced Python integers
+    """
+
+    def __init__(self, keyLength, keyCache = None, batchSize = 1024):
+        """
+        @param keyLength:   A Key Length, AES_128, AES_192, AES_256
+        @param keyCache:    Optional KeyScheduleCache to hold expanded keys
+        @param batchSize:   The number of blocks processed in one pass
+        """
+        assert( batchSize > 0 )
+        self._aes = AES(keyLength, keyCache = keyCache)
+        self._Nr = self._aes._Nr
+        self._batchSize = batchSize
+    # end __init__
+
+    def encrypt_blocks(self, data, key):
+        """
+        Encrypts every block of the data independently (ECB)
+
+        @param data:  A bytes-like object whose length is a multiple of 16
+        @param key: The key to encrypt with
+
+        @return: The encrypted data as bytes
+        """
+        return self._Process(data, key, self._Cipher)
+    # end encrypt_blocks
+
+    def decrypt_blocks(self, data, key):
+        """
+        Decrypts every block of the data independently (ECB)
+
+        @param data:  A bytes-like object whose length is a multiple of 16
+        @param key: The key to decrypt with
+
+        @return: The decrypted data as bytes
+        """
+        return self._Process(data, key, self._InvCipher)
+    # end decrypt_blocks
+
+    def ctr(self, key, counter, data):
+        """
+        Encrypts or decrypts the data in counter mode.  The result is identical
+        to AES_modes.CTREncryptor.
+
+        @param key:  The key to use
+        @param counter: The 16 byte initial counter block
+        @param data: Any bytes-like object
+
+        @return: The processed data as bytes
+        """
+        assert( len(counter) == 16 )
+        length = len(data)
+        if length == 0:
+            return b""
+        start = int.from_bytes(counter, "big")
+        blocks = b"".join( ((start + i) & ((1 << 128) - 1)).to_bytes(16, "big")
+                           for i in range((length + 15) // 16) )
+        keyStream = self._Process(blocks, key, self._Cipher)
+        return (int.from_bytes(data, "big") ^
+                int.from_bytes(keyStream[:length], "big")).to_bytes(length, "big")
+    # end ctr
+
+    def _Process(self, data, key, function):
+        """
+        Runs the cipher function over the data one batch at a time
+        """
+        view = memoryview(data).cast("B")
+        assert( len(view) % 16 == 0 )
+        expandedKey = self._aes._ExpandKey(key)
+        step = self._batchSize * 16
+        out = bytearray()
+        for offset in range(0, len(view), step):
+            batch = bytes(view[offset:offset+step])
+            n = len(batch) // 16
+            masks = _Masks(n)
+            roundKeys = [ [ k * masks["blocks"] for k in roundKey ]
+                          for roundKey in _SlicedRoundKeys(expandedKey) ]
+            out += function(batch, roundKeys, masks)
+        return bytes(out)
+    # end _Process
+
+    def _Cipher(self, batch, roundKeys, masks):
+        """
+        Encrypts a batch of whole blocks
+
+        @param batch:  The blocks as bytes
+        @param roundKeys: The sliced round keys for the number of blocks
+        @param masks: The masks for the number of blocks
+        """
+        state = _Slice(batch, masks["ones"])
+        state = self._AddRoundKey(state, roundKeys[0])
+        for r in range(1, self._Nr + 1):
+            state = self._SubBytes(state, masks)
+            state = [ _Move(s, _shiftRowsMoves, masks) for s in state ]
+            if r != self._Nr:
+                state = self._MixColumns(state, masks)
+            state = self._AddRoundKey(state, roundKeys[r])
+        # end for r in range(1, self._Nr + 1)
+        return _Unslice(state, len(batch))
+    # end _Cipher
+
+    def _InvCipher(self, batch, roundKeys, masks):
+        """
+        Decrypts a batch of whole blocks, the arguments are as for _Cipher
+        """
+        state = _Slice(batch, masks["ones"])
+        state = self._AddRoundKey(state, roundKeys[self._Nr])
+        for r in reversed(range(0, self._Nr)):
+            state = [ _Move(s, _invShiftRowsMoves, masks) for s in state ]
+            state = self._InvSubBytes(state, masks)
+            state = self._AddRoundKey(state, roundKeys[r])
+            if r != 0:
+                state = self._InvMixColumns(state, masks)
+        # end for r in reversed(range(0, self._Nr))
+        return _Unslice(state, len(batch))
+    # end _InvCipher
+
+    def _AddRoundKey(self, state, roundKey):
+        """
+        XORs a sliced round key, already repeated for every block, into the
+        state
+        """
+        return [ s ^ k for s, k in zip(state, roundKey) ]
+    # end _AddRoundKey
+
+    def _SubBytes(self, state, masks):
+        """
+        The S-Box as a circuit: the inverse in GF(2^8) followed by the affine
+        transform b'i = bi ^ b(i+4) ^ b(i+5) ^ b(i+6) ^ b(i+7) ^ ci where c is
+        {63}.
+        """
+        x = _GFInverse(state)
+        ones = masks["ones"]
+        out = []
+        for i in range(8):
+            v = x[i] ^ x[(i + 4) % 8] ^ x[(i + 5) % 8] ^ x[(i + 6) % 8] ^ x[(i + 7) % 8]
+            if (0x63 >> i) & 1:
+                v ^= ones
+            out.append(v)
+        return out
+    # end _SubBytes
+
+    def _InvSubBytes(self, state, masks):
+        """
+        The inverse S-Box as a circuit: the inverse affine transform
+        bi = b'(i+2) ^ b'(i+5) ^ b'(i+7) ^ di where d is {05}, followed by the
+        inverse in GF(2^8).
+        """
+        ones = masks["ones"]
+        x = []
+        for i in range(8):
+            v = state[(i + 2) % 8] ^ state[(i + 5) % 8] ^ state[(i + 7) % 8]
+            if (0x05 >> i) & 1:
+                v ^= ones
+            x.append(v)
+        return _GFInverse(x)
+    # end _InvSubBytes
+
+    def _MixColumns(self, state, masks):
+        """
+        MixColumns written with column rotations:
+        s'r = {02}.(sr ^ sr+1) ^ sr+1 ^ sr+2 ^ sr+3
+        """
+        rot1 = [ _Move(s, _rotateMoves[1], masks) for s in state ]
+        rot2 = [ _Move(s, _rotateMoves[2], masks) for s in state ]
+        rot3 = [ _Move(s, _rotateMoves[3], masks) for s in state ]
+        doubled = _XTime([ s ^ t for s, t in zip(state, rot1) ])
+        return [ d ^ a ^ b ^ c for d, a, b, c in zip(doubled, rot1, rot2, rot3) ]
+    # end _MixColumns
+
+    def _InvMixColumns(self, state, masks):
+        """
+        InvMixColumns as a pre-processing step followed by MixColumns.  Rows r
+        and r+2 of each column both have {04}.(sr ^ sr+2) added, after which
+        MixColumns produces the result of InvMixColumns.
+        """
+        rot2 = [ _Move(s, _rotateMoves[2], masks) for s in state ]
+        quadrupled = _XTime(_XTime([ s ^ t for s, t in zip(state, rot2) ]))
+        return self._MixColumns([ s ^ q for s, q in zip(state, quadrupled) ], masks)
+    # end _InvMixColumns
+# end class BitslicedAES
+
+@lru_cache(maxsize = 8)
+def _Masks( n ):
+    """
+    Builds the masks used for a batch of n blocks: "ones" has bit 0 of every
+    byte set, "blocks" has bit 0 of the first byte of every block set, so
+    multiplying a single block value by it repeats the value in every block,
+    and an entry per tuple of source positions selects those bytes of every
+    block.  The few most recent batch sizes are cached, the masks must not be
+    modified.
+    """
+    masks = { "ones" : int.from_bytes(b"\x01" * (16 * n), "little"),
+              "blocks" : int.from_bytes((b"\x01" + bytes(15)) * n, "little") }
+    for moves in [ _shiftRowsMoves, _invShiftRowsMoves ] + _rotateMoves[1:]:
+        for distance, sources in moves:
+            pattern = bytes( 1 if p in sources else 0 for p in range(16) )
+            masks[tuple(sources)] = int.from_bytes(pattern * n, "little")
+    return masks
+# end _Masks
+
+def _Move( s, moves, masks ):
+    """
+    Moves bytes within every block of a slice.  Byte k is stored at bit 8k, so
+    moving a byte by d positions is a shift by 8d bits.
+    """
+    result = 0
+    for distance, sources in moves:
+        v = s & masks[tuple(sources)]
+        if distance > 0:
+            v <<= 8 * distance
+        elif distance < 0:
+            v >>= -8 * distance
+        result |= v
+    return result
+# end _Move
+
+def _XTime( a ):
+    """
+    Multiplies each byte by {02}: a shift of the slices with {1b} added where
+    the top bit was set.
+    """
+    return [ a[7], a[0] ^ a[7], a[1], a[2] ^ a[7], a[3] ^ a[7], a[4], a[5], a[6] ]
+# end _XTime
+
+def _Slice( data, ones ):
+    """
+    Splits the bytes into the eight slices.  Slice b is bit b of every byte,
+    i.e. the whole data as one integer shifted right by b and masked with bit
+    0 of every byte, so no table lookup depends on the data.
+
+    @param data:  The bytes to slice
+    @param ones: The "ones" mask for the length of the data
+    """
+    x = int.from_bytes(data, "little")
+    return [ (x >> b) & ones for b in range(8) ]
+# end _Slice
+
+def _SlicedRoundKeys( expandedKey ):
+    """
+    Returns the round keys of an expanded key sliced for a single block.  They
+    are built once and stored with the key schedule.
+
+    @param expandedKey:  The AES_cipher.ExpandedKey of the key
+
+    @return: A list of the eight slices of every round key
+    """
+    roundKeys = expandedKey.bitslicedKeys
+    if roundKeys == None:
+        flatKey = expandedKey.flatKey
+        ones = _Masks(1)["ones"]
+        roundKeys = [ _Slice(flatKey[i:i+16], ones) for i in range(0, len(flatKey), 16) ]
+        expandedKey.bitslicedKeys = roundKeys
+    # end if roundKeys == None
+    return roundKeys
+# end _SlicedRoundKeys
+
+def _Unslice( state, length ):
+    """
+    Joins the eight slices back into bytes
+    """
+    value = 0
+    for b in range(8):
+        value |= state[b] << b
+    return value.to_bytes(length, "little")
+# end _Unslice
@@ -26,8 +26,11 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from copy import deepcopy
-from galos import FFMulFast
+import sys
+from collections import OrderedDict
+from threading import Lock, local
+from time import perf_counter_ns
+import galos
 
 
 # A Word in AES is 32 bits.
@@ -75,6 +78,432 @@ def flattenKey( key ):
             retVal.append(ii)
     return retVal
 
+def _BuildEncTables( sbox ):
+    """
+    A Helper function that builds the four combined SubBytes, ShiftRows and
+    MixColumns lookup tables (Te0..Te3) used by the T-table engine.  Each entry
+    is a 32-bit column word with row 0 in the most significant byte, e.g.
+    Te0[x] = [{02}.S[x], S[x], S[x], {03}.S[x]].  Te1..Te3 are Te0 rotated
+    right by 8, 16 and 24 bits.
+    
+    @param sbox:  The 256 entry S-Box to build the tables from
+    
+    @return: A tuple of the four 256 entry tables (Te0, Te1, Te2, Te3)
+    """
+    m2 = galos.MUL[0x02]
+    m3 = galos.MUL[0x03]
+    te0 = []
+    for x in range(256):
+        s = sbox[x]
+        te0.append( (m2[s] << 24) | (s << 16) | (s << 8) | m3[s] )
+    # end for x in range(256)
+    
+    te1 = [ ((t >> 8) | (t << 24)) & 0xffffffff for t in te0 ]
+    te2 = [ ((t >> 16) | (t << 16)) & 0xffffffff for t in te0 ]
+    te3 = [ ((t >> 24) | (t << 8)) & 0xffffffff for t in te0 ]
+    return te0, te1, te2, te3
+# end _BuildEncTables
+
+def _BuildDecTables( invsbox ):
+    """
+    A Helper function that builds the four combined InvSubBytes, InvShiftRows
+    and InvMixColumns lookup tables (Td0..Td3) used by the Equivalent Inverse
+    Cipher.  Td0[x] = [{0e}.IS[x], {09}.IS[x], {0d}.IS[x], {0b}.IS[x]] with row
+    0 in the most significant byte.  Td1..Td3 are Td0 rotated right by 8, 16 
+    and 24 bits.
+    
+    @param invsbox:  The 256 entry inverse S-Box to build the tables from
+    
+    @return: A tuple of the four 256 entry tables (Td0, Td1, Td2, Td3)
+    """
+    m9 = galos.MUL[0x09]
+    mb = galos.MUL[0x0b]
+    md = galos.MUL[0x0d]
+    me = galos.MUL[0x0e]
+    td0 = []
+    for x in range(256):
+        s = invsbox[x]
+        td0.append( (me[s] << 24) | (m9[s] << 16) | (md[s] << 8) | mb[s] )
+    # end for x in range(256)
+    
+    td1 = [ ((t >> 8) | (t << 24)) & 0xffffffff for t in td0 ]
+    td2 = [ ((t >> 16) | (t << 16)) & 0xffffffff for t in td0 ]
+    td3 = [ ((t >> 24) | (t << 8)) & 0xffffffff for t in td0 ]
+    return td0, td1, td2, td3
+# end _BuildDecTables
+
+def _BuildMulTable( constant ):
+    """
+    A Helper function that builds a 256 entry table of the products of the 
+    given constant with every byte value in GF(2^8).
+    
+    @param constant:  The constant to multiply by
+    
+    @return: The table of products
+    """
+    return list(galos.MUL[constant])
+# end _BuildMulTable
+
+def _CalculateRCON():
+    """
+    This function calculates the RCON table used during the Key Expansion
+    
+    @return: The RCON table, Rcon[i] as a 32-bit word
+    """
+    rcon = []
+    
+    # RCON of 0 is not used per the AES Specification.  RCON of 1 is 0x01 
+    # which is 0x8D * 2 in a Galios Field of 2
+    val = 0x8d
+    rcon.append(val)
+    
+    # The Variable I is not used in this equation, it is only used to create
+    # a loop.  Each value is shifted into the first byte of the word since
+    # Rcon[i] is the word [x^(i-1), {00}, {00}, {00}]
+    m2 = galos.MUL[0x02]
+    for i in range(256):
+        val = m2[val]
+        rcon.append(val << 24)
+    # end for i in range(256)
+    return rcon
+# end _CalculateRCON
+
+def _BuildTables():
+    """
+    Builds every constant table of the AES class that is derived from the 
+    S-Boxes and GF(2^8) arithmetic
+    
+    @return: A dictionary from the name of each AES class attribute to its 
+             table
+    """
+    tables = {}
+    tables["_Te0"], tables["_Te1"], tables["_Te2"], tables["_Te3"] = \
+        _BuildEncTables(AES._sbox)
+    tables["_Td0"], tables["_Td1"], tables["_Td2"], tables["_Td3"] = \
+        _BuildDecTables(AES._invsbox)
+    for constant in (0x09, 0x0b, 0x0d, 0x0e):
+        tables["_mul%02x" % constant] = _BuildMulTable(constant)
+    tables["_rcon"] = _CalculateRCON()
+    return tables
+# end _BuildTables
+
+_tablesLock = Lock()
+
+def _LoadTables():
+    """
+    Sets the constant tables on the AES class, from the pre-generated 
+    AES_tables_frozen module if it has been written (see AES_tables.freeze) 
+    or by building them otherwise.  This runs once, the first time any of the
+    tables is read.
+    """
+    with _tablesLock:
+        if not isinstance(AES.__dict__["_rcon"], _LazyTable):
+            return
+        try:
+            from AES_tables_frozen import AES_TABLES as tables
+        except ImportError:
+            tables = _BuildTables()
+        for name in _LazyTable.names:
+            setattr(AES, name, tables[name])
+# end _LoadTables
+
+class _LazyTable():
+    """
+    A class attribute of AES that is only built when it is first read.  
+    Reading any of them loads every table, which replace the _LazyTable 
+    attributes on the class, so later reads are ordinary attribute lookups 
+    and creating an AES instance does no table work at all.
+    """
+    
+    # The names of every lazy table
+    names = ( "_Te0", "_Te1", "_Te2", "_Te3", "_Td0", "_Td1", "_Td2", "_Td3",
+              "_mul09", "_mul0b", "_mul0d", "_mul0e", "_rcon" )
+    
+    def __init__(self, name):
+        self._name = name
+    
+    def __get__(self, obj, cls):
+        _LoadTables()
+        return AES.__dict__[self._name]
+# end class _LazyTable
+
+class ExpandedKey():
+    """
+    The expanded form of a single cipher key.  This holds the key schedule in
+    the nested list form returned by AES.KeyExpansion as well as the same
+    schedule packed into 32-bit words for the T-table engine.  Modes that need
+    further per key tables (e.g. the GHASH tables used by AES_gcm) store them
+    here so they are cached along with the key schedule.
+    """
+    
+    __slots__ = ( "schedule", "flatKey", "roundKeys", "roundKeyInts",
+                  "decRoundKeys", "ghashTables", "bitslicedKeys" )
+    
+    def __init__(self, schedule):
+        """
+        @param schedule:  The key schedule returned by AES.KeyExpansion
+        """
+        self.schedule = schedule
+        
+        # The whole schedule flattened once into bytes, so no round has to
+        # flatten its round key again
+        self.flatKey = bytes(flattenKey(schedule))
+        self.roundKeys = [ (w[0] << 24) | (w[1] << 16) | (w[2] << 8) | w[3] 
+                           for w in schedule ]
+        
+        # Each 16 byte round key as a single 128-bit integer for AddRoundKey
+        self.roundKeyInts = [ int.from_bytes(self.flatKey[i:i+16], "big")
+                              for i in range(0, len(self.flatKey), 16) ]
+        
+        # The decryption key schedule of the Equivalent Inverse Cipher, built
+        # by AES._DecryptInt the first time the key is used to decrypt
+        self.decRoundKeys = None
+        
+        # Built by AES_gcm the first time the key is used for GCM
+        self.ghashTables = None
+        
+        # Built by AES_bitslice, the round keys sliced for a single block
+        self.bitslicedKeys = None
+    # end __init__
+# end class ExpandedKey
+
+class KeyScheduleCache():
+    """
+    A bounded, thread-safe cache of expanded key schedules.  Entries are kept
+    in least recently used order and the oldest entry is evicted once the 
+    capacity is reached.  Hit, miss and eviction counts are kept so the 
+    effectiveness of the cache can be monitored.
+    """
+    
+    def __init__(self, capacity = 256):
+        """
+        @param capacity:  The maximum number of key schedules to hold
+        """
+        assert( type(capacity) == int and capacity > 0 )
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    # end __init__
+    
+    def get(self, cacheKey, expand):
+        """
+        Returns the expanded key stored under cacheKey.  On a miss the expand
+        function is called to build the entry which is then stored.
+        
+        @param cacheKey:  A hashable value identifying the key, e.g. 
+                          (Nk, bytes(key))
+        @param expand: A function taking no arguments that builds the entry
+        
+        @return: The cached entry
+        """
+        with self._lock:
+            entry = self._entries.get(cacheKey)
+            if entry is not None:
+                self._entries.move_to_end(cacheKey)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        # end with self._lock
+        
+        # The expansion is done outside of the lock so a slow expansion does 
+        # not block other threads.  Two threads missing on the same key at 
+        # once will both expand it, which is harmless.
+        entry = expand()
+        
+        with self._lock:
+            self._entries[cacheKey] = entry
+            self._entries.move_to_end(cacheKey)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+        # end with self._lock
+        return entry
+    # end get
+    
+    def setCapacity(self, capacity):
+        """
+        Changes the capacity of the cache, evicting the least recently used 
+        entries if the cache holds more than the new capacity.
+        
+        @param capacity:  The maximum number of key schedules to hold
+        """
+        assert( type(capacity) == int and capacity > 0 )
+        with self._lock:
+            self._capacity = capacity
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+    # end setCapacity
+    
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+    # end clear
+    
+    def stats(self):
+        """
+        @return: A dictionary of the cache size, capacity and counters
+        """
+        with self._lock:
+            return { "size" : len(self._entries),
+                     "capacity" : self._capacity,
+                     "hits" : self.hits,
+                     "misses" : self.misses,
+                     "evictions" : self.evictions }
+    # end stats
+    
+    def __len__(self):
+        return len(self._entries)
+# end class KeyScheduleCache
+
+# The cache shared by every AES instance that is not given its own cache
+defaultKeyCache = KeyScheduleCache()
+
+class FIPSTracer():
+    """
+    A round tracer that writes each step in the format used by FIPS-197 
+    Appendix C, e.g.
+    round[ 1].s_box   63cab7040953d051cd60e0e7ba70e18c
+    """
+    
+    def __init__(self, stream = None):
+        """
+        @param stream:  The text stream to write to, sys.stdout if not given
+        """
+        if stream == None:
+            stream = sys.stdout
+        self._stream = stream
+    # end __init__
+    
+    def __call__(self, round, stage, state):
+        self._stream.write( "round[%2d].%-8s %s\n" % (round, stage, bytes(state).hex()) )
+    # end __call__
+# end class FIPSTracer
+
+class StageProfiler():
+    """
+    Counts the calls to each stage of AES and the time spent in them, per key
+    size.  An AES instance given a profiler is switched to a subclass whose 
+    stage methods are timed versions when it is constructed, so instances 
+    without a profiler run the plain methods with no overhead at all.
+    
+    The reference Cipher is split into SubBytes, ShiftRows, MixColumns and 
+    AddRoundKey.  The T-table engine used by the block API combines the steps
+    of a round, so it is timed as a whole block (EncryptBlock, DecryptBlock).
+    KeyExpansion is only called when a key is not found in the key cache.
+    """
+    
+    # The instrumented methods and the name of the stage they are counted as
+    _stages = OrderedDict([
+        ("KeyExpansion", "KeyExpansion"),
+        ("AddRoundKey", "AddRoundKey"),
+        ("SubBytes", "SubBytes"),
+        ("ShiftRows", "ShiftRows"),
+        ("MixColumns", "MixColumns"),
+        ("_EncryptInt", "EncryptBlock"),
+        ("_DecryptInt", "DecryptBlock"),
+    ])
+    
+    def __init__(self):
+        self._lock = Lock()
+        # (key bits, stage) -> [calls, nanoseconds]
+        self._counters = OrderedDict()
+        # (class, key bits) -> timed subclass
+        self._classes = {}
+    # end __init__
+    
+    def instrument(self, aes):
+        """
+        Switches an AES instance to the timed versions of its stage methods
+        
+        @param aes:  The AES instance
+        """
+        keyBits = aes._Nk * 32
+        cls = type(aes)
+        with self._lock:
+            timedClass = self._classes.get( (cls, keyBits) )
+        if timedClass == None:
+            # The subclass adds no slots so instances may switch to it
+            namespace = { "__slots__": () }
+            for name, stage in self._stages.items():
+                namespace[name] = self._Timed(getattr(cls, name), keyBits, stage)
+            timedClass = type("Profiled" + cls.__name__, (cls,), namespace)
+            with self._lock:
+                timedClass = self._classes.setdefault( (cls, keyBits), timedClass )
+        # end if
+        aes.__class__ = timedClass
+    # end instrument
+    
+    def _Timed(self, method, keyBits, stage):
+        """
+        @return: A function that calls the method and adds its time to the
+                 counter for the stage
+        """
+        lock = self._lock
+        with lock:
+            counter = self._counters.setdefault( (keyBits, stage), [0, 0] )
+        
+        def timed(self, *args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                with lock:
+                    counter[0] += 1
+                    counter[1] += elapsed
+        # end timed
+        return timed
+    # end _Timed
+    
+    def reset(self):
+        """
+        Sets every counter back to zero
+        """
+        with self._lock:
+            for counter in self._counters.values():
+                counter[0] = counter[1] = 0
+    # end reset
+    
+    def stats(self):
+        """
+        @return: A dictionary from (key bits, stage) to (calls, nanoseconds)
+        """
+        with self._lock:
+            return dict( (k, tuple(v)) for k, v in self._counters.items() )
+    # end stats
+    
+    def report(self):
+        """
+        @return: A text table of the calls, total time, time per call and 
+                 share of the total time of each stage, per key size
+        """
+        stats = self.stats()
+        lines = [ "%-8s %-13s %10s %12s %10s %6s" % 
+                  ("key", "stage", "calls", "total ms", "ns/call", "%") ]
+        for keyBits in sorted(set(k for k, _ in stats)):
+            total = sum( ns for (bits, _), (_, ns) in stats.items() if bits == keyBits )
+            for stage in self._stages.values():
+                calls, ns = stats.get( (keyBits, stage), (0, 0) )
+                if calls == 0:
+                    continue
+                lines.append( "AES-%-4d %-13s %10d %12.3f %10d %6.1f" % 
+                              (keyBits, stage, calls, ns / 1e6, ns // calls,
+                               100.0 * ns / total if total else 0.0) )
+        # end for keyBits
+        return "\n".join(lines)
+    # end report
+# end class StageProfiler
+
 ################################################################################
 ###   Helper Varaiables that are used to select which version of the Algorithm
 ################################################################################
@@ -83,6 +512,10 @@ AES_192 = 6
 AES_256 = 8
 
 class AES():
+    # Instances only hold the key size and the per instance settings, every
+    # table is shared through the class.
+    __slots__ = ( "_Nk", "_Nr", "_keyCache", "_tracer", "_local" )
+    
     _sboxColumns = 16
    
     _sbox = [ \
@@ -132,29 +565,63 @@ class AES():
       0xae, 0x2a, 0xf5, 0xb0, 0xc8, 0xeb, 0xbb, 0x3c, 0x83, 0x53, 0x99, 0x61, 
       0x17, 0x2b, 0x04, 0x7e, 0xba, 0x77, 0xd6, 0x26, 0xe1, 0x69, 0x14, 0x63, 
       0x55, 0x21, 0x0c, 0x7d]
+    
+    # The S-Boxes as 256 byte translation tables, so a whole State (or a 
+    # buffer of many States) is substituted with a single bytes.translate
+    _sboxTable = bytes(_sbox)
+    _invsboxTable = bytes(_invsbox)
+    
+    # The combined SubBytes / ShiftRows / MixColumns tables used by the T-table
+    # engine (_CipherTTable).  Every table below is built once per process, 
+    # the first time one of them is used (see _LazyTable).
+    _Te0, _Te1, _Te2, _Te3 = [ _LazyTable(n) for n in ("_Te0", "_Te1", "_Te2", "_Te3") ]
+    
+    # The combined InvSubBytes / InvShiftRows / InvMixColumns tables used by
+    # the Equivalent Inverse Cipher (_InvCipherWords).
+    _Td0, _Td1, _Td2, _Td3 = [ _LazyTable(n) for n in ("_Td0", "_Td1", "_Td2", "_Td3") ]
+    
+    # Products with the InvMixColumns constants used to build the decryption
+    # key schedule.
+    _mul09 = _LazyTable("_mul09")
+    _mul0b = _LazyTable("_mul0b")
+    _mul0d = _LazyTable("_mul0d")
+    _mul0e = _LazyTable("_mul0e")
+    
+    # The RCON table used by KeyExpansion
+    _rcon = _LazyTable("_rcon")
 
     # Number of 32-bit words (number of columns) in the State
     _Nb = 4
    
-    # _Nk is the Key Length 4, 6, 8
-    _Nk = int()
-   
-    # Number of Rounds, 10, 12, 14
-    _Nr = int() 
+    # _Nk is the Key Length 4, 6, 8 and _Nr the Number of Rounds, 10, 12, 14.
+    # Both are set per instance.
+    
+    # The order the State is read in by ShiftRows and its inverse.  Byte 
+    # r + 4c (row r of column c) comes from row r of column c + r, or c - r 
+    # for the inverse.
+    _shiftRowsOrder = tuple( r + 4 * ((c + r) % 4) for c in range(4) for r in range(4) )
+    _invShiftRowsOrder = tuple( r + 4 * ((c - r) % 4) for c in range(4) for r in range(4) )
    
-    # An Array of Integers that is less than or equal to 256
-    _state = []
    
-    def __init__(self, keyLength):
+    def __init__(self, keyLength, keyCache = None, tracer = None, profiler = None):
         """
         The Initializtion function for the AES Cipher Algorithm
         This determine the key length that will be utilized for 
         encryption and decryption
         
         @param keyLength:   A Key Length, AES_128, AES_192, AES_256
+        @param keyCache:    Optional KeyScheduleCache to hold expanded keys.
+                            If none is given the shared defaultKeyCache is used
+        @param tracer:      Optional round tracer, see setTracer
+        @param profiler:    Optional StageProfiler to time each stage with
         """
         assert( keyLength == AES_128 or keyLength == AES_192 or keyLength == AES_256)
         self._Nk = keyLength
+        
+        if keyCache == None:
+            keyCache = defaultKeyCache
+        self._keyCache = keyCache
+        self._tracer = tracer
       
         if keyLength == AES_128:
             self._Nr = 10
@@ -164,11 +631,30 @@ class AES():
             self._Nr = 14
         # end if
       
-        # Calculate the RCON Table on the fly.  This could be statically coded
-        # and achieve better performance, however I felt it would be better from 
-        # an educational perspective to calculate it on the fly.
-        self._rcon = self._CalculateRCON()
+        # The RCON Table is calculated on the fly rather than statically 
+        # coded, which I felt would be better from an educational perspective.
+        # It is only calculated once, when it is first used, and then shared 
+        # by every instance (see _CalculateRCON).
+        
+        # The State used by _Cipher and _InvCipher is kept per thread so that
+        # one instance may be shared between threads.
+        self._local = local()
+        
+        # The timed stage methods are only installed when profiling, so the
+        # plain methods are called directly otherwise.
+        if profiler != None:
+            profiler.instrument(self)
     # end __init__
+    
+    # An Array of Integers that is less than or equal to 256.  This is stored
+    # per thread, see __init__.
+    @property
+    def _state(self):
+        return getattr(self._local, "state", [])
+    
+    @_state.setter
+    def _state(self, value):
+        self._local.state = value
    
     def _Cipher(self, inBlock, key):
         """
@@ -181,7 +667,7 @@ class AES():
         @return: The encrypted block of bytes
         """
       
-        keySchedule = self.KeyExpansion( key = key )
+        roundKeys = self._ExpandKey( key ).roundKeyInts
         
         # Assert that the initial state is likely valid, and assign it to the
         # current state variable
@@ -190,28 +676,324 @@ class AES():
         for c in inBlock:
             assert( type(c) == int )
             assert( c < 256 )
-        self._state = inBlock
+        # The State is a fixed 16 byte bytearray that every step modifies in
+        # place.  The result is copied back into inBlock at the end.
+        self._state = bytearray(inBlock)
+        
+        # The tracer is only called, and the state only copied for it, when 
+        # one is attached.
+        tracer = self._tracer
         
         # Start of the Encryption    
-        print( "rount[ 0].input : " + "".join([hex(x)[2:].zfill(2) for x in self._state]))   
-        self.AddRoundKey( keySchedule[0: self._Nb] )
+        if tracer != None:
+            tracer( 0, "input", bytes(self._state) )
+            tracer( 0, "k_sch", roundKeys[0].to_bytes(16, "big") )
+        self.AddRoundKey( roundKeys[0] )
         for r in range(1, self._Nr):
-            print( "rount[ %d].start : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
+            if tracer != None:
+                tracer( r, "start", bytes(self._state) )
             self.SubBytes()
-            print( "rount[ %d].s_box : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
+            if tracer != None:
+                tracer( r, "s_box", bytes(self._state) )
             self.ShiftRows()
-            print( "rount[ %d].s_row : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
+            if tracer != None:
+                tracer( r, "s_row", bytes(self._state) )
             self.MixColumns()
-            print( "rount[ %d].s_col : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
-            self.AddRoundKey( keySchedule[r*self._Nb : (r+1)*self._Nb] )  
+            if tracer != None:
+                tracer( r, "m_col", bytes(self._state) )
+                tracer( r, "k_sch", roundKeys[r].to_bytes(16, "big") )
+            self.AddRoundKey( roundKeys[r] )
         # end for
         
+        r = self._Nr
+        if tracer != None:
+            tracer( r, "start", bytes(self._state) )
         self.SubBytes()
+        if tracer != None:
+            tracer( r, "s_box", bytes(self._state) )
         self.ShiftRows()
-        self.AddRoundKey( keySchedule[self._Nr*self._Nb: (self._Nr+1)*self._Nb])
-        return self._state
+        if tracer != None:
+            tracer( r, "s_row", bytes(self._state) )
+            tracer( r, "k_sch", roundKeys[r].to_bytes(16, "big") )
+        self.AddRoundKey( roundKeys[r] )
+        if tracer != None:
+            tracer( r, "output", bytes(self._state) )
+        inBlock[:] = self._state
+        return inBlock
     # end _Cipher
     
+    def setTracer(self, tracer):
+        """
+        Attaches a tracer to the reference Cipher and Inverse Cipher 
+        (_Cipher and _InvCipher).  The tracer is called as 
+        tracer(round, stage, state) after each step of every round, where 
+        stage is a FIPS-197 Appendix C name such as "s_box" or "ik_sch" and 
+        state is the 16 bytes at that point.  FIPSTracer prints the same 
+        format as Appendix C.  The T-table engine and the block API do not 
+        have separate steps and are never traced.
+        
+        @param tracer:  The tracer to call, or None to stop tracing
+        """
+        self._tracer = tracer
+    # end setTracer
+    
+    def _CipherTTable(self, inBlock, key):
+        """
+        The Cipher operation implemented with the T-table engine.  Rather than 
+        running SubBytes, ShiftRows and MixColumns byte by byte the state is 
+        held as four 32-bit column words and each round is computed with 16 
+        lookups into the precomputed Te0..Te3 tables.  The result is identical
+        to _Cipher.
+        
+        @param inBlock:  The block of bytes to encrypt
+        @param key: The key that will be used to encrypt the inBlock
+        
+        @return: The encrypted block of bytes
+        """
+        assert( len(inBlock) == 4 * self._Nb)
+        
+        roundKeys = self._ExpandKey( key ).roundKeys
+        
+        block = bytes(inBlock)
+        words = self._CipherWords( int.from_bytes(block[0:4], "big"),
+                                   int.from_bytes(block[4:8], "big"),
+                                   int.from_bytes(block[8:12], "big"),
+                                   int.from_bytes(block[12:16], "big"),
+                                   roundKeys )
+        
+        outBlock = b"".join( w.to_bytes(4, "big") for w in words )
+        return list(outBlock)
+    # end _CipherTTable
+    
+    def _InvCipherTTable(self, inBlock, key):
+        """
+        The Inverse Cipher operation implemented with the Equivalent Inverse 
+        Cipher and the Td0..Td3 tables.  The result is identical to 
+        _InvCipher.
+        
+        @param inBlock:  The block of bytes to decrypt
+        @param key: The key that will be used to decrypt the inBlock
+        
+        @return: The decrypted block of bytes
+        """
+        assert( len(inBlock) == 4 * self._Nb)
+        block = self._DecryptInt( int.from_bytes(bytes(inBlock), "big"), 
+                                  self._ExpandKey( key ) )
+        return list(block.to_bytes(16, "big"))
+    # end _InvCipherTTable
+    
+    def _CipherWords(self, s0, s1, s2, s3, roundKeys):
+        """
+        Encrypts a single state held as four 32-bit column words.  Row 0 of 
+        each column is the most significant byte of the word.
+        
+        @param s0, s1, s2, s3:  The four column words of the input block
+        @param roundKeys: The key schedule as a flat list of 32-bit words
+        
+        @return: A tuple of the four column words of the encrypted block
+        """
+        te0 = self._Te0
+        te1 = self._Te1
+        te2 = self._Te2
+        te3 = self._Te3
+        
+        s0 ^= roundKeys[0]
+        s1 ^= roundKeys[1]
+        s2 ^= roundKeys[2]
+        s3 ^= roundKeys[3]
+        
+        k = 4
+        for r in range(1, self._Nr):
+            t0 = te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xff] ^ te2[(s2 >> 8) & 0xff] ^ te3[s3 & 0xff] ^ roundKeys[k]
+            t1 = te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xff] ^ te2[(s3 >> 8) & 0xff] ^ te3[s0 & 0xff] ^ roundKeys[k+1]
+            t2 = te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xff] ^ te2[(s0 >> 8) & 0xff] ^ te3[s1 & 0xff] ^ roundKeys[k+2]
+            t3 = te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xff] ^ te2[(s1 >> 8) & 0xff] ^ te3[s2 & 0xff] ^ roundKeys[k+3]
+            s0, s1, s2, s3 = t0, t1, t2, t3
+            k += 4
+        # end for r in range(1, self._Nr)
+        
+        # The final round has no MixColumns, so only the S-Box is applied
+        sbox = self._sbox
+        t0 = (sbox[s0 >> 24] << 24) ^ (sbox[(s1 >> 16) & 0xff] << 16) ^ (sbox[(s2 >> 8) & 0xff] << 8) ^ sbox[s3 & 0xff]
+        t1 = (sbox[s1 >> 24] << 24) ^ (sbox[(s2 >> 16) & 0xff] << 16) ^ (sbox[(s3 >> 8) & 0xff] << 8) ^ sbox[s0 & 0xff]
+        t2 = (sbox[s2 >> 24] << 24) ^ (sbox[(s3 >> 16) & 0xff] << 16) ^ (sbox[(s0 >> 8) & 0xff] << 8) ^ sbox[s1 & 0xff]
+        t3 = (sbox[s3 >> 24] << 24) ^ (sbox[(s0 >> 16) & 0xff] << 16) ^ (sbox[(s1 >> 8) & 0xff] << 8) ^ sbox[s2 & 0xff]
+        
+        return ( t0 ^ roundKeys[k], t1 ^ roundKeys[k+1], 
+                 t2 ^ roundKeys[k+2], t3 ^ roundKeys[k+3] )
+    # end _CipherWords
+    
+    def _InvCipherWords(self, s0, s1, s2, s3, decRoundKeys):
+        """
+        Decrypts a single state held as four 32-bit column words using the 
+        Equivalent Inverse Cipher (FIPS-197 section 5.3.5).  The steps of each
+        round are reordered to match the Cipher, so InvSubBytes, InvShiftRows
+        and InvMixColumns combine into 16 lookups into the Td0..Td3 tables, 
+        the same cost as encryption.  Row 0 of each column is the most 
+        significant byte of the word.
+        
+        @param s0, s1, s2, s3:  The four column words of the input block
+        @param decRoundKeys: The decryption key schedule from _InvKeySchedule
+        
+        @return: A tuple of the four column words of the decrypted block
+        """
+        td0 = self._Td0
+        td1 = self._Td1
+        td2 = self._Td2
+        td3 = self._Td3
+        
+        s0 ^= decRoundKeys[0]
+        s1 ^= decRoundKeys[1]
+        s2 ^= decRoundKeys[2]
+        s3 ^= decRoundKeys[3]
+        
+        k = 4
+        for r in range(1, self._Nr):
+            t0 = td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xff] ^ td2[(s2 >> 8) & 0xff] ^ td3[s1 & 0xff] ^ decRoundKeys[k]
+            t1 = td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xff] ^ td2[(s3 >> 8) & 0xff] ^ td3[s2 & 0xff] ^ decRoundKeys[k+1]
+            t2 = td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xff] ^ td2[(s0 >> 8) & 0xff] ^ td3[s3 & 0xff] ^ decRoundKeys[k+2]
+            t3 = td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xff] ^ td2[(s1 >> 8) & 0xff] ^ td3[s0 & 0xff] ^ decRoundKeys[k+3]
+            s0, s1, s2, s3 = t0, t1, t2, t3
+            k += 4
+        # end for r in range(1, self._Nr)
+        
+        # The final round has no InvMixColumns, so only the inverse S-Box is 
+        # applied
+        isbox = self._invsbox
+        t0 = (isbox[s0 >> 24] << 24) ^ (isbox[(s3 >> 16) & 0xff] << 16) ^ (isbox[(s2 >> 8) & 0xff] << 8) ^ isbox[s1 & 0xff]
+        t1 = (isbox[s1 >> 24] << 24) ^ (isbox[(s0 >> 16) & 0xff] << 16) ^ (isbox[(s3 >> 8) & 0xff] << 8) ^ isbox[s2 & 0xff]
+        t2 = (isbox[s2 >> 24] << 24) ^ (isbox[(s1 >> 16) & 0xff] << 16) ^ (isbox[(s0 >> 8) & 0xff] << 8) ^ isbox[s3 & 0xff]
+        t3 = (isbox[s3 >> 24] << 24) ^ (isbox[(s2 >> 16) & 0xff] << 16) ^ (isbox[(s1 >> 8) & 0xff] << 8) ^ isbox[s0 & 0xff]
+        
+        return ( t0 ^ decRoundKeys[k], t1 ^ decRoundKeys[k+1], 
+                 t2 ^ decRoundKeys[k+2], t3 ^ decRoundKeys[k+3] )
+    # end _InvCipherWords
+    
+    def _InvKeySchedule(self, roundKeys):
+        """
+        Builds the decryption key schedule for the Equivalent Inverse Cipher.
+        The round keys are put in the order they are used when decrypting and
+        InvMixColumns is applied to every round key except the first and last.
+        
+        @param roundKeys: The key schedule as a flat list of 32-bit words
+        
+        @return: The decryption key schedule as a flat list of 32-bit words
+        """
+        m9 = self._mul09
+        mb = self._mul0b
+        md = self._mul0d
+        me = self._mul0e
+        
+        decRoundKeys = []
+        for r in reversed(range(self._Nr + 1)):
+            words = roundKeys[r*self._Nb : (r+1)*self._Nb]
+            if r != 0 and r != self._Nr:
+                mixed = []
+                for t in words:
+                    a0 = t >> 24
+                    a1 = (t >> 16) & 0xff
+                    a2 = (t >> 8) & 0xff
+                    a3 = t & 0xff
+                    mixed.append( ((me[a0] ^ mb[a1] ^ md[a2] ^ m9[a3]) << 24) |
+                                  ((m9[a0] ^ me[a1] ^ mb[a2] ^ md[a3]) << 16) |
+                                  ((md[a0] ^ m9[a1] ^ me[a2] ^ mb[a3]) << 8) |
+                                   (mb[a0] ^ md[a1] ^ m9[a2] ^ me[a3]) )
+                # end for t in words
+                words = mixed
+            # end if
+            decRoundKeys.extend(words)
+        # end for r in reversed(range(self._Nr + 1))
+        return decRoundKeys
+    # end _InvKeySchedule
+    
+    def _EncryptInt(self, block, expandedKey):
+        """
+        Encrypts a single block held as a 128-bit integer (big endian).  This 
+        is the common path used by encrypt_block and the modes of operation.
+        
+        @param block:  The block to encrypt as an integer
+        @param expandedKey: The ExpandedKey returned by _ExpandKey
+        
+        @return: The encrypted block as an integer
+        """
+        t0, t1, t2, t3 = self._CipherWords( block >> 96, (block >> 64) & 0xffffffff,
+                                            (block >> 32) & 0xffffffff, block & 0xffffffff,
+                                            expandedKey.roundKeys )
+        return (t0 << 96) | (t1 << 64) | (t2 << 32) | t3
+    # end _EncryptInt
+    
+    def _DecryptInt(self, block, expandedKey):
+        """
+        Decrypts a single block held as a 128-bit integer (big endian).  This 
+        is the common path used by decrypt_block and the modes of operation.
+        
+        @param block:  The block to decrypt as an integer
+        @param expandedKey: The ExpandedKey returned by _ExpandKey
+        
+        @return: The decrypted block as an integer
+        """
+        # The decryption key schedule is built the first time the key is used
+        # to decrypt and kept with the cached key.
+        decRoundKeys = expandedKey.decRoundKeys
+        if decRoundKeys == None:
+            decRoundKeys = self._InvKeySchedule(expandedKey.roundKeys)
+            expandedKey.decRoundKeys = decRoundKeys
+        # end if
+        
+        t0, t1, t2, t3 = self._InvCipherWords( block >> 96, (block >> 64) & 0xffffffff,
+                                               (block >> 32) & 0xffffffff, block & 0xffffffff,
+                                               decRoundKeys )
+        return (t0 << 96) | (t1 << 64) | (t2 << 32) | t3
+    # end _DecryptInt
+    
+    def encrypt_block(self, block, key, out = None, offset = 0):
+        """
+        Encrypts a single 16 byte block.  The block and key may be any object
+        supporting the buffer protocol (bytes, bytearray, memoryview, ...).  If
+        out is given the result is written into it at the given offset, which
+        allows a block to be encrypted in place, e.g.
+        >>> aes.encrypt_block(view[16:32], key, out = view, offset = 16)
+        
+        @param block:  The 16 bytes to encrypt
+        @param key: The key that will be used to encrypt the block
+        @param out: Optional writable buffer to store the result in
+        @param offset: The offset in out at which the result is stored
+        
+        @return: The encrypted block as bytes, or out if it was given
+        """
+        assert( len(block) == 16 )
+        result = self._EncryptInt( int.from_bytes(block, "big"), 
+                                   self._ExpandKey( key ) ).to_bytes(16, "big")
+        if out is None:
+            return result
+        assert( offset >= 0 and offset + 16 <= len(out) )
+        out[offset:offset+16] = result
+        return out
+    # end encrypt_block
+    
+    def decrypt_block(self, block, key, out = None, offset = 0):
+        """
+        Decrypts a single 16 byte block.  The block and key may be any object
+        supporting the buffer protocol (bytes, bytearray, memoryview, ...).  If
+        out is given the result is written into it at the given offset.
+        
+        @param block:  The 16 bytes to decrypt
+        @param key: The key that will be used to decrypt the block
+        @param out: Optional writable buffer to store the result in
+        @param offset: The offset in out at which the result is stored
+        
+        @return: The decrypted block as bytes, or out if it was given
+        """
+        assert( len(block) == 16 )
+        result = self._DecryptInt( int.from_bytes(block, "big"), 
+                                   self._ExpandKey( key ) ).to_bytes(16, "big")
+        if out is None:
+            return result
+        assert( offset >= 0 and offset + 16 <= len(out) )
+        out[offset:offset+16] = result
+        return out
+    # end decrypt_block
+    
     def _InvCipher(self, inBlock, key):
         """
         The Inverse Cipher operation.  This decrypts the given inBlock with
@@ -222,7 +1004,7 @@ class AES():
         
         @return: The decrypted block of bytes
         """
-        keySchedule = self.KeyExpansion( key = key )
+        roundKeys = self._ExpandKey( key ).roundKeyInts
         
         # Assert that the initial state is likely valid, and assign it to the
         # current state variable
@@ -231,28 +1013,64 @@ class AES():
         for c in inBlock:
             assert( type(c) == int )
             assert( c < 256 )
-        self._state = inBlock
-        print( "rount[ 0].iinput : " + "".join([hex(x)[2:].zfill(2) for x in self._state]))
-        self.AddRoundKey(keySchedule[self._Nr*self._Nb: (self._Nr+1)*self._Nb])
-        print( "round[ 0].ik_sch : " + "".join([hex(x)[2:].zfill(2) for x in flattenKey(keySchedule[self._Nr*self._Nb: (self._Nr+1)*self._Nb])]))
+        self._state = bytearray(inBlock)
+        
+        # Rounds are traced in the order they are performed, so the key 
+        # schedule for trace round i is round key Nr - i, as in FIPS-197 
+        # Appendix C.
+        tracer = self._tracer
+        
+        if tracer != None:
+            tracer( 0, "iinput", bytes(self._state) )
+            tracer( 0, "ik_sch", roundKeys[self._Nr].to_bytes(16, "big") )
+        self.AddRoundKey( roundKeys[self._Nr] )
         for r in reversed(range(1, self._Nr)):
-            print( "rount[ %d].istart : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
+            i = self._Nr - r
+            if tracer != None:
+                tracer( i, "istart", bytes(self._state) )
             self.ShiftRows(inverse = True)
-            print( "rount[ %d].is_row : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
+            if tracer != None:
+                tracer( i, "is_row", bytes(self._state) )
             self.SubBytes(inverse = True)
-            print( "rount[ %d].is_box : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
-            self.AddRoundKey( keySchedule[r*self._Nb : (r+1)*self._Nb] )
-            print( "round[ %d].ik_sch : " %r + "".join([hex(x)[2:].zfill(2) for x in flattenKey(keySchedule[r*self._Nb : (r+1)*self._Nb])]))
+            if tracer != None:
+                tracer( i, "is_box", bytes(self._state) )
+                tracer( i, "ik_sch", roundKeys[r].to_bytes(16, "big") )
+            self.AddRoundKey( roundKeys[r] )
+            if tracer != None:
+                tracer( i, "ik_add", bytes(self._state) )
             self.MixColumns(inverse = True)
-            print( "rount[ %d].ik_add : " %r + "".join([hex(x)[2:].zfill(2) for x in self._state]))
         # end for
         
+        i = self._Nr
+        if tracer != None:
+            tracer( i, "istart", bytes(self._state) )
         self.ShiftRows(inverse = True)
+        if tracer != None:
+            tracer( i, "is_row", bytes(self._state) )
         self.SubBytes(inverse = True)
-        self.AddRoundKey( keySchedule[0: self._Nb] )
-        print( "rount[ ].ioutput : " + "".join([hex(x)[2:].zfill(2) for x in self._state]))
-        return self._state
+        if tracer != None:
+            tracer( i, "is_box", bytes(self._state) )
+            tracer( i, "ik_sch", roundKeys[0].to_bytes(16, "big") )
+        self.AddRoundKey( roundKeys[0] )
+        if tracer != None:
+            tracer( i, "ioutput", bytes(self._state) )
+        inBlock[:] = self._state
+        return inBlock
    
+    def _ExpandKey(self, key):
+        """
+        Returns the expanded form of the given key, using the key schedule 
+        cache so the key is only expanded the first time it is seen.
+        
+        @param key: The key to expand, 4 * Nk bytes long
+        
+        @return: The ExpandedKey for the key
+        """
+        assert( len(key) == 4 * self._Nk )
+        keyBytes = bytes(key)
+        return self._keyCache.get( (self._Nk, keyBytes), 
+                   lambda: ExpandedKey( self.KeyExpansion( key = list(keyBytes) ) ) )
+    # end _ExpandKey
    
     def KeyExpansion(self, key):
         """
@@ -284,14 +1102,17 @@ class AES():
             temp = w[i-1]
            
             if( i % self._Nk == 0 ):
-                temp = toArr(
-                        toInt(
-                          self.SubWord(self.RotWord(temp))) ^ self._rcon[int(i/self._Nk)])            
-        
+                temp = self.SubWord(self.RotWord(temp))
+                # Rcon[i/Nk] only has a value in the first byte of the word
+                temp[0] ^= self._rcon[i // self._Nk] >> 24
             elif( self._Nk > 6 and i % self._Nk == 4):
                 temp = self.SubWord(temp)
             # end if
-            w[i] = toArr( toInt(w[i-self._Nk]) ^ toInt(temp) )
+            
+            # The words are XORed byte by byte rather than through integers
+            prev = w[i-self._Nk]
+            w[i] = [ prev[0] ^ temp[0], prev[1] ^ temp[1], 
+                     prev[2] ^ temp[2], prev[3] ^ temp[3] ]
             i += 1
         # end while
               
@@ -305,24 +1126,18 @@ class AES():
         a simple bitwise XOR operation.  Each RoundKey consists of Nb words from 
         the key schedule.  
         
-        @param roundKey:  The length 16 array of integers representing the Key
+        @param roundKey:  The Round Key as a 128-bit integer (see 
+                          ExpandedKey.roundKeyInts), or as Nb words of the 
+                          key schedule
         
         @return: None, the state variable is modified directly.
         """
-      
-        # The roundKey is a list of lists at this point, flatten it to a standard
-        # byte array
-        key = []
-        for i in roundKey:
-            for ii in i:
-                key.append(ii)
-            # end for ii in in
-        # end for i in roundKey
-        
-        for i in range( len(self._state)):
-            self._state[i] ^= key[i]
-        # end for i in range( len(self._state))
-      
+        if type(roundKey) != int:
+            roundKey = int.from_bytes(flattenKey(roundKey), "big")
+        
+        # The whole State is added to the Round Key as one 128-bit XOR
+        state = self._state
+        state[:] = (int.from_bytes(state, "big") ^ roundKey).to_bytes(16, "big")
     # end AddRoundKey
        
 
@@ -337,41 +1152,17 @@ class AES():
         """
         
         if inverse == True:
-            sBox = self._invsbox
+            sBox = self._invsboxTable
         else:
-            sBox = self._sbox
+            sBox = self._sboxTable
         # end if    
         
-        for x in range(self._Nb):
-            for y in range(self._Nb):
-                # Get the current State Value
-                value = getArrayVal(x = x,
-                                    y = y,
-                                    source = self._state,
-                                    columns = self._Nb)
-                
-                # Split the Hex values into two independent addresses in the 
-                # SBox.  For example, if the value returned was 0x53, 
-                # X = 5, Y = 3 and the SBox return would be 0xed.
-                xVal = int(hex(value)[2:].zfill(2)[0], 16)
-                yVal = int(hex(value)[2:].zfill(2)[1], 16)
-                
-                # Gather the SBox Value
-                newVal = getArrayVal(x = xVal,
-                                     y = yVal,
-                                     source = sBox, 
-                                     columns = self._sboxColumns)
-                # Finally set the new value with the value that was gathered from 
-                # S Box
-                setArrayVal(x = x, 
-                            y = y,
-                            source =  self._state, 
-                            columns = self._Nb, 
-                            value = newVal)
-               
-            # end for y in range(self._Nb)
-        # end for x in range(self._Nb)
-              
+        # The SBox is a 16 x 16 table addressed by the two hex digits of the 
+        # value, e.g. 0x53 is row 5, column 3.  Row x, column y is entry 
+        # x * 16 + y, which is the value itself, so the whole State is 
+        # substituted with one translate.
+        state = self._state
+        state[:] = bytes(state).translate(sBox)
     # end SubBytes
             
    
@@ -386,43 +1177,15 @@ class AES():
         @return: None.  The class state variable is directly modified.
         """
           
-        # First make a copy of the state array so we can maintain the values
-        # even after modifying the original state
-        tempState = deepcopy(self._state)
-        
-        # Shift to the left or Right based on if this is an inverse operation
+        # Every byte is read before any is written, so the State can be 
+        # replaced in place without a copy.
         if inverse == True:
-            shiftVal = -1
+            order = self._invShiftRowsOrder
         else:
-            shiftVal = 1
+            order = self._shiftRowsOrder
         # end if
-        # For the X value only iterate over the last 3 rows.  The first row
-        # does not shift.
-        for x in range(1, self._Nb):
-            for y in range(self._Nb):
-                # Update the value based on the shiftVal (which could be assigned 
-                # to X but is shiftVal for added clarity)
-                # The y column is shifted and the modular operator operator is 
-                # applied to perform the actual circular shift 
-                value = getArrayVal(x = (y+shiftVal) % self._Nb,
-                                    y = x,
-                                    source = tempState,
-                                    columns = self._Nb)
-                
-                # Update the actual array value
-                setArrayVal(x = y, 
-                            y = x,
-                            source =  self._state, 
-                            columns = 4, 
-                            value = value)
-            # end for y in range(4)
-            
-            if inverse == True:
-                shiftVal -= 1
-            else:
-                shiftVal += 1
-            
-        # end for x in range 1, 4
+        state = self._state
+        state[:] = [ state[i] for i in order ]
     # end ShiftRows   
    
     def MixColumns(self, inverse = False):
@@ -435,25 +1198,32 @@ class AES():
         
         @return: None, the state is modified directly
         """ 
-        for y in range(self._Nb):
-            column = [ \
-               getArrayVal(y, 0, self._state, self._Nb),
-               getArrayVal(y, 1, self._state, self._Nb),
-               getArrayVal(y, 2, self._state, self._Nb),
-               getArrayVal(y, 3, self._state, self._Nb) ]
-            
-            # Update the Column Field
-            if inverse == True:
-                column = self._InvMixColumn(column)
-            else:
-                column =  self._MixColumn(column)
-            
-            # Assign the values back into the State Array
-            setArrayVal(y, 0, self._state, self._Nb, column[0])
-            setArrayVal(y, 1, self._state, self._Nb, column[1])
-            setArrayVal(y, 2, self._state, self._Nb, column[2])
-            setArrayVal(y, 3, self._state, self._Nb, column[3])
-        # end for y in range( self._Nb):
+        # Each column is four consecutive bytes of the State.  The column is
+        # read into locals and written back in place, as in _MixColumn.
+        state = self._state
+        if inverse == True:
+            m9 = galos.MUL[0x09]
+            mb = galos.MUL[0x0b]
+            md = galos.MUL[0x0d]
+            me = galos.MUL[0x0e]
+            for c in range(0, 4 * self._Nb, 4):
+                s0, s1, s2, s3 = state[c], state[c+1], state[c+2], state[c+3]
+                state[c]   = me[s0] ^ mb[s1] ^ md[s2] ^ m9[s3]
+                state[c+1] = m9[s0] ^ me[s1] ^ mb[s2] ^ md[s3]
+                state[c+2] = md[s0] ^ m9[s1] ^ me[s2] ^ mb[s3]
+                state[c+3] = mb[s0] ^ md[s1] ^ m9[s2] ^ me[s3]
+            # end for c
+        else:
+            m2 = galos.MUL[0x02]
+            m3 = galos.MUL[0x03]
+            for c in range(0, 4 * self._Nb, 4):
+                s0, s1, s2, s3 = state[c], state[c+1], state[c+2], state[c+3]
+                state[c]   = m2[s0] ^ m3[s1] ^ s2 ^ s3
+                state[c+1] = s0 ^ m2[s1] ^ m3[s2] ^ s3
+                state[c+2] = s0 ^ s1 ^ m2[s2] ^ m3[s3]
+                state[c+3] = m3[s0] ^ s1 ^ s2 ^ m2[s3]
+            # end for c
+        # end if
     # end MixColumns
    
     def SubWord(self, vals):
@@ -466,24 +1236,8 @@ class AES():
         
         @return: The Substituted values
         """ 
-        retVal = []
-        for val in vals:
-            # Split the Hex values into two independent addresses in the 
-            # SBox.  For example, if the value returned was 0x53, 
-            # X = 5, Y = 3 and the SBox return would be 0xed.
-            xVal = int(hex(val)[2:].zfill(2)[0], 16)
-            yVal = int(hex(val)[2:].zfill(2)[1], 16)
-            
-            # Gather the SBox Value
-            newVal = getArrayVal(x = xVal,
-                                 y = yVal,
-                                 source = self._sbox, 
-                                 columns = self._sboxColumns)
-            
-            retVal.append(newVal)
-        # end for v al in vals
-        
-        return retVal
+        # As in SubBytes the word is substituted with one translate
+        return list(bytes(vals).translate(self._sboxTable))
     # end SubWord
    
     def RotWord(self, vals):
@@ -514,11 +1268,13 @@ class AES():
         
         @return: The list of updated column values 
         """
-        t = deepcopy(column)
-        column[0] = FFMulFast(2, t[0]) ^ FFMulFast(3, t[1]) ^ t[2] ^ t[3]
-        column[1] = t[0] ^ FFMulFast(2, t[1]) ^ FFMulFast(3, t[2]) ^ t[3]
-        column[2] = t[0] ^ t[1] ^ FFMulFast(2, t[2]) ^ FFMulFast(3, t[3])
-        column[3] = FFMulFast(3, t[0]) ^ t[1] ^ t[2] ^ FFMulFast(2, t[3])
+        s0, s1, s2, s3 = column
+        m2 = galos.MUL[0x02]
+        m3 = galos.MUL[0x03]
+        column[0] = m2[s0] ^ m3[s1] ^ s2 ^ s3
+        column[1] = s0 ^ m2[s1] ^ m3[s2] ^ s3
+        column[2] = s0 ^ s1 ^ m2[s2] ^ m3[s3]
+        column[3] = m3[s0] ^ s1 ^ s2 ^ m2[s3]
         
         return column
     # end _MixColumn
@@ -536,34 +1292,93 @@ class AES():
         
         @return: The list of updated column values 
         """
-        t = deepcopy(column)
-        column[0] = FFMulFast(0x0e, t[0]) ^ FFMulFast(0x0b, t[1]) ^ FFMulFast(0x0d, t[2]) ^ FFMulFast(0x09, t[3])
-        column[1] = FFMulFast(0x09, t[0]) ^ FFMulFast(0x0e, t[1]) ^ FFMulFast(0x0b, t[2]) ^ FFMulFast(0x0d, t[3])
-        column[2] = FFMulFast(0x0d, t[0]) ^ FFMulFast(0x09, t[1]) ^ FFMulFast(0x0e, t[2]) ^ FFMulFast(0x0b, t[3])
-        column[3] = FFMulFast(0x0b, t[0]) ^ FFMulFast(0x0d, t[1]) ^ FFMulFast(0x09, t[2]) ^ FFMulFast(0x0e, t[3])
+        s0, s1, s2, s3 = column
+        m9 = galos.MUL[0x09]
+        mb = galos.MUL[0x0b]
+        md = galos.MUL[0x0d]
+        me = galos.MUL[0x0e]
+        column[0] = me[s0] ^ mb[s1] ^ md[s2] ^ m9[s3]
+        column[1] = m9[s0] ^ me[s1] ^ mb[s2] ^ md[s3]
+        column[2] = md[s0] ^ m9[s1] ^ me[s2] ^ mb[s3]
+        column[3] = mb[s0] ^ md[s1] ^ m9[s2] ^ me[s3]
         
         return column
     # end _MixColumn
-   
-    def _CalculateRCON(self):
-        """
-        This function calculates the RCON table used during the Key Expansion
-        @return: None, the local rcon class value is updated directly
-        """
-        rcon = []
-        
-        # RCON of 0 is not used per the AES Specification.  RCON of 1 is 0x01 
-        # which is 0x8D * 2 in a Galios Field of 2
-        val = hex(int("0x8d", 16))
-        rcon.append(int(val, 16))
-        
-        # The Variable I is not used in this equation, it is only used to create
-        # a loop
-        for i in range(256):
-            val = hex(FFMulFast(int(val, 16),2 ))
-            # TODO why 24
-            rcon.append(int(val, 16) << 24)
-        # end for i in range(256)
-        return rcon
-    # end _CalculateRCON
-# end class AES
\ No newline at end of file
+# end class AES
+
+# The AES S-Box and inverse S-Box as 256 byte tables for bytes.translate
+SBOX_TABLE = AES._sboxTable
+INV_SBOX_TABLE = AES._invsboxTable
+
+class AESContext():
+    """
+    An immutable cipher context bound to a single key.  The key is expanded 
+    once when the context is created and every call keeps its working state 
+    in local variables, so one context can be shared freely between threads.
+    
+    Useage:
+    >>> context = AESContext(key)
+    >>> cipherText = context.encrypt_block(plainText)
+    >>> plainText = context.decrypt_block(cipherText)
+    """
+    
+    __slots__ = ( "_aes", "_expandedKey", "keyLength" )
+    
+    def __init__(self, key, keyCache = None):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param keyCache:  Optional KeyScheduleCache to hold expanded keys
+        """
+        assert( len(key) in (16, 24, 32) )
+        aes = AES(len(key) // 4, keyCache = keyCache)
+        object.__setattr__(self, "_aes", aes)
+        object.__setattr__(self, "_expandedKey", aes._ExpandKey(key))
+        object.__setattr__(self, "keyLength", aes._Nk)
+    # end __init__
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("AESContext is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError("AESContext is immutable")
+    
+    def encrypt_block(self, block, out = None, offset = 0):
+        """
+        Encrypts a single 16 byte block, see AES.encrypt_block
+        
+        @param block:  The 16 bytes to encrypt
+        @param out: Optional writable buffer to store the result in
+        @param offset: The offset in out at which the result is stored
+        
+        @return: The encrypted block as bytes, or out if it was given
+        """
+        assert( len(block) == 16 )
+        result = self._aes._EncryptInt( int.from_bytes(block, "big"), 
+                                        self._expandedKey ).to_bytes(16, "big")
+        if out is None:
+            return result
+        assert( offset >= 0 and offset + 16 <= len(out) )
+        out[offset:offset+16] = result
+        return out
+    # end encrypt_block
+    
+    def decrypt_block(self, block, out = None, offset = 0):
+        """
+        Decrypts a single 16 byte block, see AES.decrypt_block
+        
+        @param block:  The 16 bytes to decrypt
+        @param out: Optional writable buffer to store the result in
+        @param offset: The offset in out at which the result is stored
+        
+        @return: The decrypted block as bytes, or out if it was given
+        """
+        assert( len(block) == 16 )
+        result = self._aes._DecryptInt( int.from_bytes(block, "big"), 
+                                        self._expandedKey ).to_bytes(16, "big")
+        if out is None:
+            return result
+        assert( offset >= 0 and offset + 16 <= len(out) )
+        out[offset:offset+16] = result
+        return out
+    # end decrypt_block
+# end class AESContext
@@ -0,0 +1,120 @@
+# Name: AES_concurrent.py
+# Purpose:  Runs many independent AES messages across a pool of threads.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: Each message is processed by a fresh cipher object from the
+# makeCipher function, so messages never share state.  The pure Python engines
+# hold the GIL, so the speed up comes from engines that release it (NumPy) or
+# from free-threaded builds of Python.
+# >>> import AES_concurrent, AES_modes
+# >>> with AES_concurrent.BatchExecutor(maxWorkers = 8) as executor:
+# ...     cipherTexts = executor.cryptMessages(
+# ...         lambda i: AES_modes.CTREncryptor(key, counters[i]), messages)
+
+from concurrent.futures import ThreadPoolExecutor
+
+class BatchExecutor():
+    """
+    A thread pool for processing many independent messages.  Results are
+    always returned in the order of the input.
+    """
+
+    def __init__(self, maxWorkers = None):
+        """
+        @param maxWorkers:  The number of threads, the concurrent.futures
+                            default if not given
+        """
+        self._executor = ThreadPoolExecutor(max_workers = maxWorkers)
+    # end __init__
+
+    def map(self, function, items):
+        """
+        Calls the function on every item in the pool
+
+        @param function:  The function to call
+        @param items: An iterable of the arguments
+
+        @return: A list of the results in the order of the items
+        """
+        return list(self._executor.map(function, items))
+    # end map
+
+    def cryptMessages(self, makeCipher, messages):
+        """
+        Encrypts or decrypts every message with its own cipher object
+
+        @param makeCipher:  A function taking the index of a message and
+                            returning a new object with update() and
+                            finalize(), e.g. an encryptor from AES_modes
+        @param messages: A sequence of bytes-like messages
+
+        @return: A list of the outputs in the order of the messages
+        """
+        def crypt(index):
+            cipher = makeCipher(index)
+            return cipher.update(messages[index]) + cipher.finalize()
+        # end crypt
+
+        return self.map(crypt, range(len(messages)))
+    # end cryptMessages
+
+    def encryptBlocks(self, context, blocks):
+        """
+        Encrypts many independent blocks with a shared AESContext
+
+        @param context:  An AES_cipher.AESContext
+        @param blocks: A sequence of 16 byte blocks
+
+        @return: A list of the encrypted blocks
+        """
+        return self.map(context.encrypt_block, blocks)
+    # end encryptBlocks
+
+    def decryptBlocks(self, context, blocks):
+        """
+        Decrypts many independent blocks with a shared AESContext
+
+        @param context:  An AES_cipher.AESContext
+        @param blocks: A sequence of 16 byte blocks
+
+        @return: A list of the decrypted blocks
+        """
+        return self.map(context.decrypt_block, blocks)
+    # end decryptBlocks
+
+    def close(self):
+        """
+        Waits for outstanding work and shuts down the threads
+        """
+        self._executor.shutdown(wait = True)
+    # end close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+# end class BatchExecutor
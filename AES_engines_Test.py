@@ -0,0 +1,148 @@
+'''
+Test cases for the batch AES engines.  Each engine is checked against the
+FIPS-197 Appendix C vectors and against the T-table engine for many blocks.
+'''
+import unittest
+from Cryptography.AES_cipher import AES, AES_128, AES_192, AES_256
+from Cryptography.AES_modes import CTREncryptor
+from Cryptography import AES_numpy
+from Cryptography import AES_bitslice
+from Cryptography.AES_bitslice import BitslicedAES
+from Cryptography import AES_batch
+from Cryptography.AES_translate import TranslateAES
+from Cryptography.AES_cipher import SBOX_TABLE, INV_SBOX_TABLE
+
+PLAIN_TEXT = bytes.fromhex("00112233445566778899aabbccddeeff")
+
+VECTORS = [ \
+    (AES_128, bytes(range(16)), bytes.fromhex("69c4e0d86a7b0430d8cdb78070b4c55a")),
+    (AES_192, bytes(range(24)), bytes.fromhex("dda97ca4864cdfe06eaf70a0ec0d7191")),
+    (AES_256, bytes(range(32)), bytes.fromhex("8ea2b7ca516745bfeafc49904b496089")) ]
+
+# A message of many blocks with a trailing partial block
+MESSAGE = bytes( (i * 7 + 3) & 0xff for i in range(16 * 37 + 5) )
+
+class Test(unittest.TestCase):
+
+    @unittest.skipIf(AES_numpy.np is None, "NumPy is not installed")
+    def testNumpyEngine(self):
+        for keyLength, key, expected in VECTORS:
+            engine = AES_numpy.NumpyAES(keyLength)
+            self.assertEqual(engine.encrypt_blocks(PLAIN_TEXT * 3, key), expected * 3)
+            self.assertEqual(engine.decrypt_blocks(expected * 3, key), PLAIN_TEXT * 3)
+
+            aes = AES(keyLength)
+            blocks = MESSAGE[:16 * 37]
+            cipherText = engine.encrypt_blocks(blocks, key)
+            for i in range(0, len(blocks), 16):
+                self.assertEqual(cipherText[i:i+16], aes.encrypt_block(blocks[i:i+16], key))
+            self.assertEqual(engine.decrypt_blocks(cipherText, key), blocks)
+
+            # Counter mode, including a carry out of the low 64 bits
+            counter = bytes(8) + b"\xff" * 7 + b"\xf0"
+            self.assertEqual(engine.ctr(key, counter, MESSAGE),
+                             CTREncryptor(key, counter).update(MESSAGE))
+        # end for keyLength, key, expected
+    # end testNumpyEngine
+
+    def testBitslicedEngine(self):
+        for keyLength, key, expected in VECTORS:
+            engine = BitslicedAES(keyLength, batchSize = 8)
+            self.assertEqual(engine.encrypt_blocks(PLAIN_TEXT * 3, key), expected * 3)
+            self.assertEqual(engine.decrypt_blocks(expected * 3, key), PLAIN_TEXT * 3)
+
+            aes = AES(keyLength)
+            blocks = MESSAGE[:16 * 37]
+            cipherText = engine.encrypt_blocks(blocks, key)
+            for i in range(0, len(blocks), 16):
+                self.assertEqual(cipherText[i:i+16], aes.encrypt_block(blocks[i:i+16], key))
+            self.assertEqual(engine.decrypt_blocks(cipherText, key), blocks)
+
+            # The round keys are sliced once for a single block whatever the
+            # batch sizes used, and only a few batch sizes keep their masks
+            self.assertEqual(len(engine._aes._ExpandKey(key).bitslicedKeys), engine._Nr + 1)
+            for n in range(1, 20):
+                AES_bitslice._Masks(n)
+            self.assertLessEqual(AES_bitslice._Masks.cache_info().currsize, 8)
+
+            counter = b"\xff" * 15 + b"\xf0"
+            self.assertEqual(engine.ctr(key, counter, MESSAGE),
+                             CTREncryptor(key, counter).update(MESSAGE))
+        # end for keyLength, key, expected
+
+        # Every byte value through the S-Box circuit
+        engine = BitslicedAES(AES_128)
+        key = bytes(16)
+        data = bytes(range(256))
+        self.assertEqual(engine.decrypt_blocks(engine.encrypt_blocks(data, key), key), data)
+    # end testBitslicedEngine
+
+    def testTranslateEngine(self):
+        self.assertEqual(SBOX_TABLE[0x53], 0xed)
+        self.assertEqual(bytes(range(256)).translate(SBOX_TABLE).translate(INV_SBOX_TABLE),
+                         bytes(range(256)))
+
+        for keyLength, key, expected in VECTORS:
+            # A small batch size so the data is split into several batches
+            engine = TranslateAES(keyLength, batchSize = 5)
+            self.assertEqual(engine.encrypt_blocks(PLAIN_TEXT * 12, key), expected * 12)
+            self.assertEqual(engine.decrypt_blocks(expected * 12, key), PLAIN_TEXT * 12)
+
+            aes = AES(keyLength)
+            blocks = MESSAGE[:16 * 37]
+            cipherText = engine.encrypt_blocks(blocks, key)
+            for i in range(0, len(blocks), 16):
+                self.assertEqual(cipherText[i:i+16], aes.encrypt_block(blocks[i:i+16], key))
+            self.assertEqual(engine.decrypt_blocks(cipherText, key), blocks)
+
+            counter = bytes(8) + b"\xff" * 7 + b"\xf0"
+            self.assertEqual(engine.ctr(key, counter, MESSAGE),
+                             CTREncryptor(key, counter).update(MESSAGE))
+        # end for keyLength, key, expected
+    # end testTranslateEngine
+
+    def testMultiKeyBatch(self):
+        # Three key sizes, with every key used for several blocks in no order
+        keys = [ bytes([i] * (16 + 8 * (i % 3))) for i in range(9) ] * 4
+        blocks = [ MESSAGE[16 * i : 16 * (i + 1)] for i in range(len(keys)) ]
+        expected = [ AES(len(k) // 4).encrypt_block(b, k) for k, b in zip(keys, blocks) ]
+
+        for useNumPy in set([False, AES_numpy.np is not None]):
+            cipherTexts = AES_batch.encryptBlocks(keys, blocks, useNumPy = useNumPy)
+            self.assertEqual(cipherTexts, expected)
+            self.assertEqual(AES_batch.decryptBlocks(keys, cipherTexts, useNumPy = useNumPy), blocks)
+
+            # Misaligned blocks whose total length is still whole blocks
+            misaligned = [ MESSAGE[:15], MESSAGE[15:32] ]
+            self.assertRaises(AssertionError, AES_batch.encryptBlocks, keys[:2], misaligned,
+                              useNumPy = useNumPy)
+        # end for useNumPy
+
+        for keyLength, key, cipherText in VECTORS:
+            self.assertEqual(AES_batch.expandKeys([key, key])[key].flatKey[:len(key)], key)
+
+        messages = [ MESSAGE[:i * 5] for i in range(len(keys)) ]
+        counter = bytes(16)
+        outputs = AES_batch.cryptMessages(keys, messages,
+            lambda key, aes, i: CTREncryptor(key, counter, aes = aes))
+        for key, message, output in zip(keys, messages, outputs):
+            self.assertEqual(output, CTREncryptor(key, counter).update(message))
+    # end testMultiKeyBatch
+
+    def testKeyLength(self):
+        # Every engine and mode expands its keys through AES._ExpandKey, which
+        # rejects a key of the wrong length for the key size
+        engines = [ TranslateAES(AES_128), BitslicedAES(AES_128) ]
+        if AES_numpy.np is not None:
+            engines.append( AES_numpy.NumpyAES(AES_128) )
+        for key in (bytes(15), bytes(17), bytes(24)):
+            for engine in engines:
+                self.assertRaises(AssertionError, engine.encrypt_blocks, PLAIN_TEXT, key)
+                self.assertRaises(AssertionError, engine.decrypt_blocks, PLAIN_TEXT, key)
+            self.assertRaises(AssertionError, CTREncryptor, key, bytes(16), aes = AES(AES_128))
+            self.assertRaises(AssertionError, AES(AES_128).encrypt_block, PLAIN_TEXT, key)
+        # end for key
+    # end testKeyLength
+
+if __name__ == "__main__":
+    unittest.main()
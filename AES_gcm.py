@@ -0,0 +1,371 @@
+# Name: AES_gcm.py
+# Purpose:  AES in Galois/Counter Mode (GCM), authenticated encryption as
+#           described in NIST SP 800-38D.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: Additional authenticated data (AAD) is given with updateAAD() before
+# the first call to update().  The tag is available once finalize() has been
+# called.  The decryptor checks the tag in finalize() and raises ValueError if
+# it does not match, so no output may be trusted until finalize() returns.
+# >>> import AES_gcm
+# >>> enc = AES_gcm.GCMEncryptor(key, iv)
+# >>> enc.updateAAD(header)
+# >>> cipherText = enc.update(plainText) + enc.finalize()
+# >>> tag = enc.tag
+# >>> dec = AES_gcm.GCMDecryptor(key, iv, tag)
+# >>> dec.updateAAD(header)
+# >>> plainText = dec.update(cipherText) + dec.finalize()
+
+from hmac import compare_digest
+from AES_cipher import AES
+import AES_translate
+
+# The most text that may be encrypted under one key and IV, 2^32 - 2 blocks
+# (NIST SP 800-38D).  Past that the 32-bit counter wraps and the key stream
+# repeats.
+MAX_TEXT_LENGTH = (2 ** 32 - 2) * 16
+
+# The reduction constant of GF(2^128), x^128 + x^7 + x^2 + x + 1, in the bit
+# reflected order used by GCM.
+_R = 0xe1 << 120
+
+def _BuildGHashTables( h ):
+    """
+    Builds the per key multiplication tables used by GHASH.  Multiplying by H
+    is linear, so X.H is the XOR of the products of H with each byte of X in
+    its position.  tables[j][b] is H times the block that is zero except for
+    byte j, which is b.  This is the 8-bit variant of Shoup's method, trading
+    64 KiB of tables per key for 16 lookups per block.
+
+    @param h:  The hash subkey H = E(K, 0^128) as an integer
+
+    @return: A list of 16 tables of 256 integers
+    """
+    # basis[i] is H.x^i.  In GCM bit 0 of a block is the most significant bit
+    # of the integer, so multiplying by x is a shift right.
+    basis = []
+    v = h
+    for i in range(128):
+        basis.append(v)
+        v = (v >> 1) ^ _R if v & 1 else v >> 1
+    # end for i in range(128)
+
+    tables = []
+    for j in range(16):
+        table = [0] * 256
+        for b in range(1, 256):
+            low = b & -b
+            # Bit t of byte j is integer bit 8 * (15 - j) + t which is the
+            # coefficient of x^(127 - 8 * (15 - j) - t)
+            table[b] = table[b ^ low] ^ basis[8 * j + 7 - (low.bit_length() - 1)]
+        tables.append(table)
+    # end for j in range(16)
+    return tables
+# end _BuildGHashTables
+
+class _GHash():
+    """
+    The GHASH universal hash over a sequence of inputs.  Partial blocks are
+    carried between calls to update until pad() is called.
+    """
+
+    __slots__ = ( "_tables", "_y", "_buffer" )
+
+    def __init__(self, tables):
+        self._tables = tables
+        self._y = 0
+        self._buffer = b""
+    # end __init__
+
+    def update(self, data):
+        """
+        Hashes more of the current input
+        """
+        if self._buffer:
+            data = self._buffer + bytes(data)
+        length = len(data) - (len(data) % 16)
+        self._y = self._Blocks(data, length, self._y)
+        self._buffer = bytes(data[length:])
+    # end update
+
+    def pad(self):
+        """
+        Zero pads the current input to a whole block
+        """
+        if self._buffer:
+            block = self._buffer + bytes(16 - len(self._buffer))
+            self._y = self._Blocks(block, 16, self._y)
+            self._buffer = b""
+    # end pad
+
+    def digest(self, lengthBlock):
+        """
+        Completes the hash with the lengths block
+
+        @param lengthBlock:  The final block as an integer
+
+        @return: The hash as an integer
+        """
+        self.pad()
+        return self._Blocks(lengthBlock.to_bytes(16, "big"), 16, self._y)
+    # end digest
+
+    def _Blocks(self, data, length, y):
+        """
+        Hashes the first length bytes (whole blocks) of data into y
+        """
+        t0, t1, t2, t3, t4, t5, t6, t7, t8, t9, t10, t11, t12, t13, t14, t15 = self._tables
+        for i in range(0, length, 16):
+            z = (y ^ int.from_bytes(data[i:i+16], "big")).to_bytes(16, "big")
+            y = t0[z[0]] ^ t1[z[1]] ^ t2[z[2]] ^ t3[z[3]] ^ \
+                t4[z[4]] ^ t5[z[5]] ^ t6[z[6]] ^ t7[z[7]] ^ \
+                t8[z[8]] ^ t9[z[9]] ^ t10[z[10]] ^ t11[z[11]] ^ \
+                t12[z[12]] ^ t13[z[13]] ^ t14[z[14]] ^ t15[z[15]]
+        # end for i in range(0, length, 16)
+        return y
+    # end _Blocks
+# end class _GHash
+
+class _GCMMode():
+    """
+    The parts common to GCM encryption and decryption
+    """
+
+    __slots__ = ( "_aes", "_expandedKey", "_tagMask", "_counterHigh", "_counter",
+                  "_keyStream", "_ghash", "_aadLength", "_textLength", "_inText",
+                  "_finalized" )
+
+    def __init__(self, key, iv, aes):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param iv: The initialization vector, 12 bytes is recommended
+        @param aes: Optional AES instance to use
+        """
+        assert( len(key) in (16, 24, 32) )
+        assert( len(iv) > 0 )
+        if aes == None:
+            aes = AES(len(key) // 4)
+        assert( aes._Nk == len(key) // 4 )
+        self._aes = aes
+        self._expandedKey = aes._ExpandKey(key)
+
+        # The GHASH tables are stored with the key schedule so they are only
+        # built once per key
+        tables = self._expandedKey.ghashTables
+        if tables == None:
+            tables = _BuildGHashTables( aes._EncryptInt(0, self._expandedKey) )
+            self._expandedKey.ghashTables = tables
+        # end if
+
+        if len(iv) == 12:
+            j0 = (int.from_bytes(iv, "big") << 32) | 1
+        else:
+            ivHash = _GHash(tables)
+            ivHash.update(iv)
+            j0 = ivHash.digest(len(iv) * 8)
+        # end if
+
+        self._tagMask = aes._EncryptInt(j0, self._expandedKey)
+        self._counterHigh = j0 & ~0xffffffff
+        self._counter = (j0 + 1) & 0xffffffff
+        self._keyStream = b""
+
+        self._ghash = _GHash(tables)
+        self._aadLength = 0
+        self._textLength = 0
+        self._inText = False
+        self._finalized = False
+    # end __init__
+
+    def updateAAD(self, data):
+        """
+        Adds additional authenticated data.  This must be called before the
+        first call to update.
+
+        @param data:  Any bytes-like object
+        """
+        assert( not self._inText and not self._finalized )
+        self._ghash.update(data)
+        self._aadLength += len(data)
+    # end updateAAD
+
+    def _StartText(self):
+        """
+        Ends the AAD, which is zero padded to a whole block in the hash, the
+        first time text is given.
+        """
+        if not self._inText:
+            self._ghash.pad()
+            self._inText = True
+    # end _StartText
+
+    def _Crypt(self, data):
+        """
+        XORs the data with the next bytes of the counter mode key stream.  The
+        counter only increments the low 32 bits of the block (inc32).
+
+        @raise ValueError: If the text would exceed MAX_TEXT_LENGTH
+        """
+        length = len(data)
+        if length == 0:
+            return b""
+        if self._textLength + length > MAX_TEXT_LENGTH:
+            raise ValueError("GCM text exceeds 2^32 - 2 blocks for one IV")
+        self._textLength += length
+
+        keyStream = self._keyStream
+        if len(keyStream) < length:
+            encrypt = self._aes._EncryptInt
+            expandedKey = self._expandedKey
+            high = self._counterHigh
+            counter = self._counter
+            blocks = (length - len(keyStream) + 15) // 16
+            if blocks >= AES_translate.MIN_BLOCKS:
+                # Runs of many blocks go through the whole buffer engine
+                counters = b"".join( (high | ((counter + i) & 0xffffffff)).to_bytes(16, "big")
+                                     for i in range(blocks) )
+                out = AES_translate.encryptBlocks(counters, expandedKey)
+                counter = (counter + blocks) & 0xffffffff
+            else:
+                out = bytearray(blocks * 16)
+                for i in range(0, blocks * 16, 16):
+                    out[i:i+16] = encrypt(high | counter, expandedKey).to_bytes(16, "big")
+                    counter = (counter + 1) & 0xffffffff
+            # end if
+            self._counter = counter
+            keyStream += out
+        # end if
+
+        self._keyStream = bytes(keyStream[length:])
+        return (int.from_bytes(data, "big") ^
+                int.from_bytes(keyStream[:length], "big")).to_bytes(length, "big")
+    # end _Crypt
+
+    def _Tag(self):
+        """
+        @return: The full 16 byte authentication tag
+        """
+        assert( not self._finalized )
+        self._finalized = True
+        self._ghash.pad()
+        lengths = ((self._aadLength * 8) << 64) | (self._textLength * 8)
+        return (self._ghash.digest(lengths) ^ self._tagMask).to_bytes(16, "big")
+    # end _Tag
+# end class _GCMMode
+
+class GCMEncryptor(_GCMMode):
+    """
+    GCM authenticated encryption
+    """
+
+    __slots__ = ( "tag", )
+
+    def __init__(self, key, iv, aes = None):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param iv: The initialization vector, 12 bytes is recommended.  An IV
+                   must never be reused with the same key.
+        @param aes: Optional AES instance to use
+        """
+        _GCMMode.__init__(self, key, iv, aes)
+        self.tag = None
+    # end __init__
+
+    def update(self, data):
+        """
+        Encrypts the next chunk of the message
+
+        @param data:  Any bytes-like object of any length
+
+        @return: The cipher text, always the same length as data
+        """
+        assert( not self._finalized )
+        self._StartText()
+        out = self._Crypt(data)
+        self._ghash.update(out)
+        return out
+    # end update
+
+    def finalize(self):
+        """
+        Completes the message and computes the tag, stored in self.tag
+
+        @return: An empty bytes object, GCM has no buffered output
+        """
+        self.tag = self._Tag()
+        return b""
+    # end finalize
+# end class GCMEncryptor
+
+class GCMDecryptor(_GCMMode):
+    """
+    GCM authenticated decryption
+    """
+
+    __slots__ = ( "_expectedTag", )
+
+    def __init__(self, key, iv, tag, aes = None):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param iv: The initialization vector used for encryption
+        @param tag: The authentication tag, between 4 and 16 bytes.  Shorter
+                    tags are a prefix of the full tag.
+        @param aes: Optional AES instance to use
+        """
+        assert( 4 <= len(tag) <= 16 )
+        _GCMMode.__init__(self, key, iv, aes)
+        self._expectedTag = bytes(tag)
+    # end __init__
+
+    def update(self, data):
+        """
+        Decrypts the next chunk of the message.  The output is not
+        authenticated until finalize has returned.
+
+        @param data:  Any bytes-like object of any length
+
+        @return: The plain text, always the same length as data
+        """
+        assert( not self._finalized )
+        self._StartText()
+        self._ghash.update(data)
+        return self._Crypt(data)
+    # end update
+
+    def finalize(self):
+        """
+        Completes the message and checks the tag
+
+        @return: An empty bytes object, GCM has no buffered output
+
+        @raise ValueError: If the tag does not match
+        """
+        tag = self._Tag()[:len(self._expectedTag)]
+        if not compare_digest(tag, self._expectedTag):
+            raise ValueError("GCM authentication tag mismatch")
+        return b""
+    # end finalize
+# end class GCMDecryptor
@@ -0,0 +1,106 @@
+'''
+Test cases for AES-GCM.  The vectors are the test cases from "The Galois/
+Counter Mode of Operation (GCM)" by McGrew and Viega, as used by NIST in the
+GCM validation suite.
+'''
+import unittest
+from Cryptography.AES_gcm import GCMEncryptor, GCMDecryptor, MAX_TEXT_LENGTH
+
+K3 = "feffe9928665731c6d6a8f9467308308"
+P3 = "d9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72" \
+     "1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b391aafd255"
+P4 = P3[:120]
+A4 = "feedfacedeadbeeffeedfacedeadbeefabaddad2"
+
+# (key, iv, plain text, aad, cipher text, tag)
+VECTORS = [ \
+    # Test Case 1
+    ("00000000000000000000000000000000", "000000000000000000000000", "", "", "",
+     "58e2fccefa7e3061367f1d57a4e7455a"),
+    # Test Case 2
+    ("00000000000000000000000000000000", "000000000000000000000000",
+     "00000000000000000000000000000000", "",
+     "0388dace60b6a392f328c2b971b2fe78", "ab6e47d42cec13bdf53a67b21257bddf"),
+    # Test Case 3
+    (K3, "cafebabefacedbaddecaf888", P3, "",
+     "42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e"
+     "21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091473f5985",
+     "4d5c2af327cd64a62cf35abd2ba6fab4"),
+    # Test Case 4
+    (K3, "cafebabefacedbaddecaf888", P4, A4,
+     "42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e"
+     "21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091",
+     "5bc94fbc3221a5db94fae95ae7121a47"),
+    # Test Case 5, a 64-bit IV
+    (K3, "cafebabefacedbad", P4, A4,
+     "61353b4c2806934a777ff51fa22a4755699b2a714fcdc6f83766e5f97b6c7423"
+     "73806900e49f24b22b097544d4896b424989b5e1ebac0f07c23f4598",
+     "3612d2e79e3b0785561be14aaca2fccb"),
+    # Test Case 13, AES-256
+    ("00" * 32, "000000000000000000000000", "", "", "",
+     "530f8afbc74536b9a963b4f1c4cb738b"),
+    # Test Case 14, AES-256
+    ("00" * 32, "000000000000000000000000", "00000000000000000000000000000000", "",
+     "cea7403d4d606b6e074ec5d3baf39d18", "d0d1c8a799996bf0265b98b5d48ab919") ]
+
+class Test(unittest.TestCase):
+
+    def testVectors(self):
+        for key, iv, plainText, aad, cipherText, tag in VECTORS:
+            key, iv, plainText, aad, cipherText, tag = [ bytes.fromhex(v) for v in
+                (key, iv, plainText, aad, cipherText, tag) ]
+
+            enc = GCMEncryptor(key, iv)
+            enc.updateAAD(aad[:7])
+            enc.updateAAD(aad[7:])
+            out = b""
+            for i in range(0, len(plainText), 13):
+                out += enc.update(plainText[i:i+13])
+            out += enc.finalize()
+            self.assertEqual(out, cipherText, "GCM - Encrypt")
+            self.assertEqual(enc.tag, tag, "GCM - Tag")
+
+            dec = GCMDecryptor(key, iv, tag)
+            dec.updateAAD(aad)
+            out = dec.update(cipherText[:5]) + dec.update(cipherText[5:]) + dec.finalize()
+            self.assertEqual(out, plainText, "GCM - Decrypt")
+        # end for key, iv, plainText, aad, cipherText, tag
+    # end testVectors
+
+    def testTagMismatch(self):
+        key = bytes.fromhex(K3)
+        iv = bytes.fromhex("cafebabefacedbaddecaf888")
+        enc = GCMEncryptor(key, iv)
+        enc.updateAAD(b"header")
+        cipherText = enc.update(b"attack at dawn") + enc.finalize()
+
+        dec = GCMDecryptor(key, iv, enc.tag[:12])
+        dec.updateAAD(b"header")
+        dec.update(cipherText)
+        dec.finalize()
+
+        tampered = bytes([cipherText[0] ^ 1]) + cipherText[1:]
+        dec = GCMDecryptor(key, iv, enc.tag)
+        dec.updateAAD(b"header")
+        dec.update(tampered)
+        self.assertRaises(ValueError, dec.finalize)
+
+        dec = GCMDecryptor(key, iv, enc.tag)
+        dec.updateAAD(b"Header")
+        dec.update(cipherText)
+        self.assertRaises(ValueError, dec.finalize)
+    # end testTagMismatch
+
+    def testTextLimit(self):
+        # Start just short of the 2^32 - 2 block limit rather than encrypting
+        # 64 GiB
+        key = bytes.fromhex(K3)
+        iv = bytes.fromhex("cafebabefacedbaddecaf888")
+        for cipher in (GCMEncryptor(key, iv), GCMDecryptor(key, iv, bytes(16))):
+            cipher._textLength = MAX_TEXT_LENGTH - 20
+            self.assertEqual(len(cipher.update(bytes(20))), 20)
+            self.assertRaises(ValueError, cipher.update, b"x")
+    # end testTextLimit
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,406 @@
+# Name: AES_modes.py
+# Purpose:  Streaming modes of operation (ECB, CBC and CTR) with PKCS#7 padding
+#           built on top of the AES block cipher in AES_cipher.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: Every encryptor / decryptor accepts data of any size through update()
+# and returns whatever output is ready.  finalize() returns the remaining
+# output and must be called once at the end of the message.
+# >>> import AES_modes
+# >>> enc = AES_modes.CBCEncryptor(key, iv)
+# >>> cipherText = enc.update(b"Secret Message ") + enc.update(b"to be encrypted!")
+# >>> cipherText += enc.finalize()
+
+from AES_cipher import AES
+import AES_translate
+
+# The AES block size in bytes
+BLOCK_SIZE = 16
+
+def pkcs7Pad( data, blockSize = BLOCK_SIZE ):
+    """
+    Pads the data to a multiple of the block size as described in PKCS#7
+    (RFC 5652 section 6.3).  A full block of padding is added when the data is
+    already a multiple of the block size.
+
+    @param data:  The bytes to pad
+    @param blockSize: The block size to pad to
+
+    @return: The padded bytes
+    """
+    padLen = blockSize - (len(data) % blockSize)
+    return bytes(data) + bytes([padLen]) * padLen
+# end pkcs7Pad
+
+def pkcs7Unpad( data, blockSize = BLOCK_SIZE ):
+    """
+    Removes PKCS#7 padding from the data
+
+    @param data:  The padded bytes
+    @param blockSize: The block size the data was padded to
+
+    @return: The data with the padding removed
+
+    @raise ValueError: If the padding is not valid
+    """
+    if len(data) == 0 or len(data) % blockSize != 0:
+        raise ValueError("Invalid padded data length")
+    padLen = data[-1]
+    if padLen < 1 or padLen > blockSize or \
+       bytes(data[-padLen:]) != bytes([padLen]) * padLen:
+        raise ValueError("Invalid PKCS#7 padding")
+    return bytes(data[:-padLen])
+# end pkcs7Unpad
+
+class _BlockMode():
+    """
+    The common base of the block based (ECB and CBC) encryptors and
+    decryptors.  Input that does not fill a whole block is carried over to the
+    next call of update so only a single partial block is ever buffered.
+    """
+
+    __slots__ = ( "_aes", "_expandedKey", "_padding", "_buffer", "_finalized" )
+
+    # Decryptors that remove padding must hold back the last full block until
+    # finalize, since only then is it known to be the last block.
+    _holdLastBlock = False
+
+    def __init__(self, key, padding, aes):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param padding: True to apply / remove PKCS#7 padding
+        @param aes: Optional AES instance to use, one is created if not given
+        """
+        self._aes = _GetCipher(key, aes)
+        self._expandedKey = self._aes._ExpandKey(key)
+        self._padding = padding
+        self._buffer = bytearray()
+        self._finalized = False
+    # end __init__
+
+    def update(self, data):
+        """
+        Processes the next chunk of the message
+
+        @param data:  Any bytes-like object of any length
+
+        @return: The output bytes that are ready
+        """
+        assert( not self._finalized )
+        buf = self._buffer
+        buf += data
+        count = len(buf) - (len(buf) % BLOCK_SIZE)
+        if self._holdLastBlock and self._padding and count == len(buf):
+            count -= BLOCK_SIZE
+        if count <= 0:
+            return b""
+
+        with memoryview(buf) as view:
+            out = self._ProcessBlocks(view[:count])
+        del buf[:count]
+        return out
+    # end update
+
+    def finalize(self):
+        """
+        Completes the message
+
+        @return: The remaining output bytes
+
+        @raise ValueError: If the message length or padding is invalid
+        """
+        assert( not self._finalized )
+        self._finalized = True
+        buf = self._buffer
+        self._buffer = bytearray()
+        return self._Finalize(buf)
+    # end finalize
+# end class _BlockMode
+
+class _BlockEncryptor(_BlockMode):
+
+    __slots__ = ()
+
+    def _Finalize(self, buf):
+        if self._padding:
+            return self._ProcessBlocks(pkcs7Pad(buf))
+        if len(buf) != 0:
+            raise ValueError("Message is not a multiple of the block size")
+        return b""
+    # end _Finalize
+# end class _BlockEncryptor
+
+class _BlockDecryptor(_BlockMode):
+
+    __slots__ = ()
+
+    _holdLastBlock = True
+
+    def _Finalize(self, buf):
+        if self._padding:
+            if len(buf) != BLOCK_SIZE:
+                raise ValueError("Message is not a multiple of the block size")
+            return pkcs7Unpad(self._ProcessBlocks(buf))
+        if len(buf) != 0:
+            raise ValueError("Message is not a multiple of the block size")
+        return b""
+    # end _Finalize
+# end class _BlockDecryptor
+
+class ECBEncryptor(_BlockEncryptor):
+    """
+    Electronic Codebook mode encryption.  Each block is encrypted independently.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, key, padding = True, aes = None):
+        _BlockEncryptor.__init__(self, key, padding, aes)
+
+    def _ProcessBlocks(self, view):
+        expandedKey = self._expandedKey
+        # Runs of many blocks go through the whole buffer engine
+        if len(view) >= AES_translate.MIN_BLOCKS * BLOCK_SIZE:
+            return AES_translate.encryptBlocks(view, expandedKey)
+        encrypt = self._aes._EncryptInt
+        out = bytearray(len(view))
+        for i in range(0, len(view), BLOCK_SIZE):
+            out[i:i+BLOCK_SIZE] = encrypt( int.from_bytes(view[i:i+BLOCK_SIZE], "big"),
+                                           expandedKey ).to_bytes(BLOCK_SIZE, "big")
+        return bytes(out)
+    # end _ProcessBlocks
+# end class ECBEncryptor
+
+class ECBDecryptor(_BlockDecryptor):
+    """
+    Electronic Codebook mode decryption.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, key, padding = True, aes = None):
+        _BlockDecryptor.__init__(self, key, padding, aes)
+
+    def _ProcessBlocks(self, view):
+        expandedKey = self._expandedKey
+        if len(view) >= AES_translate.MIN_BLOCKS * BLOCK_SIZE:
+            return AES_translate.decryptBlocks(view, expandedKey)
+        decrypt = self._aes._DecryptInt
+        out = bytearray(len(view))
+        for i in range(0, len(view), BLOCK_SIZE):
+            out[i:i+BLOCK_SIZE] = decrypt( int.from_bytes(view[i:i+BLOCK_SIZE], "big"),
+                                           expandedKey ).to_bytes(BLOCK_SIZE, "big")
+        return bytes(out)
+    # end _ProcessBlocks
+# end class ECBDecryptor
+
+class CBCEncryptor(_BlockEncryptor):
+    """
+    Cipher Block Chaining mode encryption.  Each plain text block is XORed with
+    the previous cipher text block (or the IV) before it is encrypted.
+    """
+
+    __slots__ = ( "_previous", )
+
+    def __init__(self, key, iv, padding = True, aes = None):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param iv: The 16 byte initialization vector
+        @param padding: True to apply PKCS#7 padding
+        @param aes: Optional AES instance to use
+        """
+        assert( len(iv) == BLOCK_SIZE )
+        _BlockEncryptor.__init__(self, key, padding, aes)
+        self._previous = int.from_bytes(iv, "big")
+    # end __init__
+
+    def _ProcessBlocks(self, view):
+        encrypt = self._aes._EncryptInt
+        expandedKey = self._expandedKey
+        previous = self._previous
+        out = bytearray(len(view))
+        for i in range(0, len(view), BLOCK_SIZE):
+            previous = encrypt( int.from_bytes(view[i:i+BLOCK_SIZE], "big") ^ previous,
+                                expandedKey )
+            out[i:i+BLOCK_SIZE] = previous.to_bytes(BLOCK_SIZE, "big")
+        self._previous = previous
+        return bytes(out)
+    # end _ProcessBlocks
+# end class CBCEncryptor
+
+class CBCDecryptor(_BlockDecryptor):
+    """
+    Cipher Block Chaining mode decryption.
+    """
+
+    __slots__ = ( "_previous", )
+
+    def __init__(self, key, iv, padding = True, aes = None):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param iv: The 16 byte initialization vector
+        @param padding: True to remove PKCS#7 padding
+        @param aes: Optional AES instance to use
+        """
+        assert( len(iv) == BLOCK_SIZE )
+        _BlockDecryptor.__init__(self, key, padding, aes)
+        self._previous = int.from_bytes(iv, "big")
+    # end __init__
+
+    def _ProcessBlocks(self, view):
+        expandedKey = self._expandedKey
+        previous = self._previous
+
+        # Every block is decrypted independently and then XORed with the
+        # cipher text before it, so runs of many blocks are decrypted together
+        if len(view) >= AES_translate.MIN_BLOCKS * BLOCK_SIZE:
+            length = len(view)
+            chain = previous.to_bytes(BLOCK_SIZE, "big") + bytes(view[:length - BLOCK_SIZE])
+            self._previous = int.from_bytes(view[length - BLOCK_SIZE:], "big")
+            return (int.from_bytes(AES_translate.decryptBlocks(view, expandedKey), "big") ^
+                    int.from_bytes(chain, "big")).to_bytes(length, "big")
+        # end if
+
+        decrypt = self._aes._DecryptInt
+        out = bytearray(len(view))
+        for i in range(0, len(view), BLOCK_SIZE):
+            block = int.from_bytes(view[i:i+BLOCK_SIZE], "big")
+            out[i:i+BLOCK_SIZE] = (decrypt(block, expandedKey) ^ previous).to_bytes(BLOCK_SIZE, "big")
+            previous = block
+        self._previous = previous
+        return bytes(out)
+    # end _ProcessBlocks
+# end class CBCDecryptor
+
+class CTREncryptor():
+    """
+    Counter mode encryption.  The counter block is encrypted to produce a key
+    stream which is XORed with the message, so no padding is needed and
+    encryption and decryption are the same operation.  The whole 16 byte
+    counter block is incremented as a big endian integer for each block.
+    Unused key stream is carried over between calls to update.
+    """
+
+    __slots__ = ( "_aes", "_expandedKey", "_counter", "_keyStream", "_finalized" )
+
+    def __init__(self, key, counter, aes = None):
+        """
+        @param key:  The 16, 24 or 32 byte key
+        @param counter: The 16 byte initial counter block (nonce and counter)
+        @param aes: Optional AES instance to use
+        """
+        assert( len(counter) == BLOCK_SIZE )
+        self._aes = _GetCipher(key, aes)
+        self._expandedKey = self._aes._ExpandKey(key)
+        self._counter = int.from_bytes(counter, "big")
+        self._keyStream = b""
+        self._finalized = False
+    # end __init__
+
+    def update(self, data):
+        """
+        Processes the next chunk of the message
+
+        @param data:  Any bytes-like object of any length
+
+        @return: The output bytes, always the same length as data
+        """
+        assert( not self._finalized )
+        length = len(data)
+        if length == 0:
+            return b""
+
+        keyStream = self._keyStream
+        if len(keyStream) < length:
+            blocks = (length - len(keyStream) + BLOCK_SIZE - 1) // BLOCK_SIZE
+            keyStream += self._KeyStream(blocks)
+        # end if
+
+        self._keyStream = keyStream[length:]
+        return (int.from_bytes(data, "big") ^
+                int.from_bytes(keyStream[:length], "big")).to_bytes(length, "big")
+    # end update
+
+    def finalize(self):
+        """
+        Completes the message.  Counter mode has no buffered input so there is
+        never any remaining output.
+
+        @return: An empty bytes object
+        """
+        assert( not self._finalized )
+        self._finalized = True
+        self._keyStream = b""
+        return b""
+    # end finalize
+
+    def _KeyStream(self, blocks):
+        """
+        Generates the key stream for the given number of blocks and advances
+        the counter.
+
+        @param blocks:  The number of blocks of key stream to generate
+
+        @return: The key stream bytes
+        """
+        expandedKey = self._expandedKey
+        counter = self._counter
+        if blocks >= AES_translate.MIN_BLOCKS:
+            self._counter = (counter + blocks) & ((1 << 128) - 1)
+            counters = b"".join( ((counter + i) & ((1 << 128) - 1)).to_bytes(BLOCK_SIZE, "big")
+                                 for i in range(blocks) )
+            return AES_translate.encryptBlocks(counters, expandedKey)
+        # end if
+
+        encrypt = self._aes._EncryptInt
+        out = bytearray(blocks * BLOCK_SIZE)
+        for i in range(0, blocks * BLOCK_SIZE, BLOCK_SIZE):
+            out[i:i+BLOCK_SIZE] = encrypt(counter, expandedKey).to_bytes(BLOCK_SIZE, "big")
+            counter = (counter + 1) & ((1 << 128) - 1)
+        self._counter = counter
+        return bytes(out)
+    # end _KeyStream
+# end class CTREncryptor
+
+# Counter mode decryption is identical to encryption
+CTRDecryptor = CTREncryptor
+
+def _GetCipher( key, aes ):
+    """
+    Returns the AES instance to use with the given key, creating one for the
+    key length if none was supplied.
+
+    @param key:  The 16, 24 or 32 byte key
+    @param aes: An AES instance or None
+
+    @return: The AES instance
+    """
+    assert( len(key) in (16, 24, 32) )
+    if aes == None:
+        aes = AES(len(key) // 4)
+    assert( aes._Nk == len(key) // 4 )
+    return aes
+# end _GetCipher
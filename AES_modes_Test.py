@@ -0,0 +1,227 @@
+'''
+Test cases for the AES modes of operation.  The vectors are taken from
+NIST SP 800-38A Appendix F.
+'''
+import asyncio
+import concurrent.futures
+import io
+import os
+import socket
+import tempfile
+import unittest
+from Cryptography.AES_modes import ECBEncryptor, ECBDecryptor
+from Cryptography.AES_modes import CBCEncryptor, CBCDecryptor
+from Cryptography.AES_modes import CTREncryptor, CTRDecryptor
+from Cryptography.AES_modes import pkcs7Pad, pkcs7Unpad
+from Cryptography.AES_parallel import ParallelCTR
+from Cryptography.AES_gcm import GCMEncryptor
+from Cryptography import AES_stream
+from Cryptography import AES_async
+
+KEY = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+
+PLAIN_TEXT = bytes.fromhex(
+    "6bc1bee22e409f96e93d7e117393172a"
+    "ae2d8a571e03ac9c9eb76fac45af8e51"
+    "30c81c46a35ce411e5fbc1191a0a52ef"
+    "f69f2445df4f9b17ad2b417be66c3710")
+
+def runChunked( cipher, data, chunkSizes ):
+    """
+    Feeds the data through the cipher in chunks of the given sizes, cycling
+    through the sizes until all of the data has been processed.
+    """
+    out = b""
+    i = 0
+    n = 0
+    while i < len(data):
+        size = chunkSizes[n % len(chunkSizes)]
+        out += cipher.update(data[i:i+size])
+        i += size
+        n += 1
+    return out + cipher.finalize()
+
+class Test(unittest.TestCase):
+
+    def testECB(self):
+        expected = bytes.fromhex(
+            "3ad77bb40d7a3660a89ecaf32466ef97"
+            "f5d3d58503b9699de785895a96fdbaaf"
+            "43b1cd7f598ece23881b00e3ed030688"
+            "7b0c785e27e8ad3f8223207104725dd4")
+        cipherText = runChunked(ECBEncryptor(KEY, padding = False), PLAIN_TEXT, [7, 16, 1, 40])
+        self.assertEqual(cipherText, expected, "ECB - Encrypt")
+        plainText = runChunked(ECBDecryptor(KEY, padding = False), cipherText, [3, 29])
+        self.assertEqual(plainText, PLAIN_TEXT, "ECB - Decrypt")
+    # end testECB
+
+    def testCBC(self):
+        iv = bytes(range(16))
+        expected = bytes.fromhex(
+            "7649abac8119b246cee98e9b12e9197d"
+            "5086cb9b507219ee95db113a917678b2"
+            "73bed6b8e3c1743b7116e69e22229516"
+            "3ff1caa1681fac09120eca307586e1a7")
+        cipherText = runChunked(CBCEncryptor(KEY, iv, padding = False), PLAIN_TEXT, [5, 50])
+        self.assertEqual(cipherText, expected, "CBC - Encrypt")
+        plainText = runChunked(CBCDecryptor(KEY, iv, padding = False), cipherText, [16])
+        self.assertEqual(plainText, PLAIN_TEXT, "CBC - Decrypt")
+    # end testCBC
+
+    def testCTR(self):
+        counter = bytes.fromhex("f0f1f2f3f4f5f6f7f8f9fafbfcfdfeff")
+        expected = bytes.fromhex(
+            "874d6191b620e3261bef6864990db6ce"
+            "9806f66b7970fdff8617187bb9fffdff"
+            "5ae4df3edbd5d35e5b4f09020db03eab"
+            "1e031dda2fbe03d1792170a0f3009cee")
+        cipherText = runChunked(CTREncryptor(KEY, counter), PLAIN_TEXT, [1, 2, 3, 17])
+        self.assertEqual(cipherText, expected, "CTR - Encrypt")
+        plainText = runChunked(CTRDecryptor(KEY, counter), cipherText[:-5], [9])
+        self.assertEqual(plainText, PLAIN_TEXT[:-5], "CTR - Decrypt partial block")
+    # end testCTR
+
+    def testBulkBlocks(self):
+        # Runs of many blocks use AES_translate while single blocks use the
+        # T-table engine, so both must give the same output
+        iv = bytes(range(16))
+        data = bytes( (i * 11 + 5) & 0xff for i in range(16 * 100) )
+        ciphers = [ lambda: ECBEncryptor(KEY, padding = False),
+                    lambda: ECBDecryptor(KEY, padding = False),
+                    lambda: CBCEncryptor(KEY, iv, padding = False),
+                    lambda: CBCDecryptor(KEY, iv, padding = False),
+                    lambda: CTREncryptor(KEY, iv),
+                    lambda: GCMEncryptor(KEY, iv[:12]) ]
+        for makeCipher in ciphers:
+            bulk = makeCipher()
+            single = makeCipher()
+            expected = b"".join( single.update(data[i:i+16]) for i in range(0, len(data), 16) )
+            self.assertEqual(bulk.update(data[:800]) + bulk.update(data[800:]), expected)
+    # end testBulkBlocks
+
+    def testPadding(self):
+        iv = bytes(16)
+        for length in (0, 1, 15, 16, 17, 100):
+            message = bytes(range(length))
+            cipherText = runChunked(CBCEncryptor(KEY, iv), message, [7])
+            self.assertEqual(len(cipherText), (length // 16 + 1) * 16)
+            self.assertEqual(runChunked(CBCDecryptor(KEY, iv), cipherText, [16]), message)
+            self.assertEqual(runChunked(ECBDecryptor(KEY), 
+                                        runChunked(ECBEncryptor(KEY), message, [33]), 
+                                        [5]), message)
+        # end for length
+
+        self.assertEqual(pkcs7Unpad(pkcs7Pad(b"abc")), b"abc")
+        self.assertRaises(ValueError, pkcs7Unpad, b"abc" + b"\x01" * 12 + b"\x03")
+        self.assertRaises(ValueError, pkcs7Unpad, b"\x00" * 16)
+    # end testPadding
+
+    def testParallelCTR(self):
+        # Start near the top of the counter space so the shards wrap around
+        counter = b"\xff" * 15 + b"\xf0"
+        data = bytes(range(256)) * 10 + b"tail"
+        expected = runChunked(CTREncryptor(KEY, counter), data, [len(data)])
+        with ParallelCTR(processes = 2, shardSize = 100) as ctr:
+            cipherText = ctr.crypt(KEY, counter, data)
+            self.assertEqual(cipherText, expected, "Parallel CTR - Encrypt")
+            self.assertEqual(ctr.crypt(KEY, counter, bytearray(cipherText)), data)
+            self.assertEqual(ctr.crypt(KEY, counter, data[:20]), expected[:20])
+    # end testParallelCTR
+
+    def testStreamPipeline(self):
+        iv = bytes(range(16))
+        data = os.urandom(1000)
+        expected = runChunked(CBCEncryptor(KEY, iv), data, [len(data)])
+
+        sink = io.BytesIO()
+        written = AES_stream.cryptStream(io.BytesIO(data), sink, CBCEncryptor(KEY, iv),
+                                         chunkSize = 37)
+        self.assertEqual(sink.getvalue(), expected, "Stream - Encrypt")
+        self.assertEqual(written, len(expected))
+
+        with tempfile.TemporaryDirectory() as directory:
+            plainPath = os.path.join(directory, "plain")
+            cipherPath = os.path.join(directory, "cipher")
+            with open(plainPath, "wb") as f:
+                f.write(expected)
+            AES_stream.decryptFile(plainPath, cipherPath, CBCDecryptor(KEY, iv), chunkSize = 64)
+            with open(cipherPath, "rb") as f:
+                self.assertEqual(f.read(), data, "Stream - Decrypt File")
+        # end with tempfile.TemporaryDirectory()
+
+        # Sockets are read with recv_into and written with sendall
+        left, right = socket.socketpair()
+        with left, right:
+            counter = bytes(16)
+            AES_stream.writeChunks(AES_stream.cipherChunks([data[:500], data[500:]],
+                                                           CTREncryptor(KEY, counter)), left)
+            left.shutdown(socket.SHUT_WR)
+            sink = io.BytesIO()
+            AES_stream.cryptStream(right, sink, CTRDecryptor(KEY, counter), chunkSize = 100)
+            self.assertEqual(sink.getvalue(), data, "Stream - Socket")
+    # end testStreamPipeline
+    
+    def testAsyncStream(self):
+        iv = bytes(range(16))
+        data = os.urandom(5000)
+        enc = CBCEncryptor(KEY, iv)
+        expected = enc.update(data) + enc.finalize()
+        
+        class Sink():
+            def __init__(self):
+                self.chunks = []
+                self.drains = 0
+            def write(self, data):
+                self.chunks.append(bytes(data))
+            async def drain(self):
+                self.drains += 1
+        
+        async def run(cipher, data, batchSize, inlineSize):
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            sink = Sink()
+            written = await AES_async.cryptStreamAsync(reader, sink, cipher,
+                                                       batchSize = batchSize,
+                                                       inlineSize = inlineSize)
+            self.assertEqual(written, len(b"".join(sink.chunks)))
+            self.assertEqual(sink.drains, len(sink.chunks))
+            return b"".join(sink.chunks)
+        
+        for batchSize, inlineSize in ((100, 0), (4096, 1024), (64, 64)):
+            out = asyncio.run(run(CBCEncryptor(KEY, iv), data, batchSize, inlineSize))
+            self.assertEqual(out, expected, "Async - Encrypt")
+            out = asyncio.run(run(CBCDecryptor(KEY, iv), expected, batchSize, inlineSize))
+            self.assertEqual(out, data, "Async - Decrypt")
+
+        # Typical network reads are encrypted off the event loop by default
+        class Executor(concurrent.futures.ThreadPoolExecutor):
+            submitted = 0
+            def submit(self, *args, **kwargs):
+                Executor.submitted += 1
+                return super().submit(*args, **kwargs)
+
+        class Reader():
+            def __init__(self, chunks):
+                self.chunks = list(chunks)
+            async def read(self, n):
+                return self.chunks.pop(0) if self.chunks else b""
+
+        async def offload(chunks):
+            cipher = CTREncryptor(KEY, iv)
+            with Executor(max_workers = 1) as executor:
+                async for _ in AES_async.cipherChunksAsync(Reader(chunks), cipher,
+                                                           executor = executor):
+                    pass
+
+        for size in (512, 1460, 4096):
+            Executor.submitted = 0
+            asyncio.run(offload([ data[:size] ] * 3))
+            self.assertEqual(Executor.submitted, 3, "Async - Offload %d" % size)
+        Executor.submitted = 0
+        asyncio.run(offload([ data[:16] ] * 3))
+        self.assertEqual(Executor.submitted, 0, "Async - Inline")
+    # end testAsyncStream
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+# Name: AES_numpy.py
+# Purpose:  An optional NumPy engine that runs AES across many blocks at once.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: N blocks are held as an (N, 16) array of bytes and every step of a
+# round is applied to all of the blocks at once.  NumPy is only required when
+# this module is used.
+# >>> import AES_numpy
+# >>> engine = AES_numpy.NumpyAES(AES_cipher.AES_128)
+# >>> cipherText = engine.encrypt_blocks(plainText, key)
+# >>> keyStream = engine.ctr(key, counter, plainText)
+# >>> cipherText = engine.encrypt_blocks_multikey(plainText, keys)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from AES_cipher import AES
+import galos
+
+# The State is stored column by column, so byte r + 4c is row r of column c.
+# ShiftRows moves row r of column c + r into column c.
+_shiftRows = [ r + 4 * ((c + r) % 4) for c in range(4) for r in range(4) ]
+_invShiftRows = [ r + 4 * ((c - r) % 4) for c in range(4) for r in range(4) ]
+
+class NumpyAES():
+    """
+    AES over an (N, 16) uint8 array of blocks.  SubBytes is a fancy indexed
+    S-Box lookup, ShiftRows is a column permutation and MixColumns uses
+    256 entry GF(2^8) product tables built from galos.
+    """
+
+    def __init__(self, keyLength, keyCache = None):
+        """
+        @param keyLength:   A Key Length, AES_128, AES_192, AES_256
+        @param keyCache:    Optional KeyScheduleCache to hold expanded keys
+
+        @raise ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("NumpyAES requires NumPy to be installed")
+
+        self._aes = AES(keyLength, keyCache = keyCache)
+        self._Nr = self._aes._Nr
+
+        self._sbox = np.array(AES._sbox, dtype = np.uint8)
+        self._invsbox = np.array(AES._invsbox, dtype = np.uint8)
+        self._shiftRows = np.array(_shiftRows, dtype = np.intp)
+        self._invShiftRows = np.array(_invShiftRows, dtype = np.intp)
+        self._mul = {}
+        for constant in (0x02, 0x03, 0x09, 0x0b, 0x0d, 0x0e):
+            self._mul[constant] = np.frombuffer(galos.MUL[constant], dtype = np.uint8)
+    # end __init__
+
+    def encrypt_blocks(self, data, key):
+        """
+        Encrypts every block of the data independently (ECB)
+
+        @param data:  A bytes-like object whose length is a multiple of 16
+        @param key: The key to encrypt with
+
+        @return: The encrypted data as bytes
+        """
+        return self._Cipher(self._ToBlocks(data), self._RoundKeys(key)).tobytes()
+    # end encrypt_blocks
+
+    def decrypt_blocks(self, data, key):
+        """
+        Decrypts every block of the data independently (ECB)
+
+        @param data:  A bytes-like object whose length is a multiple of 16
+        @param key: The key to decrypt with
+
+        @return: The decrypted data as bytes
+        """
+        return self._InvCipher(self._ToBlocks(data), self._RoundKeys(key)).tobytes()
+    # end decrypt_blocks
+
+    def ctr(self, key, counter, data):
+        """
+        Encrypts or decrypts the data in counter mode.  The result is identical
+        to AES_modes.CTREncryptor.
+
+        @param key:  The key to use
+        @param counter: The 16 byte initial counter block
+        @param data: Any bytes-like object
+
+        @return: The processed data as bytes
+        """
+        assert( len(counter) == 16 )
+        message = np.frombuffer(data, dtype = np.uint8)
+        if len(message) == 0:
+            return b""
+        n = (len(message) + 15) // 16
+
+        # Build the counter blocks as two 64-bit halves, carrying from the low
+        # half into the high half when it wraps around.
+        start = int.from_bytes(counter, "big")
+        startLow = np.uint64(start & 0xffffffffffffffff)
+        low = startLow + np.arange(n, dtype = np.uint64)
+        high = np.uint64(start >> 64) + (low < startLow).astype(np.uint64)
+        blocks = np.stack([high, low], axis = 1).astype(">u8").view(np.uint8).reshape(n, 16)
+
+        keyStream = self._Cipher(blocks, self._RoundKeys(key)).reshape(-1)
+        return (message ^ keyStream[:len(message)]).tobytes()
+    # end ctr
+
+    def encrypt_blocks_multikey(self, data, keys):
+        """
+        Encrypts every block of the data with its own key.  Each distinct key
+        is only expanded once and all of the keys are expanded together.
+
+        @param data:  A bytes-like object of N blocks
+        @param keys: A sequence of N keys, one for each block
+
+        @return: The encrypted data as bytes
+        """
+        return self._Cipher(self._ToBlocks(data), self._BlockRoundKeys(keys)).tobytes()
+    # end encrypt_blocks_multikey
+
+    def decrypt_blocks_multikey(self, data, keys):
+        """
+        Decrypts every block of the data with its own key
+
+        @param data:  A bytes-like object of N blocks
+        @param keys: A sequence of N keys, one for each block
+
+        @return: The decrypted data as bytes
+        """
+        return self._InvCipher(self._ToBlocks(data), self._BlockRoundKeys(keys)).tobytes()
+    # end decrypt_blocks_multikey
+
+    def expandKeys(self, keys):
+        """
+        Runs the Key Expansion of many keys at once.  Each step of the key
+        schedule is applied to every key together.
+
+        @param keys:  A sequence of K keys of this key length
+
+        @return: The key schedules as a (K, Nr + 1, 16) array of round keys
+        """
+        nk = self._aes._Nk
+        rcon = self._aes._rcon
+        count = len(keys)
+        material = np.frombuffer(b"".join(bytes(key) for key in keys), dtype = np.uint8)
+        assert( len(material) == count * 4 * nk )
+
+        # The schedule as (K, words, 4) bytes
+        w = np.empty( (count, 4 * (self._Nr + 1), 4), dtype = np.uint8 )
+        w[:, :nk] = material.reshape(count, nk, 4)
+        for i in range(nk, 4 * (self._Nr + 1)):
+            temp = w[:, i - 1]
+            if i % nk == 0:
+                temp = self._sbox[temp[:, [1, 2, 3, 0]]]
+                temp[:, 0] ^= rcon[i // nk] >> 24
+            elif nk > 6 and i % nk == 4:
+                temp = self._sbox[temp]
+            # end if
+            w[:, i] = w[:, i - nk] ^ temp
+        # end for i
+        return w.reshape(count, self._Nr + 1, 16)
+    # end expandKeys
+
+    def _BlockRoundKeys(self, keys):
+        """
+        @return: The round keys of each block as an (Nr + 1, N, 16) array, so
+                 round r of every block is roundKeys[r]
+        """
+        index = {}
+        positions = [ index.setdefault(bytes(key), len(index)) for key in keys ]
+        schedules = self.expandKeys(list(index))
+        return schedules[np.array(positions, dtype = np.intp)].transpose(1, 0, 2)
+    # end _BlockRoundKeys
+
+    def _ToBlocks(self, data):
+        """
+        Copies the data into an (N, 16) array of blocks
+        """
+        blocks = np.frombuffer(data, dtype = np.uint8)
+        assert( len(blocks) % 16 == 0 )
+        return blocks.reshape(-1, 16).copy()
+    # end _ToBlocks
+
+    def _RoundKeys(self, key):
+        """
+        @return: The key schedule as an (Nr + 1, 16) array of round keys
+        """
+        flatKey = self._aes._ExpandKey(key).flatKey
+        return np.frombuffer(flatKey, dtype = np.uint8).reshape(self._Nr + 1, 16)
+    # end _RoundKeys
+
+    def _MixColumns(self, state, constants):
+        """
+        Applies MixColumns to every column of every block.  With the columns
+        as rows of the (N, 4, 4) view, output row r is
+        c0.S[r] ^ c1.S[r+1] ^ c2.S[r+2] ^ c3.S[r+3].
+
+        @param state:  The (N, 16) state
+        @param constants: The four column constants, e.g. (2, 3, 1, 1)
+
+        @return: The new (N, 16) state
+        """
+        columns = state.reshape(-1, 4, 4)
+        result = None
+        for shift, constant in enumerate(constants):
+            term = columns if constant == 1 else self._mul[constant][columns]
+            if shift:
+                term = np.roll(term, -shift, axis = 2)
+            result = term if result is None else result ^ term
+        # end for shift, constant
+        return result.reshape(-1, 16)
+    # end _MixColumns
+
+    def _Cipher(self, state, roundKeys):
+        """
+        Encrypts an (N, 16) array of blocks.  roundKeys[r] is either one round
+        key for every block or an (N, 16) array of a round key per block.
+        """
+        state ^= roundKeys[0]
+        for r in range(1, self._Nr):
+            state = self._sbox[state][:, self._shiftRows]
+            state = self._MixColumns(state, (0x02, 0x03, 0x01, 0x01))
+            state ^= roundKeys[r]
+        # end for r in range(1, self._Nr)
+        state = self._sbox[state][:, self._shiftRows]
+        state ^= roundKeys[self._Nr]
+        return state
+    # end _Cipher
+
+    def _InvCipher(self, state, roundKeys):
+        """
+        Decrypts an (N, 16) array of blocks, with round keys as in _Cipher
+        """
+        state ^= roundKeys[self._Nr]
+        for r in reversed(range(1, self._Nr)):
+            state = self._invsbox[state[:, self._invShiftRows]]
+            state ^= roundKeys[r]
+            state = self._MixColumns(state, (0x0e, 0x0b, 0x0d, 0x09))
+        # end for r in reversed(range(1, self._Nr))
+        state = self._invsbox[state[:, self._invShiftRows]]
+        state ^= roundKeys[0]
+        return state
+    # end _InvCipher
+# end class NumpyAES
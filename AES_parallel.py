@@ -0,0 +1,139 @@
+# Name: AES_parallel.py
+# Purpose:  Counter mode encryption of large buffers spread across a pool of
+#           worker processes.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: Counter mode key stream blocks are independent of each other, so a
+# large buffer is split into shards that start on a block boundary and each
+# shard is encrypted by a worker process starting from its own counter value.
+# The output is byte for byte identical to AES_modes.CTREncryptor.
+# >>> import AES_parallel
+# >>> with AES_parallel.ParallelCTR(processes = 8) as ctr:
+# ...     cipherText = ctr.crypt(key, counter, plainText)
+# ...     plainText = ctr.crypt(key, counter, cipherText)
+
+from multiprocessing import Pool, cpu_count
+from AES_cipher import AES
+from AES_modes import CTREncryptor, BLOCK_SIZE
+
+# The AES instances owned by a worker process, one per key length.  Each
+# process also has its own key schedule cache so a hot key is only expanded
+# once per worker.
+_workerCiphers = {}
+
+def _CryptShard( args ):
+    """
+    Encrypts (or decrypts) a single shard in a worker process.
+
+    @param args:  A tuple of (key, counter, data) where counter is the counter
+                  block for the first block of the shard as an integer
+
+    @return: The processed shard
+    """
+    key, counter, data = args
+    aes = _workerCiphers.get(len(key))
+    if aes == None:
+        aes = AES(len(key) // 4)
+        _workerCiphers[len(key)] = aes
+    # end if
+
+    ctr = CTREncryptor(key, counter.to_bytes(BLOCK_SIZE, "big"), aes = aes)
+    return ctr.update(data)
+# end _CryptShard
+
+class ParallelCTR():
+    """
+    A persistent pool of worker processes used to run counter mode over large
+    buffers.  The pool is created once and reused for every call to crypt, so
+    the cost of starting the workers is only paid once.
+    """
+
+    def __init__(self, processes = None, shardSize = 1 << 20):
+        """
+        @param processes:  The number of worker processes.  Defaults to the
+                           number of CPUs.
+        @param shardSize: The number of bytes given to a worker at a time.
+                          This is rounded down to a whole number of blocks.
+        """
+        if processes == None:
+            processes = cpu_count()
+        assert( processes > 0 )
+        assert( shardSize >= BLOCK_SIZE )
+        self._processes = processes
+        self._shardSize = shardSize - (shardSize % BLOCK_SIZE)
+        self._pool = Pool(processes)
+    # end __init__
+
+    def crypt(self, key, counter, data):
+        """
+        Encrypts or decrypts the data in counter mode.  Inputs of a single
+        shard or less are processed in the calling process.
+
+        @param key:  The 16, 24 or 32 byte key
+        @param counter: The 16 byte initial counter block
+        @param data: Any bytes-like object
+
+        @return: The processed data as bytes
+        """
+        assert( self._pool != None )
+        assert( len(key) in (16, 24, 32) )
+        assert( len(counter) == BLOCK_SIZE )
+        key = bytes(key)
+        start = int.from_bytes(counter, "big")
+        view = memoryview(data).cast("B")
+        shardSize = self._shardSize
+
+        if len(view) <= shardSize:
+            return _CryptShard( (key, start, view) )
+
+        # Every shard starts on a block boundary so its first counter value is
+        # simply the initial counter plus the number of preceding blocks.
+        shards = ( (key, (start + offset // BLOCK_SIZE) & ((1 << 128) - 1),
+                    bytes(view[offset:offset+shardSize]))
+                   for offset in range(0, len(view), shardSize) )
+        return b"".join( self._pool.imap(_CryptShard, shards) )
+    # end crypt
+
+    # Counter mode encryption and decryption are the same operation
+    encrypt = crypt
+    decrypt = crypt
+
+    def close(self):
+        """
+        Shuts down the worker processes
+        """
+        if self._pool != None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    # end close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+# end class ParallelCTR
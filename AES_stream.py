@@ -0,0 +1,174 @@
+# Name: AES_stream.py
+# Purpose:  A generator based pipeline for encrypting and decrypting files and
+#           sockets that are too large to hold in memory.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: The pipeline is made of three generator stages, a reader, a cipher
+# stage and a writer.  Any object with update() and finalize() methods, such
+# as the encryptors and decryptors in AES_modes, can be used as the cipher.
+# Only one read buffer and the output of a single chunk are held in memory at
+# any time.
+# >>> import AES_modes, AES_stream
+# >>> cipher = AES_modes.CTREncryptor(key, counter)
+# >>> AES_stream.encryptFile("in.bin", "out.bin", cipher)
+#
+# The stages may also be connected by hand, e.g. to add a compression stage:
+# >>> chunks = AES_stream.readChunks(sock, chunkSize = 1 << 16)
+# >>> AES_stream.writeChunks(AES_stream.cipherChunks(chunks, cipher), outFile)
+
+# The default number of bytes read at a time
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+def readChunks( source, chunkSize = DEFAULT_CHUNK_SIZE ):
+    """
+    The reader stage.  Reads the source a chunk at a time into a single
+    reusable buffer using readinto() for files or recv_into() for sockets.
+    Objects with neither are read with read().
+
+    Each chunk is a memoryview of the shared buffer and is only valid until
+    the next chunk is requested.  Copy it with bytes() if it must be kept.
+
+    @param source:  A binary file like object or a socket
+    @param chunkSize: The size of the read buffer
+
+    @return: A generator of the chunks read
+    """
+    assert( chunkSize > 0 )
+    if hasattr(source, "readinto"):
+        readInto = source.readinto
+    elif hasattr(source, "recv_into"):
+        readInto = source.recv_into
+    else:
+        readInto = None
+    # end if
+
+    if readInto == None:
+        while True:
+            chunk = source.read(chunkSize)
+            if not chunk:
+                return
+            yield chunk
+        # end while True
+    # end if
+
+    buffer = bytearray(chunkSize)
+    view = memoryview(buffer)
+    while True:
+        count = readInto(view)
+        if not count:
+            return
+        yield view[:count]
+    # end while True
+# end readChunks
+
+def cipherChunks( chunks, cipher ):
+    """
+    The cipher stage.  Passes every chunk through the cipher and finalizes it
+    once the input is exhausted.  Empty outputs are not passed on.
+
+    @param chunks:  An iterable of bytes-like chunks
+    @param cipher: An object with update() and finalize() methods
+
+    @return: A generator of the output chunks
+    """
+    for chunk in chunks:
+        out = cipher.update(chunk)
+        if out:
+            yield out
+    # end for chunk in chunks
+
+    out = cipher.finalize()
+    if out:
+        yield out
+# end cipherChunks
+
+def writeChunks( chunks, sink ):
+    """
+    The writer stage.  Writes every chunk to the sink, using sendall() for
+    sockets and write() otherwise.
+
+    @param chunks:  An iterable of bytes-like chunks
+    @param sink: A binary file like object or a socket
+
+    @return: The number of bytes written
+    """
+    if hasattr(sink, "sendall"):
+        write = sink.sendall
+    else:
+        write = sink.write
+    # end if
+
+    total = 0
+    for chunk in chunks:
+        write(chunk)
+        total += len(chunk)
+    return total
+# end writeChunks
+
+def cryptStream( source, sink, cipher, chunkSize = DEFAULT_CHUNK_SIZE ):
+    """
+    Runs the full pipeline from the source to the sink.  Whether this
+    encrypts or decrypts depends on the cipher given.
+
+    @param source:  A binary file like object or a socket to read from
+    @param sink: A binary file like object or a socket to write to
+    @param cipher: An object with update() and finalize() methods
+    @param chunkSize: The number of bytes read at a time
+
+    @return: The number of bytes written
+    """
+    return writeChunks( cipherChunks( readChunks(source, chunkSize), cipher ), sink )
+# end cryptStream
+
+def encryptFile( inPath, outPath, cipher, chunkSize = DEFAULT_CHUNK_SIZE ):
+    """
+    Encrypts the file at inPath into outPath
+
+    @param inPath:  The path of the plain text file
+    @param outPath: The path to write the cipher text to
+    @param cipher: An encryptor, e.g. AES_modes.CBCEncryptor
+    @param chunkSize: The number of bytes read at a time
+
+    @return: The number of bytes written
+    """
+    with open(inPath, "rb") as source, open(outPath, "wb") as sink:
+        return cryptStream(source, sink, cipher, chunkSize)
+# end encryptFile
+
+def decryptFile( inPath, outPath, cipher, chunkSize = DEFAULT_CHUNK_SIZE ):
+    """
+    Decrypts the file at inPath into outPath
+
+    @param inPath:  The path of the cipher text file
+    @param outPath: The path to write the plain text to
+    @param cipher: A decryptor, e.g. AES_modes.CBCDecryptor
+    @param chunkSize: The number of bytes read at a time
+
+    @return: The number of bytes written
+    """
+    with open(inPath, "rb") as source, open(outPath, "wb") as sink:
+        return cryptStream(source, sink, cipher, chunkSize)
+# end decryptFile
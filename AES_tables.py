@@ -0,0 +1,105 @@
+# Name: AES_tables.py
+# Purpose:  Writes the constant AES and GF(2^8) tables out as a Python module
+#           so they can be loaded instead of built.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: By default galos and AES build their tables the first time they
+# are used.  For short lived processes the tables can instead be written once
+# to AES_tables_frozen.py next to this file.  galos and AES_cipher load that
+# module when it exists, so importing them and creating ciphers does no table
+# work at all.
+#   python AES_tables.py
+# The frozen module only holds constants, so it never needs to be rebuilt,
+# and deleting it returns to building the tables.
+
+import os
+import sys
+
+# The name of the module the tables are written to
+FROZEN_MODULE = "AES_tables_frozen"
+
+def generateTables():
+    """
+    Builds every table from scratch, ignoring any frozen module
+
+    @return: A tuple of the galos tables (MUL, INV, SBOX, INV_SBOX) and a
+             dictionary of the AES class tables by attribute name
+    """
+    import galos
+    import AES_cipher
+    return galos._BuildTables(), AES_cipher._BuildTables()
+# end generateTables
+
+def _Format( value, indent = "    " ):
+    """
+    Formats a table as Python source
+    """
+    if isinstance(value, bytes):
+        return repr(value)
+    if isinstance(value, list) and value and isinstance(value[0], bytes):
+        rows = [ indent + repr(row) + "," for row in value ]
+        return "[\n" + "\n".join(rows) + "\n" + indent[:-4] + "]"
+    # A list of integers, eight to a line
+    lines = []
+    for i in range(0, len(value), 8):
+        lines.append( indent + ", ".join("0x%x" % v for v in value[i:i+8]) + "," )
+    return "[\n" + "\n".join(lines) + "\n" + indent[:-4] + "]"
+# end _Format
+
+def freeze( path = None ):
+    """
+    Writes the tables to a Python module
+
+    @param path:  The file to write, AES_tables_frozen.py next to this file if
+                  not given
+
+    @return: The path written
+    """
+    if path == None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), FROZEN_MODULE + ".py")
+    (mul, inv, sbox, invSbox), aesTables = generateTables()
+
+    parts = [ "# Generated by AES_tables.py, do not edit.  Delete this file to build the\n"
+              "# tables at run time instead.\n\n" ]
+    parts.append( "MUL = %s\n\n" % _Format(mul) )
+    parts.append( "INV = %s\n\n" % _Format(inv) )
+    parts.append( "SBOX = %s\n\n" % _Format(sbox) )
+    parts.append( "INV_SBOX = %s\n\n" % _Format(invSbox) )
+    parts.append( "AES_TABLES = {\n" )
+    for name in sorted(aesTables):
+        parts.append( "    %r: %s,\n" % (name, _Format(aesTables[name], " " * 8)) )
+    parts.append( "}\n" )
+
+    # Written to a temporary file first so a reader never sees half a module
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        f.write("".join(parts))
+    os.replace(temporary, path)
+    return path
+# end freeze
+
+if __name__ == "__main__":
+    print("Wrote %s" % freeze(sys.argv[1] if len(sys.argv) > 1 else None))
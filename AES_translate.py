@@ -0,0 +1,253 @@
+# Name: AES_translate.py
+# Purpose:  A pure Python engine that runs AES across a whole buffer of blocks
+#           with bytes.translate, slicing and large integer XORs.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: The States of a batch of blocks are kept back to back in a single
+# buffer and every step of a round is applied to the whole buffer at once:
+#   - SubBytes is one bytes.translate with the 256 byte S-Box table.
+#   - ShiftRows is a permutation of the bytes of every block, done with one
+#     strided slice assignment for each of the 16 positions.
+#   - MixColumns translates the permuted buffers with the {02} and {03}
+#     product tables and adds them as large integers.
+#   - AddRoundKey is a large integer XOR with the round key repeated across
+#     the batch.
+# Only the standard library is needed.
+# >>> import AES_translate
+# >>> engine = AES_translate.TranslateAES(AES_cipher.AES_128)
+# >>> cipherText = engine.encrypt_blocks(plainText, key)
+
+from AES_cipher import AES, SBOX_TABLE, INV_SBOX_TABLE
+import galos
+
+# The State is stored column by column, so byte r + 4c is row r of column c.
+# _rotate[k] reads row r + k of the same column, and _shiftRotate[k] does the
+# same after ShiftRows, which moves row r of column c + r into column c.
+_rotate = [ [ (r + k) % 4 + 4 * c for c in range(4) for r in range(4) ] for k in range(4) ]
+_shiftRows = [ r + 4 * ((c + r) % 4) for c in range(4) for r in range(4) ]
+_invShiftRows = [ r + 4 * ((c - r) % 4) for c in range(4) for r in range(4) ]
+_shiftRotate = [ [ _shiftRows[i] for i in order ] for order in _rotate ]
+
+def _Permute( data, order ):
+    """
+    Moves the bytes of every block of the buffer, output byte p of each block
+    is byte order[p] of the same block
+
+    @param data:  A bytes-like buffer of whole blocks
+    @param order: The 16 source positions
+
+    @return: The permuted buffer as a bytearray
+    """
+    out = bytearray(len(data))
+    for p, q in enumerate(order):
+        out[p::16] = data[q::16]
+    return out
+# end _Permute
+
+# The number of blocks processed in one pass by default
+DEFAULT_BATCH_SIZE = 4096
+
+# Below this number of blocks the T-table engine of AES_cipher is faster
+MIN_BLOCKS = 32
+
+def encryptBlocks( data, expandedKey, batchSize = DEFAULT_BATCH_SIZE ):
+    """
+    Encrypts every block of the data independently (ECB).  This is used by
+    AES_modes for runs of many blocks.
+
+    @param data:  A bytes-like object whose length is a multiple of 16
+    @param expandedKey: The AES_cipher.ExpandedKey of the key
+    @param batchSize: The number of blocks processed in one pass
+
+    @return: The encrypted data as bytes
+    """
+    return _Process(data, expandedKey, _Cipher, batchSize)
+# end encryptBlocks
+
+def decryptBlocks( data, expandedKey, batchSize = DEFAULT_BATCH_SIZE ):
+    """
+    Decrypts every block of the data independently (ECB)
+
+    @param data:  A bytes-like object whose length is a multiple of 16
+    @param expandedKey: The AES_cipher.ExpandedKey of the key
+    @param batchSize: The number of blocks processed in one pass
+
+    @return: The decrypted data as bytes
+    """
+    return _Process(data, expandedKey, _InvCipher, batchSize)
+# end decryptBlocks
+
+def _Process( data, expandedKey, function, batchSize ):
+    """
+    Runs the cipher function over the data one batch at a time
+    """
+    assert( batchSize > 0 )
+    view = memoryview(data).cast("B")
+    assert( len(view) % 16 == 0 )
+    flatKey = expandedKey.flatKey
+    roundKeys = [ flatKey[i:i+16] for i in range(0, len(flatKey), 16) ]
+    step = batchSize * 16
+    if len(view) <= step:
+        return function(bytes(view), roundKeys)
+    out = bytearray()
+    for offset in range(0, len(view), step):
+        out += function(bytes(view[offset:offset+step]), roundKeys)
+    return bytes(out)
+# end _Process
+
+def _Cipher( batch, roundKeys ):
+    """
+    Encrypts a buffer of whole blocks
+
+    @param batch:  The blocks as bytes
+    @param roundKeys: The Nr + 1 round keys as 16 byte strings
+
+    @return: The encrypted blocks as bytes
+    """
+    n = len(batch) // 16
+    length = len(batch)
+    nr = len(roundKeys) - 1
+    m2 = galos.MUL[0x02]
+    m3 = galos.MUL[0x03]
+
+    state = (int.from_bytes(batch, "big") ^
+             int.from_bytes(roundKeys[0] * n, "big")).to_bytes(length, "big")
+    for r in range(1, nr):
+        # SubBytes moves no bytes so it is applied before ShiftRows and the
+        # MixColumns rotations, which are then a single permutation each
+        s = state.translate(SBOX_TABLE)
+        mixed = int.from_bytes(_Permute(s, _shiftRotate[0]).translate(m2), "big") ^ \
+                int.from_bytes(_Permute(s, _shiftRotate[1]).translate(m3), "big") ^ \
+                int.from_bytes(_Permute(s, _shiftRotate[2]), "big") ^ \
+                int.from_bytes(_Permute(s, _shiftRotate[3]), "big") ^ \
+                int.from_bytes(roundKeys[r] * n, "big")
+        state = mixed.to_bytes(length, "big")
+    # end for r in range(1, nr)
+
+    s = _Permute(state.translate(SBOX_TABLE), _shiftRows)
+    return (int.from_bytes(s, "big") ^
+            int.from_bytes(roundKeys[nr] * n, "big")).to_bytes(length, "big")
+# end _Cipher
+
+def _InvCipher( batch, roundKeys ):
+    """
+    Decrypts a buffer of whole blocks
+
+    @param batch:  The blocks as bytes
+    @param roundKeys: The Nr + 1 round keys as 16 byte strings
+
+    @return: The decrypted blocks as bytes
+    """
+    n = len(batch) // 16
+    length = len(batch)
+    nr = len(roundKeys) - 1
+    m9 = galos.MUL[0x09]
+    mb = galos.MUL[0x0b]
+    md = galos.MUL[0x0d]
+    me = galos.MUL[0x0e]
+
+    state = (int.from_bytes(batch, "big") ^
+             int.from_bytes(roundKeys[nr] * n, "big")).to_bytes(length, "big")
+    for r in reversed(range(1, nr)):
+        s = _Permute(state, _invShiftRows).translate(INV_SBOX_TABLE)
+        s = (int.from_bytes(s, "big") ^
+             int.from_bytes(roundKeys[r] * n, "big")).to_bytes(length, "big")
+        mixed = int.from_bytes(s.translate(me), "big") ^ \
+                int.from_bytes(_Permute(s, _rotate[1]).translate(mb), "big") ^ \
+                int.from_bytes(_Permute(s, _rotate[2]).translate(md), "big") ^ \
+                int.from_bytes(_Permute(s, _rotate[3]).translate(m9), "big")
+        state = mixed.to_bytes(length, "big")
+    # end for r in reversed(range(1, nr))
+
+    s = _Permute(state, _invShiftRows).translate(INV_SBOX_TABLE)
+    return (int.from_bytes(s, "big") ^
+            int.from_bytes(roundKeys[0] * n, "big")).to_bytes(length, "big")
+# end _InvCipher
+
+class TranslateAES():
+    """
+    AES over batches of blocks held in a single buffer
+    """
+
+    def __init__(self, keyLength, keyCache = None, batchSize = DEFAULT_BATCH_SIZE):
+        """
+        @param keyLength:   A Key Length, AES_128, AES_192, AES_256
+        @param keyCache:    Optional KeyScheduleCache to hold expanded keys
+        @param batchSize:   The number of blocks processed in one pass
+        """
+        assert( batchSize > 0 )
+        self._aes = AES(keyLength, keyCache = keyCache)
+        self._Nr = self._aes._Nr
+        self._batchSize = batchSize
+    # end __init__
+
+    def encrypt_blocks(self, data, key):
+        """
+        Encrypts every block of the data independently (ECB)
+
+        @param data:  A bytes-like object whose length is a multiple of 16
+        @param key: The key to encrypt with
+
+        @return: The encrypted data as bytes
+        """
+        return encryptBlocks(data, self._aes._ExpandKey(key), self._batchSize)
+    # end encrypt_blocks
+
+    def decrypt_blocks(self, data, key):
+        """
+        Decrypts every block of the data independently (ECB)
+
+        @param data:  A bytes-like object whose length is a multiple of 16
+        @param key: The key to decrypt with
+
+        @return: The decrypted data as bytes
+        """
+        return decryptBlocks(data, self._aes._ExpandKey(key), self._batchSize)
+    # end decrypt_blocks
+
+    def ctr(self, key, counter, data):
+        """
+        Encrypts or decrypts the data in counter mode.  The result is identical
+        to AES_modes.CTREncryptor.
+
+        @param key:  The key to use
+        @param counter: The 16 byte initial counter block
+        @param data: Any bytes-like object
+
+        @return: The processed data as bytes
+        """
+        assert( len(counter) == 16 )
+        length = len(data)
+        if length == 0:
+            return b""
+        start = int.from_bytes(counter, "big")
+        blocks = b"".join( ((start + i) & ((1 << 128) - 1)).to_bytes(16, "big")
+                           for i in range((length + 15) // 16) )
+        keyStream = self.encrypt_blocks(blocks, key)
+        return (int.from_bytes(data, "big") ^
+                int.from_bytes(keyStream[:length], "big")).to_bytes(length, "big")
+    # end ctr
+# end class TranslateAES
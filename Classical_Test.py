@@ -0,0 +1,166 @@
+'''
+Test cases for the shift and vigenere ciphers
+'''
+import random
+import re
+import unittest
+from Cryptography import galos
+from Cryptography.shift_cipher import shift
+from Cryptography.vigenere_cipher import vigenere
+from Cryptography import AES_stream
+from Cryptography import shift_cryptanalysis
+
+MESSAGE = "Attack at dawn!  Meet me by the old oak tree, bring 3 maps.\n" * 5
+
+KEY = [11, 4, 12, 14, 13]
+
+# Characters for random messages, including some outside of ASCII that
+# upper case to letters
+CHARACTERS = "abcxyzABCXYZ .,!0123\n\u00df\u0131\u017f\u00e9\u4e2d"
+
+def _Chunks( data, size ):
+    return [ data[i:i+size] for i in range(0, len(data), size) ]
+
+def _ShiftCharacters( text, keys, sign ):
+    """
+    The original character at a time implementation of both ciphers, every
+    character c is shifted by keys[i % len(keys)]
+    """
+    return "".join( chr((ord(c) - 65 + sign * keys[i % len(keys)]) % 26 + 65)
+                    for i, c in enumerate(text) )
+
+def _EncryptReference( message, keys ):
+    return _ShiftCharacters( re.sub(r'[^A-Z]', '', message.upper()), keys, 1 )
+
+def _DecryptReference( cipherText, keys ):
+    return _ShiftCharacters( cipherText, keys, -1 )
+
+def _RandomText( rng, length ):
+    return "".join( rng.choice(CHARACTERS) for _ in range(length) )
+
+class Test(unittest.TestCase):
+
+    def testShift(self):
+        cipher = shift(3)
+        self.assertEqual(cipher.encrypt_message("Hello, World"), "KHOORZRUOG")
+        self.assertEqual(cipher.decrypt_message("KHOORZRUOG"), "HELLOWORLD")
+        self.assertEqual(cipher.encrypt_message(b"xyz abc"), b"ABCDEF")
+        self.assertEqual(cipher.decrypt_message(bytearray(b"ABCDEF")), b"XYZABC")
+        # Upper casing may turn characters outside of ASCII into letters
+        self.assertEqual(cipher.encrypt_message("straße é"), "VWUDVVH")
+        for key in range(26):
+            cipher = shift(key)
+            text = cipher.encrypt_message(MESSAGE)
+            self.assertEqual(len(text), len([ c for c in MESSAGE if c.isalpha() ]))
+            self.assertEqual(cipher.decrypt_message(text),
+                             "".join( c for c in MESSAGE.upper() if c.isalpha() ))
+
+        # Every character is decrypted as a letter, as it always has been
+        self.assertEqual(shift(3).decrypt_message("Hello world"), "EHOORQZRUOG")
+        self.assertEqual(shift(3).decrypt_message(b"Hello world"), b"EHOORQZRUOG")
+
+        rng = random.Random(22)
+        for _ in range(200):
+            key = rng.randrange(26)
+            message = _RandomText(rng, rng.randrange(40))
+            cipher = shift(key)
+            self.assertEqual(cipher.encrypt_message(message), _EncryptReference(message, [key]))
+            self.assertEqual(cipher.decrypt_message(message), _DecryptReference(message, [key]))
+            if message.isascii():
+                self.assertEqual(cipher.encrypt_message(message.encode("ascii")),
+                                 _EncryptReference(message, [key]).encode("ascii"))
+                self.assertEqual(cipher.decrypt_message(message.encode("ascii")),
+                                 _DecryptReference(message, [key]).encode("ascii"))
+        # end for _ in range(200)
+    # end testShift
+
+    def testVigenere(self):
+        # The classic example with the key LEMON
+        cipher = vigenere(KEY)
+        self.assertEqual(cipher.encrypt_message("attack at dawn"), "LXFOPVEFRNHR")
+        self.assertEqual(cipher.decrypt_message("LXFOPVEFRNHR"), "ATTACKATDAWN")
+        self.assertEqual(cipher.encrypt_message(b"attack at dawn"), b"LXFOPVEFRNHR")
+        self.assertEqual(cipher.encrypt_message("ckatdawn", phase = 4), "PVEFRNHR")
+        self.assertEqual(cipher.decrypt_message("PVEFRNHR", phase = 4), "CKATDAWN")
+
+        # The NumPy path for long keys and texts must agree with the slices
+        key = [ (i * 7) % 26 for i in range(300) ]
+        text = ("ABCDEFGHIJKLMNOPQRSTUVWXYZ" * 3000).encode("ascii")
+        cipher = vigenere(key)
+        expected = bytes( (c - 65 + key[i % len(key)]) % 26 + 65 for i, c in enumerate(text) )
+        numpy = galos._NumPy()
+        try:
+            for galos.np in set([numpy, None]):
+                self.assertEqual(cipher.encrypt_message(text), expected)
+                self.assertEqual(cipher.decrypt_message(expected), text)
+        finally:
+            galos.np = numpy
+
+        rng = random.Random(23)
+        for _ in range(200):
+            key = [ rng.randrange(26) for _ in range(rng.randrange(1, 8)) ]
+            message = _RandomText(rng, rng.randrange(40))
+            cipher = vigenere(key)
+            self.assertEqual(cipher.encrypt_message(message), _EncryptReference(message, key))
+            self.assertEqual(cipher.decrypt_message(message), _DecryptReference(message, key))
+            if message.isascii():
+                self.assertEqual(cipher.decrypt_message(message.encode("ascii")),
+                                 _DecryptReference(message, key).encode("ascii"))
+        # end for _ in range(200)
+
+        # An empty key works for empty messages only
+        cipher = vigenere([])
+        self.assertEqual(cipher.encrypt_message(""), "")
+        self.assertEqual(cipher.encrypt_message(" !"), "")
+        self.assertEqual(cipher.decrypt_message(b""), b"")
+        self.assertEqual(cipher.decrypt_message("\u00e9"[:0]), "")
+        self.assertEqual(list(cipher.encryptor().crypt_chunks(["", "1 2"])), [])
+        self.assertRaises(ZeroDivisionError, cipher.encrypt_message, "abc")
+    # end testVigenere
+
+    def testStreams(self):
+        for cipher in (shift(7), vigenere(KEY)):
+            expected = cipher.encrypt_message(MESSAGE)
+            for size in (1, 4, 17, 1000):
+                stream = cipher.encryptor()
+                self.assertEqual("".join(stream.crypt_chunks(_Chunks(MESSAGE, size))), expected)
+
+                stream = cipher.decryptor()
+                out = "".join( stream.update(c) for c in _Chunks(expected, size) )
+                self.assertEqual(out + stream.finalize(), cipher.decrypt_message(expected))
+
+                # Bytes chunks through the AES_stream pipeline
+                stream = cipher.encryptor()
+                chunks = _Chunks(MESSAGE.encode("ascii"), size)
+                self.assertEqual(b"".join(AES_stream.cipherChunks(chunks, stream)),
+                                 expected.encode("ascii"))
+            # end for size
+        # end for cipher
+    # end testStreams
+
+    def testCrack(self):
+        plainText = "".join( c for c in MESSAGE.upper() if c.isalpha() )
+        cipherTexts = [ shift(key).encrypt_message(MESSAGE) for key in range(26) ]
+        for key, cipherText in enumerate(cipherTexts):
+            for method in (shift_cryptanalysis.CHI_SQUARED, shift_cryptanalysis.LOG_LIKELIHOOD):
+                results = shift_cryptanalysis.crack(cipherText, method = method)
+                self.assertEqual(len(results), 26)
+                self.assertEqual(results[0][0], key)
+                self.assertEqual(results[0][2], plainText)
+                self.assertEqual(sorted( r[0] for r in results ), list(range(26)))
+                scores = [ r[1] for r in results ]
+                self.assertEqual(scores, sorted(scores))
+            # end for method
+        # end for key, cipherText
+
+        results = shift_cryptanalysis.crack_batch([ c.encode("ascii") for c in cipherTexts ])
+        for key, result in enumerate(results):
+            self.assertEqual(result, [ (key, result[0][1], plainText.encode("ascii")) ])
+
+        self.assertEqual(shift_cryptanalysis.letter_histogram("aAb, z!")[:3], [2, 1, 0])
+        self.assertEqual(len(shift_cryptanalysis.crack("", count = 2)), 2)
+        self.assertRaises(ValueError, shift_cryptanalysis.score_keys, [0] * 26, "other")
+    # end testCrack
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+'''
+Test cases for the GF(2^8) arithmetic in galos
+'''
+import itertools
+import os
+import unittest
+from Cryptography import galos
+from Cryptography.AES_cipher import AES
+from Cryptography.reed_solomon import ReedSolomon
+
+class Test(unittest.TestCase):
+
+    def testTables(self):
+        for a in range(256):
+            for b in range(256):
+                self.assertEqual(galos.MUL[a][b], galos.FFMulFast(a, b))
+        for a in range(1, 256):
+            self.assertEqual(galos.FFMul(a, galos.FFInv(a)), 1)
+            self.assertEqual(galos.FFDiv(galos.FFMul(a, 0x53), 0x53), a)
+            self.assertEqual(galos.FFPow(a, 255), 1)
+            self.assertEqual(galos.FFPow(a, -1), galos.FFInv(a))
+            self.assertEqual(galos.FFPow(a, 3), galos.FFMul(a, galos.FFMul(a, a)))
+        self.assertRaises(ZeroDivisionError, galos.FFInv, 0)
+        self.assertRaises(ZeroDivisionError, galos.FFDiv, 1, 0)
+        # FIPS-197 section 4.2 example, {57} . {83} = {c1}
+        self.assertEqual(galos.FFMul(0x57, 0x83), 0xc1)
+    # end testTables
+
+    def testSBox(self):
+        self.assertEqual(list(galos.SBOX), AES._sbox)
+        self.assertEqual(list(galos.INV_SBOX), AES._invsbox)
+    # end testSBox
+
+    def testRegions(self):
+        data = os.urandom(1000)
+        other = os.urandom(1000)
+        numpy = galos.np
+        try:
+            # Run with and without NumPy when it is installed
+            for galos.np in set([numpy, None]):
+                for c in (0, 1, 2, 0x53, 0xff):
+                    expected = bytes( galos.FFMul(c, x) for x in data )
+                    self.assertEqual(galos.FFMulRegion(memoryview(data), c), expected)
+
+                    dst = bytearray(other)
+                    galos.FFMulAddRegion(dst, data, c)
+                    self.assertEqual(bytes(dst), bytes( a ^ b for a, b in zip(other, expected) ))
+                # end for c
+
+                matrix = [ [1, 2, 3], [0, 0x8e, 1] ]
+                rows = galos.FFDotRegion(matrix, [data, other, data[::-1]])
+                for row, result in zip(matrix, rows):
+                    expected = bytes( galos.FFMul(row[0], a) ^ galos.FFMul(row[1], b) ^
+                                      galos.FFMul(row[2], c)
+                                      for a, b, c in zip(data, other, data[::-1]) )
+                    self.assertEqual(result, expected)
+            # end for galos.np
+        finally:
+            galos.np = numpy
+    # end testRegions
+
+    def testReedSolomon(self):
+        rs = ReedSolomon(dataShards = 4, parityShards = 3)
+        data = [ os.urandom(257) for i in range(4) ]
+        parity = rs.encode(data)
+        self.assertEqual(len(parity), 3)
+
+        # Every combination of up to three lost shards can be recovered
+        for lost in range(4):
+            for missing in itertools.combinations(range(7), lost):
+                shards = data + parity
+                for i in missing:
+                    shards[i] = None
+                self.assertEqual(rs.decode(shards), data)
+        # end for lost in range(4)
+
+        self.assertRaises(ValueError, rs.decode, [None] * 4 + parity)
+    # end testReedSolomon
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,316 @@
+# Name: benchmark.py
+# Purpose:  Measures the speed of the ciphers and engines in this repository
+#           and compares runs to find regressions.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Useage: Every result is the best of several timed repeats and is stored as
+# a value, a unit and whether higher is better.  Saving a run as JSON and
+# passing it back with --compare reports every result that is worse than the
+# saved one by more than the threshold, and exits with status 1 if any are.
+# Runs are only compared when they used the same input sizes, i.e. both or
+# neither used --quick, otherwise the exit status is 2.
+#   python benchmark.py --output before.json
+#   python benchmark.py --compare before.json --threshold 0.10
+#   python benchmark.py --quick --filter aes.ctr
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from AES_cipher import AES, AES_128, AES_192, AES_256, ExpandedKey
+from AES_modes import ECBEncryptor, CBCEncryptor, CBCDecryptor, CTREncryptor
+from AES_gcm import GCMEncryptor
+from AES_bitslice import BitslicedAES
+from AES_translate import TranslateAES
+from AES_numpy import NumpyAES, np
+from shift_cipher import shift
+from vigenere_cipher import vigenere
+import galos
+
+_keyLengths = ( ("128", AES_128), ("192", AES_192), ("256", AES_256) )
+
+def _Time( function, repeats = 5, minTime = 0.2 ):
+    """
+    Times a function, calling it enough times per repeat to run for at least
+    minTime seconds.
+
+    @param function:  The function to time, called with no arguments
+    @param repeats: The number of repeats, the fastest is used
+    @param minTime: The shortest time for one repeat in seconds
+
+    @return: The fastest time of a single call in seconds
+    """
+    # Find the number of calls needed for a repeat to take minTime
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= minTime:
+            break
+        calls *= 2 if elapsed == 0 else max(2, int(minTime / elapsed) + 1)
+    # end while True
+
+    best = elapsed / calls
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    # end for repeat
+    return best
+# end _Time
+
+def _Latency( function, repeats, minTime ):
+    """
+    @return: A result for the time of one call in microseconds
+    """
+    return { "value": _Time(function, repeats, minTime) * 1e6,
+             "unit": "us", "higherIsBetter": False }
+# end _Latency
+
+def _Throughput( function, size, repeats, minTime, unit = "MB/s" ):
+    """
+    @return: A result for the rate of one call processing size units
+    """
+    scale = 1e6 if unit == "MB/s" else 1.0
+    return { "value": size / _Time(function, repeats, minTime) / scale,
+             "unit": unit, "higherIsBetter": True }
+# end _Throughput
+
+def _Parameters( quick ):
+    """
+    The input sizes of a run.  Results are only comparable between runs with
+    the same parameters.
+
+    @param quick:  Use smaller inputs
+
+    @return: A dictionary of the parameters
+    """
+    return { "quick": quick,
+             "bulkSize": 4096 if quick else 1 << 16,
+             "messageSizes": [100, 1000] if quick else [100, 1000, 10000] }
+# end _Parameters
+
+def _Benchmarks( quick ):
+    """
+    Lists the benchmarks to run
+
+    @param quick:  Use smaller inputs
+
+    @return: A list of (name, function) pairs, each function takes the
+             repeats and minTime and returns a result
+    """
+    parameters = _Parameters(quick)
+    bulkSize = parameters["bulkSize"]
+    data = os.urandom(bulkSize)
+    iv = bytes(range(16))
+    benchmarks = []
+
+    for bits, keyLength in _keyLengths:
+        key = bytes(range(keyLength * 4))
+        aes = AES(keyLength)
+        block = bytes(16)
+        benchmarks += [
+            ("aes.block.encrypt.%s" % bits,
+             lambda r, t, aes=aes, key=key: _Latency(lambda: aes.encrypt_block(block, key), r, t)),
+            ("aes.block.decrypt.%s" % bits,
+             lambda r, t, aes=aes, key=key: _Latency(lambda: aes.decrypt_block(block, key), r, t)),
+            ("aes.keyExpansion.%s" % bits,
+             lambda r, t, aes=aes, key=key: _Latency(
+                 lambda: ExpandedKey(aes.KeyExpansion(list(key))), r, t)),
+        ]
+
+        modes = (
+            ("ecb", lambda key: ECBEncryptor(key, padding = False)),
+            ("cbc", lambda key: CBCEncryptor(key, iv, padding = False)),
+            ("cbc.decrypt", lambda key: CBCDecryptor(key, iv, padding = False)),
+            ("ctr", lambda key: CTREncryptor(key, iv)),
+            ("gcm", lambda key: GCMEncryptor(key, iv[:12])),
+        )
+        for mode, makeCipher in modes:
+            def run(r, t, key=key, makeCipher=makeCipher):
+                def crypt():
+                    cipher = makeCipher(key)
+                    cipher.update(data)
+                    cipher.finalize()
+                return _Throughput(crypt, bulkSize, r, t)
+            benchmarks.append( ("aes.%s.%s" % (mode, bits), run) )
+        # end for mode, makeCipher
+
+        bitsliced = BitslicedAES(keyLength)
+        benchmarks.append( ("engine.bitslice.ecb.%s" % bits,
+            lambda r, t, engine=bitsliced, key=key: _Throughput(
+                lambda: engine.encrypt_blocks(data, key), bulkSize, r, t)) )
+        translateEngine = TranslateAES(keyLength)
+        benchmarks.append( ("engine.translate.ecb.%s" % bits,
+            lambda r, t, engine=translateEngine, key=key: _Throughput(
+                lambda: engine.encrypt_blocks(data, key), bulkSize, r, t)) )
+        if np is not None:
+            numpyEngine = NumpyAES(keyLength)
+            benchmarks.append( ("engine.numpy.ctr.%s" % bits,
+                lambda r, t, engine=numpyEngine, key=key: _Throughput(
+                    lambda: engine.ctr(key, iv, data), bulkSize, r, t)) )
+    # end for bits, keyLength
+
+    for size in parameters["messageSizes"]:
+        message = ("The quick brown fox jumps over the lazy dog. " * (size // 45 + 1))[:size]
+        for name, cipher in ( ("shift", shift(7)), ("vigenere", vigenere([11, 4, 12, 14, 13])) ):
+            benchmarks.append( ("%s.encrypt.%d" % (name, size),
+                lambda r, t, cipher=cipher, message=message: _Throughput(
+                    lambda: cipher.encrypt_message(message), len(message), r, t)) )
+    # end for size in sizes
+
+    pairs = [ (a, b) for a in range(0, 256, 5) for b in range(1, 256, 7) ]
+    def mulRate(function):
+        def run(r, t):
+            def multiply():
+                for a, b in pairs:
+                    function(a, b)
+            return _Throughput(multiply, len(pairs), r, t, unit = "ops/s")
+        return run
+    # end mulRate
+    benchmarks += [
+        ("galos.FFMul", mulRate(galos.FFMul)),
+        ("galos.FFMulFast", mulRate(galos.FFMulFast)),
+        ("galos.FFMulRegion", lambda r, t: _Throughput(
+            lambda: galos.FFMulRegion(data, 0x57), bulkSize, r, t)),
+    ]
+    return benchmarks
+# end _Benchmarks
+
+def runBenchmarks( quick = False, nameFilter = None, repeats = 5, minTime = 0.2 ):
+    """
+    Runs the benchmarks
+
+    @param quick:  Use smaller inputs and fewer, shorter repeats
+    @param nameFilter: Only run the benchmarks whose names contain this
+    @param repeats: The number of timed repeats of each benchmark
+    @param minTime: The shortest time for one repeat in seconds
+
+    @return: A dictionary of the environment and the results by name
+    """
+    if quick:
+        repeats, minTime = min(repeats, 3), min(minTime, 0.05)
+
+    results = {}
+    for name, run in _Benchmarks(quick):
+        if nameFilter == None or nameFilter in name:
+            results[name] = run(repeats, minTime)
+    # end for name, run
+
+    return { "python": platform.python_version(),
+             "implementation": platform.python_implementation(),
+             "machine": platform.machine(),
+             "numpy": None if np is None else np.__version__,
+             "quick": quick,
+             "parameters": _Parameters(quick),
+             "results": results }
+# end runBenchmarks
+
+def compareResults( baseline, current, threshold = 0.10 ):
+    """
+    Compares two runs
+
+    @param baseline:  The earlier run as returned by runBenchmarks
+    @param current: The later run
+    @param threshold: The fraction a result may get worse by before it is
+                      reported
+
+    @return: A list of (name, baseline value, current value, change) for each
+             regression, where change is the fraction the result got worse by
+
+    @raise ValueError: If the runs used different parameters, e.g. one of
+                       them was a quick run
+    """
+    # Runs saved before the parameters were recorded only have the quick flag,
+    # so only that can be compared against them
+    if "parameters" in baseline:
+        before, after = baseline["parameters"], current.get("parameters")
+    else:
+        before = baseline.get("quick")
+        after = current.get("parameters", current).get("quick")
+    if before != after:
+        raise ValueError("The runs used different parameters, %r and %r" % (before, after))
+
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        before = baseline["results"].get(name)
+        if before == None or before["value"] == 0 or result["value"] == 0:
+            continue
+        if result["higherIsBetter"]:
+            change = 1 - result["value"] / before["value"]
+        else:
+            change = result["value"] / before["value"] - 1
+        if change > threshold:
+            regressions.append( (name, before["value"], result["value"], change) )
+    # end for name, result
+    return regressions
+# end compareResults
+
+def main( argv = None ):
+    parser = argparse.ArgumentParser(description = "Benchmark the ciphers")
+    parser.add_argument("--output", help = "write the results to this JSON file")
+    parser.add_argument("--compare", help = "a JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type = float, default = 0.10,
+                        help = "the fraction a result may get worse by (default 0.10)")
+    parser.add_argument("--filter", help = "only run benchmarks whose names contain this")
+    parser.add_argument("--repeats", type = int, default = 5)
+    parser.add_argument("--min-time", type = float, default = 0.2)
+    parser.add_argument("--quick", action = "store_true", help = "smaller inputs, shorter runs")
+    args = parser.parse_args(argv)
+
+    run = runBenchmarks(args.quick, args.filter, args.repeats, args.min_time)
+    for name, result in sorted(run["results"].items()):
+        print("%-28s %12.3f %s" % (name, result["value"], result["unit"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent = 2, sort_keys = True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        try:
+            regressions = compareResults(baseline, run, args.threshold)
+        except ValueError as e:
+            print("Not compared: %s" % e)
+            return 2
+        for name, before, after, change in regressions:
+            print("REGRESSION %-28s %12.3f -> %12.3f (%.1f%% worse)" %
+                  (name, before, after, change * 100))
+        if regressions:
+            return 1
+    # end if args.compare
+    return 0
+# end main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,77 @@ This code has been adapted from Neal R. Wagner's code found at
 http://www.cs.utsa.edu/~wagner/laws/FFM.html
 
 The original Java implementation was translated into python
+
+On top of the log (L) and antilog (E) tables the module provides a small
+GF(2^8) arithmetic engine using the AES polynomial x^8 + x^4 + x^3 + x + 1.
+The following tables are built the first time they are used, or read from the
+pre-generated AES_tables_frozen module if it has been written:
+   MUL       - The full 64 KiB multiplication table, MUL[a][b] = a.b.  Each row
+               is a 256 byte bytes object so it can also be used with
+               bytes.translate.
+   INV       - The multiplicative inverse of every element (INV[0] = 0)
+   SBOX      - The AES S-Box derived from INV and the affine transform
+   INV_SBOX  - The inverse of SBOX
+
+The region functions (FFMulRegion, FFMulAddRegion and FFDotRegion) apply the
+arithmetic to whole buffers at once for erasure coding.  Multiplying a buffer
+by a constant is a single bytes.translate with a row of MUL and adding buffers
+is an XOR of the buffers as large integers.  When NumPy is installed it is
+used for the XORs instead.  NumPy is only imported the first time a region
+function needs it, so importing this module stays cheap.
 '''
 
+from threading import Lock
+
+_tablesLock = Lock()
+
+def _NumPy():
+   """
+   Returns the numpy module, or None if it is not installed.  The result is
+   kept in the module global np, which may also be set directly.
+   """
+   global np
+   if "np" not in globals():
+      try:
+         import numpy
+      except ImportError:
+         numpy = None
+      np = numpy
+   return np
+
+def _Tables():
+   """
+   Returns the tables (MUL, INV, SBOX, INV_SBOX), loading or building them 
+   the first time.  They are kept in the module globals of the same names.
+   """
+   global MUL, INV, SBOX, INV_SBOX
+   if "MUL" not in globals():
+      with _tablesLock:
+         if "MUL" not in globals():
+            # The tables are read from the pre-generated AES_tables_frozen 
+            # module when it has been written (see AES_tables.freeze), which 
+            # skips building them.
+            try:
+               from AES_tables_frozen import MUL as mul, INV as inv, \
+                                             SBOX as sbox, INV_SBOX as invSbox
+            except ImportError:
+               mul, inv, sbox, invSbox = _BuildTables()
+            # MUL is set last since it marks the tables as loaded
+            INV, SBOX, INV_SBOX = inv, sbox, invSbox
+            MUL = mul
+   return MUL, INV, SBOX, INV_SBOX
+
+_tableNames = ( "MUL", "INV", "SBOX", "INV_SBOX" )
+
+def __getattr__( name ):
+   # Reading galos.np imports NumPy on first use and reading one of the tables
+   # loads them
+   if name == "np":
+      return _NumPy()
+   if name in _tableNames:
+      return _Tables()[_tableNames.index(name)]
+   raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 L = [ \
   0x00, 0x00, 0x19, 0x01, 0x32, 0x02, 0x1a, 0xc6, 0x4b, 0xc7, 0x1b, 0x68, 0x33, 0xee, 0xdf, 0x03,
   0x64, 0x04, 0xe0, 0x0e, 0x34, 0x8d, 0x81, 0xef, 0x4c, 0x71, 0x08, 0xc8, 0xf8, 0x69, 0x1c, 0xc1,
@@ -49,4 +118,149 @@ def FFMulFast( a, b  ):
    t = L[a] + L[b]
    if( t > 255):
       t -= 255
-   return E[t]
\ No newline at end of file
+   return E[t]
+
+def FFMul( a, b ):
+   """
+   Multiplies two elements with a single table read
+   """
+   try:
+      return MUL[a][b]
+   except NameError:
+      return _Tables()[0][a][b]
+
+def FFInv( a ):
+   """
+   Returns the multiplicative inverse of a
+   
+   @raise ZeroDivisionError: If a is zero
+   """
+   if a == 0:
+      raise ZeroDivisionError("0 has no inverse in GF(2^8)")
+   try:
+      return INV[a]
+   except NameError:
+      return _Tables()[1][a]
+
+def FFDiv( a, b ):
+   """
+   Divides a by b
+   
+   @raise ZeroDivisionError: If b is zero
+   """
+   return FFMul(a, FFInv(b))
+
+def FFPow( a, n ):
+   """
+   Raises a to the integer power n.  Negative powers use the inverse of a.
+   """
+   if a == 0:
+      if n < 0:
+         raise ZeroDivisionError("0 has no inverse in GF(2^8)")
+      return 1 if n == 0 else 0
+   return E[(L[a] * n) % 255]
+
+def _Affine( b ):
+   """
+   The AES affine transform:
+   b'i = bi ^ b(i+4) ^ b(i+5) ^ b(i+6) ^ b(i+7) ^ ci where c = {63}
+   """
+   result = 0
+   for i in range(8):
+      bit = (b >> i) ^ (b >> ((i + 4) % 8)) ^ (b >> ((i + 5) % 8)) ^ \
+            (b >> ((i + 6) % 8)) ^ (b >> ((i + 7) % 8)) ^ (0x63 >> i)
+      result |= (bit & 1) << i
+   return result
+
+def _BuildTables():
+   """
+   Builds the MUL, INV, SBOX and INV_SBOX tables from L and E
+   """
+   # The full multiplication table.  Row a holds the products a.b for every b.
+   mul = [ bytes(256) ] + \
+         [ bytes( [0] + [ E[(L[a] + L[b]) % 255] for b in range(1, 256) ] ) 
+           for a in range(1, 256) ]
+   
+   # The multiplicative inverses.  0 has no inverse and maps to 0 as in AES.
+   inv = bytes( [0] + [ E[(255 - L[a]) % 255] for a in range(1, 256) ] )
+   
+   # The AES S-Box is the affine transform of the inverse, and INV_SBOX undoes it
+   sbox = bytes( _Affine(inv[x]) for x in range(256) )
+   invSbox = bytes( sbox.index(x) for x in range(256) )
+   return mul, inv, sbox, invSbox
+
+def _AsBytes( buf ):
+   """
+   Returns the buffer as a bytes or bytearray object so it can be translated
+   """
+   if isinstance(buf, (bytes, bytearray)):
+      return buf
+   return bytes(buf)
+
+def FFMulRegion( buf, c ):
+   """
+   Multiplies every byte of the buffer by the constant c
+   
+   @param buf:  Any bytes-like object
+   @param c: The constant to multiply by
+   
+   @return: The products as bytes
+   """
+   if c == 1:
+      return bytes(buf)
+   return bytes(_AsBytes(buf).translate(_Tables()[0][c]))
+
+def FFMulAddRegion( dst, src, c ):
+   """
+   Multiplies every byte of src by the constant c and adds (XORs) the result
+   into dst, i.e. dst += c.src
+   
+   @param dst:  A writable buffer (bytearray or memoryview) updated in place
+   @param src: A bytes-like object the same length as dst
+   @param c: The constant to multiply by
+   """
+   assert( len(dst) == len(src) )
+   if c == 0 or len(dst) == 0:
+      return
+   product = _AsBytes(src) if c == 1 else _AsBytes(src).translate(_Tables()[0][c])
+   np = _NumPy()
+   if np is not None:
+      target = np.frombuffer(dst, dtype = np.uint8)
+      target ^= np.frombuffer(product, dtype = np.uint8)
+   else:
+      dst[:] = (int.from_bytes(dst, "little") ^
+                int.from_bytes(product, "little")).to_bytes(len(dst), "little")
+
+def FFDotRegion( matrix, buffers ):
+   """
+   Multiplies a matrix of constants by a vector of equal length buffers.  Row i
+   of the result is the sum of matrix[i][j].buffers[j] over every j.
+   
+   @param matrix:  A list of rows, each a list of len(buffers) constants
+   @param buffers: A list of equal length bytes-like objects
+   
+   @return: A list of bytes, one for each row of the matrix
+   """
+   length = len(buffers[0]) if buffers else 0
+   for buf in buffers:
+      assert( len(buf) == length )
+   sources = [ _AsBytes(buf) for buf in buffers ]
+   mul = _Tables()[0]
+   np = _NumPy()
+   
+   results = []
+   for row in matrix:
+      assert( len(row) == len(sources) )
+      if np is not None:
+         acc = np.zeros(length, dtype = np.uint8)
+         for c, src in zip(row, sources):
+            if c != 0:
+               acc ^= np.frombuffer(src if c == 1 else src.translate(mul[c]), dtype = np.uint8)
+         results.append(acc.tobytes())
+      else:
+         acc = 0
+         for c, src in zip(row, sources):
+            if c != 0:
+               acc ^= int.from_bytes(src if c == 1 else src.translate(mul[c]), "little")
+         results.append(acc.to_bytes(length, "little"))
+   return results
@@ -0,0 +1,162 @@
+# Name: reed_solomon.py
+# Purpose:  A simple systematic Reed-Solomon erasure code over GF(2^8) built
+#           on the region operations in galos.
+#
+# Author Website: https://www.cybercitadellabs.com
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Brian S. Cain
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import galos
+from galos import FFDotRegion
+
+class ReedSolomon:
+   """
+   Systematic Reed-Solomon erasure code.  A stripe of k equal length data
+   shards is extended with m parity shards, and the data can be recovered from
+   any k of the k + m shards.
+
+   The parity rows of the generator matrix form a Cauchy matrix,
+   C[i][j] = 1 / (x_i + y_j) with x_i = k + i and y_j = j.  Every square
+   sub-matrix of a Cauchy matrix is invertible, so any k rows of the generator
+   (identity rows for the data shards and Cauchy rows for the parity) can be
+   inverted to recover the data.
+
+   Useage: From within a Python console issue the following commands.
+   >>> import reed_solomon
+   >>> rs = reed_solomon.ReedSolomon(dataShards = 4, parityShards = 2)
+   >>> parity = rs.encode(data)
+   >>> shards = data + parity
+   >>> shards[1] = shards[4] = None
+   >>> data = rs.decode(shards)
+   """
+
+   def __init__(self, dataShards, parityShards):
+      """
+      Name: __init__
+      Purpose:  Builds the generator matrix for the code
+
+      Inputs:
+         dataShards:  The number of data shards, k
+         parityShards: The number of parity shards, m.  k + m may be at most
+                       256.
+
+      Return: None
+      """
+      assert( dataShards > 0 and parityShards >= 0 )
+      assert( dataShards + parityShards <= 256 )
+
+      self.dataShards = dataShards
+      self.parityShards = parityShards
+
+      self._parityMatrix = [ [ galos.INV[(dataShards + i) ^ j] for j in range(dataShards) ]
+                             for i in range(parityShards) ]
+   # end __init__
+
+   def encode( self, data ):
+      """
+      Name: encode
+      Purpose: Computes the parity shards for a stripe
+
+      Inputs:
+         data: A list of k equal length bytes-like data shards
+
+      Return: A list of m parity shards as bytes
+      """
+      assert( len(data) == self.dataShards )
+      return FFDotRegion( self._parityMatrix, data )
+   # end encode
+
+   def decode( self, shards ):
+      """
+      Name: decode
+      Purpose: Recovers the data shards of a stripe
+
+      Inputs:
+         shards: A list of the k + m shards in order (data then parity) with
+                 None in place of each missing shard
+
+      Return: A list of the k data shards as bytes
+
+      Raises: ValueError if fewer than k shards are present
+      """
+      k = self.dataShards
+      assert( len(shards) == k + self.parityShards )
+
+      if all( shards[j] is not None for j in range(k) ):
+         return [ bytes(shards[j]) for j in range(k) ]
+
+      present = [ i for i in range(len(shards)) if shards[i] is not None ][:k]
+      if len(present) < k:
+         raise ValueError("At least %d shards are needed to decode" % k)
+
+      # The rows of the generator matrix for the shards that are present
+      rows = []
+      for i in present:
+         if i < k:
+            rows.append( [ 1 if j == i else 0 for j in range(k) ] )
+         else:
+            rows.append( list(self._parityMatrix[i - k]) )
+      # end for i in present
+
+      return FFDotRegion( _Invert(rows), [ shards[i] for i in present ] )
+   # end decode
+# end class ReedSolomon
+
+def _Invert( matrix ):
+   """
+   Name: _Invert
+   Purpose: Inverts a square matrix over GF(2^8) with Gauss-Jordan elimination
+
+   Inputs:
+      matrix: A list of rows, modified directly
+
+   Return: The inverse matrix
+   """
+   n = len(matrix)
+   inverse = [ [ 1 if j == i else 0 for j in range(n) ] for i in range(n) ]
+
+   for col in range(n):
+      pivot = col
+      while matrix[pivot][col] == 0:
+         pivot += 1
+         if pivot == n:
+            raise ValueError("Matrix is singular")
+      matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+      inverse[col], inverse[pivot] = inverse[pivot], inverse[col]
+
+      # Scale the pivot row so the pivot is 1
+      scale = galos.MUL[galos.INV[matrix[col][col]]]
+      matrix[col] = [ scale[v] for v in matrix[col] ]
+      inverse[col] = [ scale[v] for v in inverse[col] ]
+
+      # Eliminate the column from every other row
+      for row in range(n):
+         factor = matrix[row][col]
+         if row != col and factor != 0:
+            mul = galos.MUL[factor]
+            matrix[row] = [ a ^ mul[b] for a, b in zip(matrix[row], matrix[col]) ]
+            inverse[row] = [ a ^ mul[b] for a, b in zip(inverse[row], inverse[col]) ]
+   # end for col in range(n)
+   return inverse
+# end _Invert
@@ -27,7 +27,40 @@
 
 
 from random import seed, randint
-from re import sub
+from string import ascii_uppercase
+
+# The 26 letters as bytes, the only characters kept in a plain text
+_letters = ascii_uppercase.encode("ascii")
+
+# Every other byte, removed from the plain text before encryption
+_nonLetters = bytes( c for c in range(256) if c not in _letters )
+
+# Translation tables shifting by each key value, shared with vigenere_cipher.
+# Encryption only maps the letters, the other bytes are deleted by the same
+# translate call.  Decryption maps every byte, not just the letters, with the
+# same arithmetic as the letters, (x - key) % 26 counting from 'A'.
+_encryptTables = [ bytes.maketrans(_letters, _letters[k:] + _letters[:k]) for k in range(26) ]
+_decryptTables = [ bytes( (c - _letters[0] - k) % 26 + _letters[0] for c in range(256) )
+                   for k in range(26) ]
+
+def _LettersOf( text ):
+   """
+   Name: _LettersOf
+   Purpose: Reduces a message to the plain text that is encrypted, its 
+            letters upper cased with every other character removed.  Upper 
+            casing comes first since it can turn characters outside of ASCII
+            into letters, everything else outside of ASCII is dropped by the
+            encoding.
+   
+   Inputs:
+      text: A string or bytes
+   
+   Return: The upper case letters as bytes
+   """
+   if isinstance(text, (bytes, bytearray, memoryview)):
+      return bytes(text).upper().translate(None, _nonLetters)
+   return text.upper().encode("ascii", "ignore").translate(None, _nonLetters)
+# end _LettersOf
 
 class shift:
    """
@@ -39,6 +72,14 @@ class shift:
    >>> cipher = shift_cipher.Shift()
    >>> cipherText = cipher.encrypt_message("Secret Message to be encrypted!")
    >>> plainText = cipher.decrypt_message(cipherText)
+   
+   Messages may also be given as bytes, e.g. the contents of a large log
+   file, in which case bytes are returned.  Messages too large to hold in 
+   memory are encrypted a chunk at a time with the objects returned by 
+   encryptor() and decryptor().
+   >>> stream = cipher.encryptor()
+   >>> for out in stream.crypt_chunks(open("server.log", "rb")):
+   ...    sink.write(out)
    """
    
    
@@ -49,6 +90,12 @@ class shift:
    # The Key to use during encryption / decryption 
    __key = int()
    
+   # Translation tables for every key, built once.  Encrypting or 
+   # decrypting a message is then a single bytes.translate call, which also
+   # deletes the characters that are not letters when encrypting.
+   __encrypt_tables = _encryptTables
+   __decrypt_tables = _decryptTables
+   
    def __init__(self, key=None):
       """
       Name: __init__
@@ -126,104 +173,154 @@ class shift:
       Purpose: Encrypt the message with the stored key
       
       Inputs:
-         message: The string representation of the message to encrypt
+         message: The string or bytes representation of the message to 
+                  encrypt
          
-      Return: The message cipher text string
+      Return: The message cipher text, a string or bytes as the message is
       """
       
+      table = self.__encrypt_tables[self.__key % 26]
+      
+      if isinstance(message, (bytes, bytearray, memoryview)):
+         return bytes(message).upper().translate(table, _nonLetters)
+      
       # Convert the message text into a plain text with all spaces and 
-      # punctuation removed. 
-      plainText = sub(r'[^A-Z]', '', message.upper())
-      cipherText = ""
-      
-      charIndex = 0
-      
-      # Encrypt the message 1 character at a time
-      while charIndex < len(plainText):
-         cipherText += \
-            self.__encrypt_character( plainText[charIndex], self.__key)
-         charIndex += 1
-      return cipherText
+      # punctuation removed.  Upper casing comes first since it can turn
+      # characters outside of ASCII into letters, everything else outside of
+      # ASCII is dropped by the encoding and the rest by the translation.
+      plainText = message.upper().encode("ascii", "ignore")
+      return plainText.translate(table, _nonLetters).decode("ascii")
    # end encrypt_message
    
    def decrypt_message( self, cipherText ):
       """
       Name: decrypt_message
-      Purpose: Encrypt the message with the stored key
+      Purpose: Decrypt the message with the stored key
       
       Inputs:
-         cipherText: The cipher text of the message to decrypt
+         cipherText: The cipher text of the message to decrypt, a string or 
+                     bytes.  Every character is decrypted as if it were a 
+                     letter, so characters other than A - Z, which 
+                     encrypt_message never produces, still give a letter.
          
-      Return: The message plain text string
+      Return: The message plain text, a string or bytes as the cipher text is
       """
       
-      plainText = ""
+      key = self.__key % 26
       
-      charIndex = 0
+      if isinstance(cipherText, (bytes, bytearray, memoryview)):
+         return bytes(cipherText).translate(self.__decrypt_tables[key])
       
-      # Decrypt the message one character at a time.
-      while charIndex < len(cipherText):
-         plainText += \
-            self.__decrypt_character( cipherText[charIndex], 
-                               self.__key)
-         charIndex += 1
-      # end while charIndex < len(cipherText)
+      if cipherText.isascii():
+         return cipherText.encode("ascii").translate(
+                   self.__decrypt_tables[key]).decode("ascii")
       
-      return plainText
+      # Characters outside of ASCII are beyond the tables
+      offset = self.__char_offset
+      return "".join( chr((ord(c) - offset - key) % 26 + offset) for c in cipherText )
+   # end decrypt_message
    
-   def __encrypt_character( self, char, keyVal ):
+   def encryptor( self ):
       """
-      Name: __encrypt_character
-      Purpose: Encrypt a single character the given key value
+      Name: encryptor
+      Purpose: Creates an object that encrypts a message a chunk at a time 
+               with the stored key
       
-      Inputs:
-         char: The character to encrypt
-         keyVal: The key value to encrypt the character with
-         
-      Return: The encrypted character
+      Return: A shift_stream
       """
+      return shift_stream( self, encrypt = True )
+   # end encryptor
+   
+   def decryptor( self ):
+      """
+      Name: decryptor
+      Purpose: Creates an object that decrypts a cipher text a chunk at a 
+               time with the stored key
       
-      assert( type(char) == str )
-      assert( len(char) == 1 )
-      
-      # Update the character to be our standard Alphabet mapping
-      # A -> 0; B->1 ... Z -> 25
-      x = ord(char) - self.__char_offset
+      Return: A shift_stream
+      """
+      return shift_stream( self, encrypt = False )
+   # end decryptor
+# end class shift
+
+class shift_stream:
+   """
+   Encrypts or decrypts a message one chunk at a time.  Every letter is 
+   shifted by the same key, so each chunk is independent of the others and 
+   the chunks may split the message anywhere.
+   
+   Useage: Create one with shift.encryptor() or shift.decryptor().  Either 
+   pass every chunk to update() and call finalize() at the end, or pass an 
+   iterable of the chunks to crypt_chunks().  The object also works as the 
+   cipher of the AES_stream pipeline.
+   """
+   
+   def __init__(self, cipher, encrypt):
+      """
+      Name: __init__
+      Purpose:  Python class initialization function.
       
-      # Perform the Encryption
-      retVal = ( x + keyVal ) % 26
+      Inputs:
+         cipher:  The shift cipher whose key to use.  The key is copied, so 
+                  changing the key of the cipher does not affect the stream.
+         encrypt: True to encrypt, False to decrypt
       
-      # Translate back to the standard ASCII mapping of the character
-      # for display in python and translate it back into a string
-      retVal = chr(retVal + self.__char_offset)
+      Return: None
+      """
       
-      return retVal
-   # end encrypt_character
+      self.__cipher = shift( cipher.get_key() % 26 )
+      if encrypt:
+         self.__function = self.__cipher.encrypt_message
+      else:
+         self.__function = self.__cipher.decrypt_message
+      self.__empty = ""
+   # end __init__
    
-   def __decrypt_character( self, char, keyVal ):
+   def update( self, chunk ):
       """
-      Name: __decrypt_character
-      Purpose: Decrypt a single character the given key value
+      Name: update
+      Purpose: Encrypt or decrypt the next chunk of the message
       
       Inputs:
-         char: The character to decrypt
-         keyVal: The key value to decrypt the character with
+         chunk: A string or bytes-like chunk
          
-      Return: The encrypted character
+      Return: The output for the chunk, a string for a string and bytes 
+              otherwise
       """
-      assert( type(char) == str )
-      assert( len(char) == 1 )
       
-      # Update the character to be our standard Alphabet mapping
-      # A -> 0; B->1 ... Z -> 25
-      x = ord(char) - self.__char_offset
+      out = self.__function( chunk )
+      self.__empty = out[:0]
+      return out
+   # end update
+   
+   def finalize( self ):
+      """
+      Name: finalize
+      Purpose: Ends the message.  Nothing is buffered, so there is never any 
+               output left, this is for use wherever an AES_modes cipher is.
       
-      retVal = ( x - keyVal ) % 26
+      Return: An empty string or bytes, as the last chunk was
+      """
+      return self.__empty
+   # end finalize
+   
+   def crypt_chunks( self, chunks ):
+      """
+      Name: crypt_chunks
+      Purpose: Encrypt or decrypt a message given as an iterable of chunks
       
-      # Translate back to the standard ASCII mapping of the character
-      # for display in python and translate it back into a string
-      retVal = chr(retVal + self.__char_offset)
+      Inputs:
+         chunks: An iterable of string or bytes-like chunks, e.g. an open 
+                 file, which is read a line at a time
+         
+      Return: A generator of the non empty output chunks
+      """
       
-      return retVal
-   # end encrypt_character
-# end class shift
+      for chunk in chunks:
+         out = self.update( chunk )
+         if out:
+            yield out
+      # end for chunk in chunks
+      self.finalize()
+   # end crypt_chunks
+# end class shift_stream
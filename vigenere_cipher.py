@@ -27,7 +27,15 @@
 
 
 from random import seed, randint
-from re import sub
+
+from galos import _NumPy
+from shift_cipher import _LettersOf, _encryptTables, _decryptTables
+
+# Texts of at least this many characters with keys of at least this length
+# are processed with NumPy when it is installed.  Below that the translation
+# of each residue class is as fast.
+NUMPY_MIN_SIZE = 1 << 16
+NUMPY_MIN_KEY_LENGTH = 256
 
 class vigenere:
    """
@@ -39,6 +47,18 @@ class vigenere:
    >>> cipher = vigenere_cipher.vigenere()
    >>> cipherText = cipher.encrypt_message("Secret Message to be encrypted!")
    >>> plainText = cipher.decrypt_message(cipherText)
+   
+   Messages may also be given as bytes, in which case bytes are returned.
+   Messages too large to hold in memory are encrypted a chunk at a time with
+   the objects returned by encryptor() and decryptor().
+   >>> stream = cipher.encryptor()
+   >>> for out in stream.crypt_chunks(open("corpus.txt", "rb")):
+   ...    sink.write(out)
+   
+   Every character of a text at the same position modulo the key length is
+   shifted by the same key value, so the text is split into those residue
+   classes with extended slicing and each class is shifted with one
+   translate call.
    """
    
    
@@ -49,6 +69,10 @@ class vigenere:
    # The Key to use during encryption / decryption 
    __key = list()
    
+   # Translation tables for every key value, the same as the shift cipher's
+   __encrypt_tables = _encryptTables
+   __decrypt_tables = _decryptTables
+   
    def __init__(self, key=None):
       """
       Name: __init__
@@ -129,111 +153,221 @@ class vigenere:
       return self.__key
    # end get_key
    
-   def encrypt_message( self, message ):
+   def encrypt_message( self, message, phase = 0 ):
       """
       Name: encrypt_message
       Purpose: Encrypt the message with the stored key
       
       Inputs:
-         message: The string representation of the message to encrypt
+         message: The string or bytes representation of the message to 
+                  encrypt
+         phase: The index of the key value used for the first letter, for 
+                messages that continue an earlier one
          
-      Return: The message cipher text string
+      Return: The message cipher text, a string or bytes as the message is
       """
       
       # Convert the message text into a plain text with all spaces and 
-      # punctuation removed. 
-      plainText = sub(r'[^A-Z]', '', message.upper())
-      cipherText = ""
-      
-      charIndex = 0
-      
-      # Encrypt the message 1 character at a time
-      while charIndex < len(plainText):
-         cipherText += \
-            self.__encrypt_character( plainText[charIndex], 
-                               self.__key[charIndex % len(self.__key)])
-         charIndex += 1
-      return cipherText
+      # punctuation removed.
+      cipherText = self.__crypt( _LettersOf(message), self.__encrypt_tables, phase )
+      if isinstance(message, (bytes, bytearray, memoryview)):
+         return cipherText
+      return cipherText.decode("ascii")
    # end encrypt_message
    
-   def decrypt_message( self, cipherText ):
+   def decrypt_message( self, cipherText, phase = 0 ):
       """
       Name: decrypt_message
-      Purpose: Encrypt the message with the stored key
+      Purpose: Decrypt the message with the stored key
       
       Inputs:
-         cipherText: The cipher text of the message to decrypt
+         cipherText: The cipher text of the message to decrypt, a string or 
+                     bytes.  Every character is decrypted as if it were a 
+                     letter, as for the shift cipher.
+         phase: The index of the key value used for the first character, for 
+                cipher texts that continue an earlier one
          
-      Return: The message plain text string
+      Return: The message plain text, a string or bytes as the cipher text is
       """
       
-      plainText = ""
+      if isinstance(cipherText, (bytes, bytearray, memoryview)):
+         return self.__crypt( bytes(cipherText), self.__decrypt_tables, phase )
+      
+      if cipherText.isascii():
+         return self.__crypt( cipherText.encode("ascii"),
+                              self.__decrypt_tables, phase ).decode("ascii")
+      
+      if not cipherText:
+         return cipherText
       
-      charIndex = 0
+      # Characters outside of ASCII are beyond the tables
+      key = self.__rotated_key( phase )
+      period = len(key)
+      offset = self.__char_offset
+      return "".join( chr((ord(c) - offset - key[i % period]) % 26 + offset)
+                      for i, c in enumerate(cipherText) )
+   # end decrypt_message
+   
+   def encryptor( self ):
+      """
+      Name: encryptor
+      Purpose: Creates an object that encrypts a message a chunk at a time 
+               with the stored key
       
-      # Decrypt the message one character at a time.
-      while charIndex < len(cipherText):
-         plainText += \
-            self.__decrypt_character( cipherText[charIndex], 
-                               self.__key[charIndex % len(self.__key)])
-         charIndex += 1
-      # end while charIndex < len(cipherText)
+      Return: A vigenere_stream
+      """
+      return vigenere_stream( self, encrypt = True )
+   # end encryptor
+   
+   def decryptor( self ):
+      """
+      Name: decryptor
+      Purpose: Creates an object that decrypts a cipher text a chunk at a 
+               time with the stored key
       
-      return plainText
+      Return: A vigenere_stream
+      """
+      return vigenere_stream( self, encrypt = False )
+   # end decryptor
+   
+   def __rotated_key( self, phase ):
+      """
+      Name: __rotated_key
+      Purpose: Returns the key starting from the key value at index phase.  
+               An empty key raises a ZeroDivisionError, as it always has for
+               a message with any letters in it.
+      """
+      phase %= len(self.__key)
+      return self.__key[phase:] + self.__key[:phase]
+   # end __rotated_key
    
-   def __encrypt_character( self, char, keyVal ):
+   def __crypt( self, text, tables, phase ):
       """
-      Name: __encrypt_character
-      Purpose: Encrypt a single character the given key value
+      Name: __crypt
+      Purpose: Shift every residue class of the text by its key value
       
       Inputs:
-         char: The character to encrypt
-         keyVal: The key value to encrypt the character with
+         text: The text as bytes
+         tables: The 26 translation tables to shift with
+         phase: The index of the key value used for the first byte
          
-      Return: The encrypted character
+      Return: The shifted text as bytes
       """
       
-      assert( type(char) == str )
-      assert( len(char) == 1 )
+      # An empty text needs no key, even an empty one
+      if not text:
+         return text
+      
+      key = self.__rotated_key( phase )
+      period = len(key)
+      
+      if len(text) >= NUMPY_MIN_SIZE and period >= NUMPY_MIN_KEY_LENGTH:
+         np = _NumPy()
+      else:
+         np = None
+      
+      if np is not None:
+         # Look every byte up in the table of its key value at once, with the
+         # key values repeated across the whole text
+         table = np.frombuffer( b"".join(tables), dtype = np.uint8 ).reshape(26, 256)
+         keyVals = np.resize( np.array(key, dtype = np.uint8) % 26, len(text) )
+         return table[ keyVals, np.frombuffer(text, dtype = np.uint8) ].tobytes()
+      # end if NumPy
+      
+      out = bytearray(len(text))
+      for i, keyVal in enumerate(key):
+         out[i::period] = text[i::period].translate(tables[keyVal % 26])
+      # end for i, keyVal
+      return bytes(out)
+   # end __crypt
+# end class vigenere
+
+class vigenere_stream:
+   """
+   Encrypts or decrypts a message one chunk at a time.  The chunks may be of 
+   any size and may split the message anywhere, the output is the same as 
+   encrypting or decrypting the whole message at once.
+   
+   Useage: Create one with vigenere.encryptor() or vigenere.decryptor().  
+   Either pass every chunk to update() and call finalize() at the end, or 
+   pass an iterable of the chunks to crypt_chunks().  The object also works as
+   the cipher of the AES_stream pipeline.
+   """
+   
+   def __init__(self, cipher, encrypt):
+      """
+      Name: __init__
+      Purpose:  Python class initialization function.
       
-      # Update the character to be our standard Alphabet mapping
-      # A -> 0; B->1 ... Z -> 25
-      x = ord(char) - self.__char_offset
+      Inputs:
+         cipher:  The vigenere cipher whose key to use.  The key is copied, so 
+                  changing the key of the cipher does not affect the stream.
+         encrypt: True to encrypt, False to decrypt
       
-      # Perform the Encryption
-      retVal = ( x + keyVal ) % 26
+      Return: None
+      """
       
-      # Translate back to the standard ASCII mapping of the character
-      # for display in python and translate it back into a string
-      retVal = chr(retVal + self.__char_offset)
+      self.__cipher = vigenere( list(cipher.get_key()) )
+      self.__period = len(cipher.get_key())
+      if encrypt:
+         self.__function = self.__cipher.encrypt_message
+      else:
+         self.__function = self.__cipher.decrypt_message
       
-      return retVal
-   # end encrypt_character
+      # The index of the key value for the next letter.  Only the letters 
+      # that are kept count, so it advances by the length of each output.
+      self.__phase = 0
+      self.__empty = ""
+   # end __init__
    
-   def __decrypt_character( self, char, keyVal ):
+   def update( self, chunk ):
       """
-      Name: __decrypt_character
-      Purpose: Decrypt a single character the given key value
+      Name: update
+      Purpose: Encrypt or decrypt the next chunk of the message
       
       Inputs:
-         char: The character to decrypt
-         keyVal: The key value to decrypt the character with
+         chunk: A string or bytes-like chunk
          
-      Return: The encrypted character
+      Return: The output for the chunk, a string for a string and bytes 
+              otherwise
       """
-      assert( type(char) == str )
-      assert( len(char) == 1 )
       
-      # Update the character to be our standard Alphabet mapping
-      # A -> 0; B->1 ... Z -> 25
-      x = ord(char) - self.__char_offset
+      out = self.__function( chunk, self.__phase )
+      if out:
+         self.__phase = ( self.__phase + len(out) ) % self.__period
+      self.__empty = out[:0]
+      return out
+   # end update
+   
+   def finalize( self ):
+      """
+      Name: finalize
+      Purpose: Ends the message.  Nothing is buffered, so there is never any 
+               output left, this is for use wherever an AES_modes cipher is.
       
-      retVal = ( x - keyVal ) % 26
+      Return: An empty string or bytes, as the last chunk was
+      """
+      self.__phase = 0
+      return self.__empty
+   # end finalize
+   
+   def crypt_chunks( self, chunks ):
+      """
+      Name: crypt_chunks
+      Purpose: Encrypt or decrypt a message given as an iterable of chunks
       
-      # Translate back to the standard ASCII mapping of the character
-      # for display in python and translate it back into a string
-      retVal = chr(retVal + self.__char_offset)
+      Inputs:
+         chunks: An iterable of string or bytes-like chunks, e.g. an open 
+                 file, which is read a line at a time
+         
+      Return: A generator of the non empty output chunks
+      """
       
-      return retVal
-   # end encrypt_character
-# end class vigenere
\ No newline at end of file
+      for chunk in chunks:
+         out = self.update( chunk )
+         if out:
+            yield out
+      # end for chunk in chunks
+      self.finalize()
+   # end crypt_chunks
+# end class vigenere_stream